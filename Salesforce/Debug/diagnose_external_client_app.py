@@ -11,31 +11,32 @@ Usage:
 2. Run: python diagnose_external_client_app.py
 3. Compare results between working and failing apps
 
+Latency probe (slow loads):
+    python diagnose_external_client_app.py --probe 20
+Runs token, query, create and delete 20 times on fresh connections and prints
+DNS / connect / TLS / TTFB / transfer percentiles for each, to separate network
+problems from Salesforce-side processing time.
+
 Author: Snowflake Healthcare Integration Team
 """
 
-import requests
+import argparse
+import http.client
 import json
-import os
-from datetime import datetime
+import math
+import socket
+import ssl
 import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
 
-# Color constants for output
-class Colors:
-    RED = '\033[91m'
-    GREEN = '\033[92m'
-    YELLOW = '\033[93m'
-    BLUE = '\033[94m'
-    PURPLE = '\033[95m'
-    CYAN = '\033[96m'
-    WHITE = '\033[97m'
-    BOLD = '\033[1m'
-    UNDERLINE = '\033[4m'
-    END = '\033[0m'
+# The shared sfclient package lives one directory up, next to the other Salesforce scripts
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-def print_colored(message, color=Colors.WHITE):
-    """Print colored message"""
-    print(f"{color}{message}{Colors.END}")
+from sfclient import auth, config, transport
+from sfclient.console import Colors, print_colored
 
 def load_environment():
     """Load environment variables from .env file"""
@@ -43,18 +44,17 @@ def load_environment():
     
     try:
         # Try to load from .env file
-        if os.path.exists('.env'):
-            with open('.env', 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        key, value = line.split('=', 1)
-                        env_vars[key.strip()] = value.strip().strip('"\'')
+        env_file = config.find_env_file(('.env',) + config.ENV_FILE_LOCATIONS)
+        if env_file is not None:
+            env_vars = config.parse_env_file(env_file)
         
-        # Override with actual environment variables
+        # Override with actual environment variables; fall back to the .env_template key for the URL
         for key in ['SALESFORCE_CLIENT_ID', 'SALESFORCE_CLIENT_SECRET', 'SALESFORCE_INSTANCE_URL']:
-            if key in os.environ:
-                env_vars[key] = os.environ[key]
+            value = config.get_setting(env_vars, key)
+            if value:
+                env_vars[key] = value
+        if not env_vars.get('SALESFORCE_INSTANCE_URL') and env_vars.get('SALESFORCE_DEV_URL'):
+            env_vars['SALESFORCE_INSTANCE_URL'] = env_vars['SALESFORCE_DEV_URL']
                 
         return env_vars
         
@@ -66,17 +66,8 @@ def get_access_token(client_id, client_secret, instance_url):
     """Get Salesforce OAuth access token using Client Credentials Flow"""
     print_colored("🔑 Requesting OAuth access token...", Colors.BLUE)
     
-    token_url = f"{instance_url}/services/oauth2/token"
-    
-    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-    data = {
-        'grant_type': 'client_credentials',
-        'client_id': client_id,
-        'client_secret': client_secret
-    }
-    
     try:
-        response = requests.post(token_url, headers=headers, data=data, timeout=30)
+        response = auth.request_token(client_id, client_secret, instance_url, timeout=30)
         
         print_colored(f"Token Request Status: {response.status_code}", Colors.CYAN)
         
@@ -89,7 +80,7 @@ def get_access_token(client_id, client_secret, instance_url):
             print_colored(f"❌ {error_msg}", Colors.RED)
             return None, error_msg
             
-    except requests.exceptions.RequestException as e:
+    except transport.RequestException as e:
         error_msg = f"Network error during token request: {e}"
         print_colored(f"❌ {error_msg}", Colors.RED)
         return None, error_msg
@@ -117,7 +108,7 @@ def test_minimal_campaign_creation(access_token, instance_url):
     print_colored(f"API Endpoint: {create_url}", Colors.CYAN)
     
     try:
-        response = requests.post(create_url, headers=headers, json=campaign_data, timeout=30)
+        response = transport.post(create_url, headers=headers, json=campaign_data, timeout=30)
         
         print_colored(f"Campaign Creation Status: {response.status_code}", Colors.CYAN)
         
@@ -147,11 +138,11 @@ def test_minimal_campaign_creation(access_token, instance_url):
                     
                     return None, f"{error_code}: {error_message}"
                     
-            except json.JSONDecodeError:
+            except ValueError:
                 print(error_details)
                 return None, error_details
                 
-    except requests.exceptions.RequestException as e:
+    except transport.RequestException as e:
         error_msg = f"Network error during Campaign creation: {e}"
         print_colored(f"❌ {error_msg}", Colors.RED)
         return None, error_msg
@@ -168,7 +159,7 @@ def test_user_permissions(access_token, instance_url):
     # Test 1: User Info
     try:
         user_url = f"{instance_url}/services/oauth2/userinfo"
-        response = requests.get(user_url, headers=headers, timeout=30)
+        response = transport.get(user_url, headers=headers, timeout=30)
         
         if response.status_code == 200:
             user_info = response.json()
@@ -188,7 +179,7 @@ def test_user_permissions(access_token, instance_url):
         query_url = f"{instance_url}/services/data/v58.0/query"
         params = {'q': query}
         
-        response = requests.get(query_url, headers=headers, params=params, timeout=30)
+        response = transport.get(query_url, headers=headers, params=params, timeout=30)
         
         if response.status_code == 200:
             print_colored("✅ User can query Campaign objects", Colors.GREEN)
@@ -213,7 +204,7 @@ def cleanup_test_campaign(access_token, instance_url, campaign_id):
     delete_url = f"{instance_url}/services/data/v58.0/sobjects/Campaign/{campaign_id}"
     
     try:
-        response = requests.delete(delete_url, headers=headers, timeout=30)
+        response = transport.delete(delete_url, headers=headers, timeout=30)
         
         if response.status_code == 204:
             print_colored("✅ Test campaign cleaned up successfully", Colors.GREEN)
@@ -224,7 +215,142 @@ def cleanup_test_campaign(access_token, instance_url, campaign_id):
     except Exception as e:
         print_colored(f"⚠️  Error during cleanup: {e}", Colors.YELLOW)
 
-def main():
+PROBE_PHASES = ('dns', 'connect', 'tls', 'ttfb', 'transfer', 'total')
+PROBE_PERCENTILES = (50, 90, 95, 99)
+
+def timed_request(method, url, headers=None, body=None, timeout=30):
+    """Send one request on a new connection, timing each phase.
+    Returns (status, body, {phase: seconds}). Goes straight to the socket (no proxy,
+    no connection reuse) so DNS, TCP connect and the TLS handshake are measured every time."""
+    parts = urlsplit(url)
+    secure = parts.scheme == 'https'
+    port = parts.port or (443 if secure else 80)
+    path = parts.path + (f"?{parts.query}" if parts.query else '')
+    timings = {}
+    
+    start = time.perf_counter()
+    family, socktype, proto, _, address = socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)[0]
+    mark = time.perf_counter()
+    timings['dns'] = mark - start
+    
+    sock = socket.socket(family, socktype, proto)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(address)
+        timings['connect'] = time.perf_counter() - mark
+        mark = time.perf_counter()
+        if secure:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=parts.hostname)
+        timings['tls'] = time.perf_counter() - mark
+        
+        conn = http.client.HTTPConnection(parts.hostname, port, timeout=timeout)
+        conn.sock = sock
+        mark = time.perf_counter()
+        conn.request(method, path, body=body, headers={'Host': parts.netloc, **(headers or {})})
+        response = conn.getresponse()
+        timings['ttfb'] = time.perf_counter() - mark
+        mark = time.perf_counter()
+        payload = response.read()
+        timings['transfer'] = time.perf_counter() - mark
+    finally:
+        sock.close()
+    
+    timings['total'] = time.perf_counter() - start
+    return response.status, payload, timings
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+def probe_iteration(client_id, client_secret, instance_url, samples, errors):
+    """Token, query, create and delete once; timings go to samples[operation], failures to errors"""
+    def run(operation, method, url, expected, headers=None, body=None):
+        try:
+            status, payload, timings = timed_request(method, url, headers, body)
+        except (OSError, http.client.HTTPException) as e:
+            errors[operation].append(f"{type(e).__name__}: {e}")
+            return None
+        if status != expected:
+            errors[operation].append(f"HTTP {status}: {payload[:200].decode('utf-8', 'replace')}")
+            return None
+        samples[operation].append(timings)
+        return json.loads(payload) if payload else {}
+    
+    token = run('token', 'POST', f"{instance_url.rstrip('/')}/services/oauth2/token", 200,
+                {'Content-Type': 'application/x-www-form-urlencoded'},
+                urlencode({'grant_type': 'client_credentials', 'client_id': client_id,
+                           'client_secret': client_secret}))
+    if not token:
+        return
+    
+    base_url = f"{token.get('instance_url', instance_url).rstrip('/')}/services/data/v58.0"
+    headers = {'Authorization': f"Bearer {token['access_token']}", 'Content-Type': 'application/json'}
+    run('query', 'GET', f"{base_url}/query?{urlencode({'q': 'SELECT Id FROM Campaign LIMIT 1'})}", 200, headers)
+    
+    campaign_name = f"LatencyProbe_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+    created = run('create', 'POST', f"{base_url}/sobjects/Campaign", 201, headers, json.dumps({"Name": campaign_name}))
+    if created:
+        run('delete', 'DELETE', f"{base_url}/sobjects/Campaign/{created['id']}", 204, headers)
+
+def print_probe_report(samples, errors, iterations):
+    """Percentile table per operation, plus where the time goes at the median"""
+    for operation in ('token', 'query', 'create', 'delete'):
+        runs = samples[operation]
+        print_colored(f"{operation.upper()}: {len(runs)}/{iterations} succeeded", Colors.CYAN)
+        for error in sorted(set(errors[operation])):
+            print_colored(f"   ❌ {error} (x{errors[operation].count(error)})", Colors.RED)
+        if not runs:
+            print()
+            continue
+        
+        header = ''.join(f"{label:>10}" for label in ('min', *(f"p{p}" for p in PROBE_PERCENTILES), 'max'))
+        print(f"  {'phase (ms)':<10}{header}")
+        for phase in PROBE_PHASES:
+            values = [run[phase] * 1000 for run in runs]
+            row = [min(values), *(percentile(values, p) for p in PROBE_PERCENTILES), max(values)]
+            print(f"  {phase:<10}" + ''.join(f"{value:>10.1f}" for value in row))
+        
+        # TTFB is one network round trip (about the TCP connect time) plus Salesforce processing
+        network = percentile([run['dns'] + run['connect'] + run['tls'] for run in runs], 50) * 1000
+        server = percentile([max(0.0, run['ttfb'] - run['connect']) for run in runs], 50) * 1000
+        print(f"  median: network setup {network:.1f} ms, Salesforce processing ~{server:.1f} ms "
+              f"(TTFB minus one round trip)")
+        print()
+
+def run_latency_probe(client_id, client_secret, instance_url, iterations):
+    """Run iterations of token, query, create and delete and report phase percentiles"""
+    print_colored(f"⏱️  Latency probe: {iterations} iteration(s) of token, query, create and delete", Colors.BLUE)
+    print_colored("Every request opens a new connection, so DNS, connect and TLS are included each time", Colors.CYAN)
+    print()
+    
+    samples = {operation: [] for operation in ('token', 'query', 'create', 'delete')}
+    errors = {operation: [] for operation in samples}
+    for i in range(1, iterations + 1):
+        probe_iteration(client_id, client_secret, instance_url, samples, errors)
+        print(f"\r  iteration {i}/{iterations}", end='', flush=True)
+    print()
+    print()
+    
+    print_probe_report(samples, errors, iterations)
+    leftover = len(samples['create']) - len(samples['delete'])
+    if leftover:
+        print_colored(f"⚠️  {leftover} LatencyProbe_* campaign(s) could not be deleted; remove them in Salesforce",
+                      Colors.YELLOW)
+    return samples
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="External Client App Diagnostic Tool")
+    parser.add_argument('--probe', type=int, metavar='N',
+                        help="latency probe: run N iterations of token, query, create and delete and "
+                             "print DNS/connect/TLS/TTFB/transfer percentiles")
+    args = parser.parse_args()
+    if args.probe is not None and args.probe < 1:
+        parser.error("--probe must be 1 or greater")
+    return args
+
+def main(probe=None):
     """Main diagnostic function"""
     print_colored("="*60, Colors.BOLD)
     print_colored("🔍 EXTERNAL CLIENT APP DIAGNOSTIC TOOL", Colors.BOLD)
@@ -253,6 +379,10 @@ def main():
     print(f"  Instance URL: {instance_url}")
     print()
     
+    if probe:
+        run_latency_probe(client_id, client_secret, instance_url, probe)
+        return
+    
     # Step 1: Get Access Token
     access_token, error = get_access_token(client_id, client_secret, instance_url)
     
@@ -294,8 +424,9 @@ def main():
     print_colored("="*60, Colors.BOLD)
 
 if __name__ == "__main__":
+    args = parse_args()
     try:
-        main()
+        main(probe=args.probe)
     except KeyboardInterrupt:
         print_colored("\n\nDiagnostic interrupted by user", Colors.YELLOW)
     except Exception as e:
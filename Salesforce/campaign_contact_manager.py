@@ -7,93 +7,20 @@ This script manages campaigns and contacts:
 - Adds contacts to campaigns as campaign members
 """
 
-import os
 import sys
-import requests
-import json
+import argparse
 import random
-from pathlib import Path
-from datetime import datetime, date
+import time
+from datetime import datetime
 
-# Colors for terminal output
-class Colors:
-    RED = '\033[0;31m'
-    GREEN = '\033[0;32m'
-    YELLOW = '\033[1;33m'
-    BLUE = '\033[0;34m'
-    CYAN = '\033[0;36m'
-    MAGENTA = '\033[0;35m'
-    NC = '\033[0m'  # No Color
+from sfclient import batch, circuit, config, outbox, profiling, transport
+from sfclient.auth import get_access_token
+from sfclient.config import load_env_file
+from sfclient.records import build_campaign_data, patient_id_key
+from sfclient.console import Colors, print_colored
 
-def print_colored(message, color):
-    """Print colored message to terminal"""
-    print(f"{color}{message}{Colors.NC}")
-
-def load_env_file():
-    """Load environment variables from .env file"""
-    # Check parent directory first, then current directory
-    env_file = Path('../.env') if Path('../.env').exists() else Path('.env')
-    if not env_file.exists():
-        print_colored("Error: .env file not found", Colors.RED)
-        print("Please create a .env file with your Salesforce credentials.")
-        print("Expected locations: ../.env or ./.env")
-        sys.exit(1)
-    
-    print_colored(f"Loading configuration from {env_file} file...", Colors.GREEN)
-    
-    # Parse .env file manually to handle quotes properly
-    env_vars = {}
-    with open(env_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#') and '=' in line:
-                key, value = line.split('=', 1)
-                value = value.strip('"\'')
-                env_vars[key] = value
-    
-    return env_vars
-
-def get_access_token(client_id, client_secret, dev_url):
-    """Request access token using OAuth Client Credentials Flow"""
-    print_colored("Step 1: Requesting Access Token...", Colors.BLUE)
-    
-    token_url = f"{dev_url}/services/oauth2/token"
-    
-    headers = {
-        'Content-Type': 'application/x-www-form-urlencoded'
-    }
-    
-    data = {
-        'grant_type': 'client_credentials',
-        'client_id': client_id,
-        'client_secret': client_secret
-    }
-    
-    try:
-        response = requests.post(token_url, headers=headers, data=data)
-        response.raise_for_status()
-        
-        token_data = response.json()
-        access_token = token_data.get('access_token')
-        instance_url = token_data.get('instance_url')
-        
-        if not access_token:
-            print_colored("❌ Failed to obtain access token", Colors.RED)
-            sys.exit(1)
-        
-        print_colored("✅ Successfully obtained access token", Colors.GREEN)
-        print_colored(f"Instance URL: {instance_url}", Colors.CYAN)
-        print()
-        
-        return access_token, instance_url
-        
-    except requests.exceptions.RequestException as e:
-        print_colored("❌ Failed to connect to Salesforce", Colors.RED)
-        print_colored(f"Error: {str(e)}", Colors.RED)
-        sys.exit(1)
-
-def find_campaign_by_name(access_token, instance_url, campaign_name):
-    """Find campaign by name"""
+def find_campaign_by_name(access_token, instance_url, campaign_name, raise_unavailable=False):
+    """Find campaign by name. With raise_unavailable an outage is raised instead of returning None."""
     print_colored(f"Checking if campaign '{campaign_name}' exists...", Colors.BLUE)
     
     headers = {
@@ -107,7 +34,7 @@ def find_campaign_by_name(access_token, instance_url, campaign_name):
     }
     
     try:
-        response = requests.get(query_url, headers=headers, params=params)
+        response = transport.get(query_url, headers=headers, params=params)
         response.raise_for_status()
         
         result = response.json()
@@ -120,12 +47,14 @@ def find_campaign_by_name(access_token, instance_url, campaign_name):
             print_colored(f"📋 Campaign '{campaign_name}' not found", Colors.YELLOW)
             return None
             
-    except requests.exceptions.RequestException as e:
+    except transport.RequestException as e:
         print_colored(f"❌ Error searching for campaign: {str(e)}", Colors.RED)
+        if raise_unavailable and circuit.is_outage(e):
+            raise
         return None
 
-def create_campaign(access_token, instance_url, campaign_name):
-    """Create a new campaign"""
+def create_campaign(access_token, instance_url, campaign_name, raise_unavailable=False):
+    """Create a new campaign. With raise_unavailable an outage (including a 5xx) is raised instead of returning None."""
     print_colored(f"Creating campaign '{campaign_name}'...", Colors.BLUE)
     
     headers = {
@@ -133,15 +62,8 @@ def create_campaign(access_token, instance_url, campaign_name):
         'Content-Type': 'application/json'
     }
     
-    # Campaign data with healthcare-appropriate defaults
-    campaign_data = {
-        "Name": campaign_name,
-        "Status": "Planned",
-        "Type": "Other",
-        "Description": f"Test campaign created on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-        "StartDate": date.today().strftime('%Y-%m-%d'),
-        "IsActive": True
-    }
+    campaign_data = build_campaign_data(campaign_name, created_from='the campaign contact manager',
+                                        status='Planned')
     
     print_colored("Campaign data to be created:", Colors.CYAN)
     for key, value in campaign_data.items():
@@ -151,7 +73,9 @@ def create_campaign(access_token, instance_url, campaign_name):
     create_url = f"{instance_url}/services/data/v58.0/sobjects/Campaign"
     
     try:
-        response = requests.post(create_url, headers=headers, json=campaign_data)
+        response = transport.post(create_url, headers=headers, json=campaign_data)
+        if raise_unavailable and response.status_code >= 500:
+            response.raise_for_status()
         
         if response.status_code == 201:
             result = response.json()
@@ -176,18 +100,20 @@ def create_campaign(access_token, instance_url, campaign_name):
                         print(f"  Message: {error.get('message', 'No message')}")
                 else:
                     print(f"  {error_data}")
-            except json.JSONDecodeError:
+            except ValueError:
                 print_colored(f"Raw response: {response.text}", Colors.YELLOW)
                 
             return None
             
-    except requests.exceptions.RequestException as e:
+    except transport.RequestException as e:
         print_colored("❌ Network error while creating campaign", Colors.RED)
         print_colored(f"Error: {str(e)}", Colors.RED)
+        if raise_unavailable and circuit.is_outage(e):
+            raise
         return None
 
-def find_contact_by_email(access_token, instance_url, email):
-    """Find contact by email"""
+def find_contact_by_email(access_token, instance_url, email, raise_unavailable=False):
+    """Find contact by email. With raise_unavailable an outage is raised instead of returning (None, None)."""
     headers = {
         'Authorization': f'Bearer {access_token}',
         'Content-Type': 'application/json'
@@ -199,7 +125,7 @@ def find_contact_by_email(access_token, instance_url, email):
     }
     
     try:
-        response = requests.get(query_url, headers=headers, params=params)
+        response = transport.get(query_url, headers=headers, params=params)
         response.raise_for_status()
         
         result = response.json()
@@ -210,8 +136,10 @@ def find_contact_by_email(access_token, instance_url, email):
         else:
             return None, None
             
-    except requests.exceptions.RequestException as e:
+    except transport.RequestException as e:
         print_colored(f"❌ Error searching for contact: {str(e)}", Colors.RED)
+        if raise_unavailable and circuit.is_outage(e):
+            raise
         return None, None
 
 def generate_fictitious_contact_data(first_name=None, last_name=None, email=None):
@@ -258,8 +186,8 @@ def generate_fictitious_contact_data(first_name=None, last_name=None, email=None
     
     return contact_data
 
-def create_contact(access_token, instance_url, contact_data):
-    """Create a new Contact record"""
+def create_contact(access_token, instance_url, contact_data, raise_unavailable=False):
+    """Create a new Contact record. With raise_unavailable an outage (including a 5xx) is raised instead of returning None."""
     headers = {
         'Authorization': f'Bearer {access_token}',
         'Content-Type': 'application/json'
@@ -268,7 +196,9 @@ def create_contact(access_token, instance_url, contact_data):
     create_url = f"{instance_url}/services/data/v58.0/sobjects/Contact"
     
     try:
-        response = requests.post(create_url, headers=headers, json=contact_data)
+        response = transport.post(create_url, headers=headers, json=contact_data)
+        if raise_unavailable and response.status_code >= 500:
+            response.raise_for_status()
         
         if response.status_code == 201:
             result = response.json()
@@ -283,12 +213,14 @@ def create_contact(access_token, instance_url, contact_data):
             print_colored(f"Status Code: {response.status_code}", Colors.RED)
             return None
             
-    except requests.exceptions.RequestException as e:
+    except transport.RequestException as e:
         print_colored("❌ Network error while creating contact", Colors.RED)
+        if raise_unavailable and circuit.is_outage(e):
+            raise
         return None
 
-def ensure_contact_exists(access_token, instance_url, contact_info):
-    """Ensure contact exists, create if it doesn't"""
+def ensure_contact_exists(access_token, instance_url, contact_info, raise_unavailable=False):
+    """Ensure contact exists, create if it doesn't. raise_unavailable is passed to the lookup and the create."""
     
     # If contact_info is a dict with contact data, use email to check
     if isinstance(contact_info, dict):
@@ -304,7 +236,7 @@ def ensure_contact_exists(access_token, instance_url, contact_info):
     print_colored(f"Checking if contact with email '{email}' exists...", Colors.BLUE)
     
     # Check if contact exists
-    contact_id, existing_contact = find_contact_by_email(access_token, instance_url, email)
+    contact_id, existing_contact = find_contact_by_email(access_token, instance_url, email, raise_unavailable)
     
     if contact_id:
         print_colored(f"✅ Contact found: {existing_contact['FirstName']} {existing_contact['LastName']} (ID: {contact_id})", Colors.GREEN)
@@ -324,11 +256,13 @@ def ensure_contact_exists(access_token, instance_url, contact_info):
         print()
         
         # Create the contact
-        contact_id = create_contact(access_token, instance_url, contact_data)
+        contact_id = create_contact(access_token, instance_url, contact_data, raise_unavailable)
         return contact_id
 
-def add_contact_to_campaign(access_token, instance_url, campaign_id, contact_id, status="Sent"):
-    """Add contact to campaign as campaign member"""
+def add_contact_to_campaign(access_token, instance_url, campaign_id, contact_id, status="Sent",
+                            raise_unavailable=False):
+    """Add contact to campaign as campaign member.
+    With raise_unavailable an outage (including a 5xx) is raised instead of returning None."""
     print_colored(f"Adding contact {contact_id} to campaign {campaign_id}...", Colors.BLUE)
     
     headers = {
@@ -346,7 +280,9 @@ def add_contact_to_campaign(access_token, instance_url, campaign_id, contact_id,
     create_url = f"{instance_url}/services/data/v58.0/sobjects/CampaignMember"
     
     try:
-        response = requests.post(create_url, headers=headers, json=member_data)
+        response = transport.post(create_url, headers=headers, json=member_data)
+        if raise_unavailable and response.status_code >= 500:
+            response.raise_for_status()
         
         if response.status_code == 201:
             result = response.json()
@@ -368,14 +304,16 @@ def add_contact_to_campaign(access_token, instance_url, campaign_id, contact_id,
                         print(f"  Message: {error.get('message', 'No message')}")
                 else:
                     print(f"  {error_data}")
-            except json.JSONDecodeError:
+            except ValueError:
                 print_colored(f"Raw response: {response.text}", Colors.YELLOW)
                 
             return None
             
-    except requests.exceptions.RequestException as e:
+    except transport.RequestException as e:
         print_colored("❌ Network error while adding contact to campaign", Colors.RED)
         print_colored(f"Error: {str(e)}", Colors.RED)
+        if raise_unavailable and circuit.is_outage(e):
+            raise
         return None
 
 def verify_campaign_membership(access_token, instance_url, campaign_id):
@@ -396,7 +334,7 @@ def verify_campaign_membership(access_token, instance_url, campaign_id):
     }
     
     try:
-        response = requests.get(query_url, headers=headers, params=params)
+        response = transport.get(query_url, headers=headers, params=params)
         response.raise_for_status()
         
         result = response.json()
@@ -414,75 +352,513 @@ def verify_campaign_membership(access_token, instance_url, campaign_id):
         else:
             print_colored("⚠️  Campaign has no members", Colors.YELLOW)
             
-    except requests.exceptions.RequestException as e:
+    except transport.RequestException as e:
         print_colored(f"❌ Error verifying campaign membership: {str(e)}", Colors.RED)
 
-def process_campaign_contacts(campaign_name, contact_list):
-    """Main function to process campaign and contacts"""
-    print_colored("=== Salesforce Campaign Contact Manager ===", Colors.MAGENTA)
+def run_campaign_contacts(access_token, instance_url, campaign_name, contact_list, outbox_file=None):
+    """Ensure the campaign exists and add every contact to it (Steps 2-4).
+    When outbox_file is given, contacts that fail because Salesforce is unreachable, the contacts
+    left when the circuit breaker opens, or all of them when the campaign step fails with an outage
+    are queued there."""
+    # Step 2: Ensure campaign exists
+    print_colored("Step 2: Managing Campaign...", Colors.BLUE)
+    try:
+        campaign_id = find_campaign_by_name(access_token, instance_url, campaign_name,
+                                            raise_unavailable=bool(outbox_file))
+        if not campaign_id:
+            campaign_id = create_campaign(access_token, instance_url, campaign_name,
+                                          raise_unavailable=bool(outbox_file))
+    except transport.RequestException:
+        # Salesforce is unreachable: queue every contact instead of exiting with nothing saved
+        queue_campaign_contacts(outbox_file, campaign_name, contact_list)
+        print_colored("❌ Failed to create campaign. Exiting.", Colors.RED)
+        sys.exit(1)
+    
+    if not campaign_id:
+        print_colored("❌ Failed to create campaign. Exiting.", Colors.RED)
+        sys.exit(1)
+    
     print()
     
-    # Load environment variables
-    env_vars = load_env_file()
+    # Step 3: Process each contact
+    print_colored("Step 3: Managing Contacts and Campaign Membership...", Colors.BLUE)
     
-    # Extract required credentials
-    client_id = env_vars.get('SALESFORCE_CLIENT_ID')
-    client_secret = env_vars.get('SALESFORCE_CLIENT_SECRET')
-    dev_url = env_vars.get('SALESFORCE_DEV_URL')
+    successful_additions = 0
+    unreachable = []
     
-    if not client_id or not client_secret or not dev_url:
-        print_colored("Error: Missing required credentials in .env file", Colors.RED)
-        sys.exit(1)
+    for i, contact_info in enumerate(contact_list, 1):
+        if transport.breaker_open():
+            # Salesforce is unreachable: every remaining call would fail after a timeout
+            print_colored(f"⛔ {transport.format_breaker()}", Colors.RED)
+            print_colored(f"Stopping with {len(contact_list) - i + 1} contact(s) not attempted", Colors.RED)
+            unreachable.extend(contact_list[i - 1:])
+            print()
+            break
+        print_colored(f"--- Processing Contact {i}/{len(contact_list)} ---", Colors.CYAN)
+
+        try:
+            # Ensure contact exists
+            contact_id = ensure_contact_exists(access_token, instance_url, contact_info,
+                                               raise_unavailable=bool(outbox_file))
+            
+            if contact_id:
+                # Add contact to campaign
+                member_id = add_contact_to_campaign(access_token, instance_url, campaign_id, contact_id,
+                                                    raise_unavailable=bool(outbox_file))
+                if member_id:
+                    successful_additions += 1
+        except transport.RequestException:
+            # Only outages are raised: the contact is queued, not counted as failed
+            unreachable.append(contact_info)
+        
+        print()
+    
+    if unreachable and outbox_file:
+        queue_campaign_contacts(outbox_file, campaign_name, unreachable)
+        print()
+    
+    # Step 4: Verify results
+    print_colored("Step 4: Verification...", Colors.BLUE)
+    verify_campaign_membership(access_token, instance_url, campaign_id)
     
-    print_colored(f"Campaign: '{campaign_name}'", Colors.CYAN)
-    print_colored(f"Contacts to process: {len(contact_list)}", Colors.CYAN)
     print()
+    print_colored("=== Campaign Contact Management Complete ===", Colors.GREEN)
+    print_colored(f"✅ Campaign: {campaign_name} (ID: {campaign_id})", Colors.YELLOW)
+    print_colored(f"✅ Successful additions: {successful_additions}/{len(contact_list)}", Colors.YELLOW)
     
-    # Get access token
-    access_token, instance_url = get_access_token(client_id, client_secret, dev_url)
+    return campaign_id, successful_additions
+
+def plan_campaign_contacts(access_token, instance_url, campaign_name, contact_list, campaign_id=None):
+    """Resolve the campaign, existing contacts and existing members with bulk reads,
+    then estimate API calls and wall time for each write strategy.
+    Pass campaign_id when the campaign is already known to skip the lookup."""
+    print_colored("Planning: resolving existing records with bulk reads...", Colors.BLUE)
+    started = time.perf_counter()
     
-    # Step 2: Ensure campaign exists
-    print_colored("Step 2: Managing Campaign...", Colors.BLUE)
-    campaign_id = find_campaign_by_name(access_token, instance_url, campaign_name)
+    if not campaign_id:
+        campaign_id = find_campaign_by_name(access_token, instance_url, campaign_name)
+    read_calls = 0
+    
+    contacts = [info if isinstance(info, dict) else {"Email": info} for info in contact_list]
+    emails = sorted({c['Email'].lower() for c in contacts if c.get('Email')})
+    
+    existing = {}
+    members = set()
+    try:
+        if emails:
+            records, calls = batch.query_in_batches(
+                access_token, instance_url,
+                "SELECT Id, Email FROM Contact WHERE Email IN ({values})",
+                [batch.soql_quote(email) for email in emails])
+            read_calls += calls
+            for record in records:
+                existing.setdefault((record.get('Email') or '').lower(), record['Id'])
+        
+        if campaign_id and existing:
+            records, calls = batch.query_in_batches(
+                access_token, instance_url,
+                f"SELECT ContactId FROM CampaignMember WHERE CampaignId = '{campaign_id}' AND ContactId IN ({{values}})",
+                [batch.soql_quote(contact_id) for contact_id in sorted(set(existing.values()))])
+            read_calls += calls
+            members = {record['ContactId'] for record in records}
+    except transport.RequestException as e:
+        print_colored(f"❌ Error resolving existing records: {str(e)}", Colors.RED)
+        sys.exit(1)
     
+    # Average round trip of the reads above (campaign lookup included)
+    latency_ms = (time.perf_counter() - started) * 1000 / (read_calls + 1)
+    
+    to_create = []
+    member_contact_ids = []
+    skipped = 0
+    for contact in contacts:
+        contact_id = existing.get((contact.get('Email') or '').lower())
+        if not contact_id:
+            to_create.append(contact)
+        elif contact_id in members:
+            skipped += 1
+        else:
+            member_contact_ids.append(contact_id)
+    
+    estimates = batch.estimate_strategies(
+        contacts=len(contacts),
+        creates=len(to_create),
+        member_inserts=len(to_create) + len(member_contact_ids),
+        campaign_exists=bool(campaign_id),
+        read_calls=read_calls,
+        latency_ms=latency_ms)
+    
+    return {
+        'campaign_name': campaign_name,
+        'campaign_id': campaign_id,
+        'contacts': len(contacts),
+        'to_create': to_create,
+        'member_contact_ids': member_contact_ids,
+        'skipped': skipped,
+        'read_calls': read_calls,
+        'latency_ms': latency_ms,
+        'estimates': estimates,
+        'recommended': batch.choose_strategy(estimates)
+    }
+
+def print_plan(plan):
+    """Print the dry-run plan and strategy estimates"""
+    print()
+    print_colored("=== Campaign Load Plan (dry run) ===", Colors.MAGENTA)
+    print(f"  Campaign: {plan['campaign_name']} ({'existing' if plan['campaign_id'] else 'will be created'})")
+    print(f"  Contacts requested: {plan['contacts']}")
+    print(f"  Contacts to create: {len(plan['to_create'])}")
+    print(f"  Member inserts: {len(plan['to_create']) + len(plan['member_contact_ids'])}")
+    print(f"  Skips (already campaign members): {plan['skipped']}")
+    print(f"  Measured latency: {plan['latency_ms']:.0f} ms/call over {plan['read_calls'] + 1} read call(s)")
+    print()
+    print_colored(f"  {'Strategy':<10}{'API calls':>12}{'Est. wall time':>18}", Colors.CYAN)
+    for name, estimate in plan['estimates'].items():
+        marker = "  ← cheapest" if name == plan['recommended'] else ""
+        print(f"  {name:<10}{estimate['api_calls']:>12}{estimate['wall_seconds']:>17.1f}s{marker}")
+    print()
+
+def run_campaign_plan(access_token, instance_url, plan, strategy):
+    """Execute a resolved plan with the batched (sObject Collections) or bulk (Bulk API 2.0) strategy"""
+    campaign_name = plan['campaign_name']
+    
+    print_colored("Step 2: Managing Campaign...", Colors.BLUE)
+    campaign_id = plan['campaign_id']
     if not campaign_id:
         campaign_id = create_campaign(access_token, instance_url, campaign_name)
         if not campaign_id:
             print_colored("❌ Failed to create campaign. Exiting.", Colors.RED)
             sys.exit(1)
+    print()
     
+    print_colored(f"Step 3: Creating Contacts and Campaign Members ({strategy})...", Colors.BLUE)
+    transport.reset_compression_stats()
+    _, successful_additions = write_campaign_plan(access_token, instance_url, plan, strategy, campaign_id)
     print()
     
-    # Step 3: Process each contact
-    print_colored("Step 3: Managing Contacts and Campaign Membership...", Colors.BLUE)
+    # Step 4: Verify results
+    print_colored("Step 4: Verification...", Colors.BLUE)
+    verify_campaign_membership(access_token, instance_url, campaign_id)
     
-    successful_additions = 0
+    print()
+    print_colored("=== Campaign Contact Management Complete ===", Colors.GREEN)
+    print_colored(f"✅ Campaign: {campaign_name} (ID: {campaign_id})", Colors.YELLOW)
+    print_colored(f"✅ Successful additions: {successful_additions}/{plan['contacts']}", Colors.YELLOW)
+    print_colored(f"✅ Skipped (already members): {plan['skipped']}", Colors.YELLOW)
+    print_colored(f"✅ Request bytes saved (gzip): {transport.format_bytes_saved()}", Colors.YELLOW)
     
-    for i, contact_info in enumerate(contact_list, 1):
-        print_colored(f"--- Processing Contact {i}/{len(contact_list)} ---", Colors.CYAN)
+    return campaign_id, successful_additions
+
+def write_campaign_plan(access_token, instance_url, plan, strategy, campaign_id):
+    """Create the plan's new contacts and campaign members with the batched or bulk strategy.
+    Returns (contacts_created, successful_additions)."""
+    new_contacts = [
+        contact if len(contact) > 1 else generate_fictitious_contact_data(email=contact.get('Email'))
+        for contact in plan['to_create']
+    ]
+    member_contact_ids = list(plan['member_contact_ids'])
+    
+    try:
+        if new_contacts and strategy == 'batched':
+            results = batch.create_collection(access_token, instance_url, 'Contact', new_contacts)
+            for contact, (contact_id, error) in zip(new_contacts, results):
+                if contact_id:
+                    member_contact_ids.append(contact_id)
+                else:
+                    print_colored(f"❌ Failed to create contact {contact.get('Email')}: {error}", Colors.RED)
+        elif new_contacts:
+            job = batch.bulk_insert(access_token, instance_url, 'Contact', new_contacts)
+            print_colored(f"Bulk job {job['job_id']}: {job['state']} "
+                          f"({job['processed'] - job['failed']} created, {job['failed']} failed)", Colors.CYAN)
+            member_contact_ids.extend(row['sf__Id'] for row in job['successful'])
+            for row in job['errors']:
+                print_colored(f"❌ Failed to create contact {row.get('Email')}: {row.get('sf__Error')}", Colors.RED)
+        contacts_created = len(member_contact_ids) - len(plan['member_contact_ids'])
+        print_colored(f"✅ Contacts created: {contacts_created}/{len(new_contacts)}", Colors.GREEN)
         
-        # Ensure contact exists
-        contact_id = ensure_contact_exists(access_token, instance_url, contact_info)
+        members = [
+            {"CampaignId": campaign_id, "ContactId": contact_id, "Status": "Sent"}
+            for contact_id in member_contact_ids
+        ]
+        successful_additions = 0
+        if members and strategy == 'batched':
+            results = batch.create_collection(access_token, instance_url, 'CampaignMember', members)
+            successful_additions = sum(1 for member_id, _ in results if member_id)
+            for member, (member_id, error) in zip(members, results):
+                if not member_id:
+                    print_colored(f"❌ Failed to add contact {member['ContactId']}: {error}", Colors.RED)
+        elif members:
+            job = batch.bulk_insert(access_token, instance_url, 'CampaignMember', members, fetch_results=False)
+            print_colored(f"Bulk job {job['job_id']}: {job['state']}", Colors.CYAN)
+            successful_additions = job['processed'] - job['failed']
+        print_colored(f"✅ Campaign members added: {successful_additions}/{len(members)}", Colors.GREEN)
+    except transport.RequestException as e:
+        print_colored(f"❌ Network error during {strategy} load: {str(e)}", Colors.RED)
+        sys.exit(1)
+    
+    return contacts_created, successful_additions
+
+def contact_email_key(contact_info):
+    """Case-insensitive email of an email string or contact dict, or None"""
+    email = contact_info.get('Email') if isinstance(contact_info, dict) else contact_info
+    return str(email).strip().lower() if email else None
+
+def contact_patient_id_key(contact_info):
+    """Normalized patient_id__c of a contact dict, or None when it is missing or not a number"""
+    patient_id = contact_info.get('patient_id__c') if isinstance(contact_info, dict) else None
+    if patient_id is None or str(patient_id).strip() == '':
+        return None
+    try:
+        return patient_id_key(patient_id)
+    except (TypeError, ValueError):
+        return None
+
+def dedupe_contacts(contact_list):
+    """Collapse contacts repeated by email or patient_id__c (first one wins) so each is looked up
+    and added once. Returns (unique contacts, number collapsed)."""
+    unique, _owners = batch.dedupe(contact_list, contact_email_key, contact_patient_id_key)
+    return unique, len(contact_list) - len(unique)
+
+def outbox_contact(contact_info):
+    """Contact record to queue; email-only entries get generated data, as when created directly"""
+    if isinstance(contact_info, dict):
+        return contact_info
+    return generate_fictitious_contact_data(email=contact_info)
+
+def queue_campaign_contacts(outbox_file, campaign_name, contact_list):
+    """Queue contacts for the campaign in the local outbox; --drain sends them later.
+    Returns the number queued."""
+    items = [outbox.queue_item(campaign_name, outbox_contact(contact_info), match_field='Email')
+             for contact_info in contact_list]
+    store = outbox.SqliteOutbox(outbox_file)
+    try:
+        store.enqueue(items, source='campaign_contact_manager')
+        counts = store.counts()
+    finally:
+        store.close()
+    print_colored(f"📮 Queued {len(items)} contact(s) in {outbox_file} (outbox: {outbox.format_counts(counts)})",
+                  Colors.YELLOW)
+    print_colored("Run with --drain to send them once Salesforce is reachable", Colors.YELLOW)
+    return len(items)
+
+def drain_outbox():
+    """Send the contacts queued in the local outbox in batched rounds"""
+    print_colored("=== Salesforce Outbox Drain ===", Colors.MAGENTA)
+    print()
+    
+    env_vars = load_env_file()
+    outbox_file = config.get_setting(env_vars, 'SALESFORCE_OUTBOX_FILE', 'salesforce_outbox.db')
+    store = outbox.SqliteOutbox(outbox_file)
+    try:
+        print_colored(f"Outbox: {outbox_file} ({outbox.format_counts(store.counts())})", Colors.CYAN)
+        if not store.counts().get('PENDING'):
+            print_colored("✅ Nothing to send", Colors.GREEN)
+            return None
+        print()
         
-        if contact_id:
-            # Add contact to campaign
-            member_id = add_contact_to_campaign(access_token, instance_url, campaign_id, contact_id)
-            if member_id:
-                successful_additions += 1
+        access_token, instance_url = get_access_token(env_vars['SALESFORCE_CLIENT_ID'],
+                                                      env_vars['SALESFORCE_CLIENT_SECRET'],
+                                                      env_vars['SALESFORCE_DEV_URL'], step="Step 1")
+        print_colored("Step 2: Sending queued contacts...", Colors.BLUE)
+        stats = outbox.drain(store, access_token, instance_url)
         
         print()
+        print_colored("=== Outbox Drain Complete ===", Colors.GREEN)
+        print_colored(f"✅ Sent: {stats['sent']} in {stats['rounds']} round(s), {stats['api_calls']} API call(s)",
+                      Colors.YELLOW)
+        if stats['retrying'] or stats['failed']:
+            print_colored(f"⚠️  Rejected: {stats['retrying']} will be retried, {stats['failed']} failed "
+                          f"after {outbox.MAX_ATTEMPTS} attempts", Colors.YELLOW)
+        if stats['stopped']:
+            print_colored(f"⛔ Stopped early, Salesforce unavailable: {stats['stopped']}", Colors.RED)
+        print_colored(f"✅ Outbox: {outbox.format_counts(store.counts())}", Colors.YELLOW)
+        print_colored(f"✅ Request bytes saved (gzip): {transport.format_bytes_saved()}", Colors.YELLOW)
+        return stats
+    finally:
+        store.close()
+
+def manage_campaign_contacts(access_token, instance_url, campaign_name, contact_list, strategy='serial',
+                             plan_only=False, outbox_file=None):
+    """Plan and/or write the contacts with the given strategy (Steps 2-4).
+    Returns the plan when plan_only, otherwise (campaign_id, successful_additions)."""
+    if plan_only or strategy != 'serial':
+        plan = plan_campaign_contacts(access_token, instance_url, campaign_name, contact_list)
+        print_plan(plan)
+        if plan_only:
+            return plan
+        if strategy == 'auto':
+            strategy = plan['recommended']
+            print_colored(f"Strategy 'auto' selected: {strategy}", Colors.CYAN)
+        if strategy != 'serial':
+            return run_campaign_plan(access_token, instance_url, plan, strategy)
+    
+    return run_campaign_contacts(access_token, instance_url, campaign_name, contact_list, outbox_file)
+
+def process_campaign_contacts(campaign_name, contact_list, strategy='serial', plan_only=False, queue_only=False):
+    """Main function to process campaign and contacts
+    
+    strategy   -- 'serial' (one call per record), 'batched' (sObject Collections),
+                  'bulk' (Bulk API 2.0) or 'auto' (cheapest in API calls)
+    plan_only  -- resolve and print the plan with cost estimates without writing anything
+    queue_only -- queue the contacts in the local outbox without calling Salesforce (see drain_outbox)
+    """
+    print_colored("=== Salesforce Campaign Contact Manager ===", Colors.MAGENTA)
+    print()
+    
+    # Load environment variables
+    env_vars = load_env_file()
+    
+    # Extract required credentials
+    client_id = env_vars['SALESFORCE_CLIENT_ID']
+    client_secret = env_vars['SALESFORCE_CLIENT_SECRET']
+    dev_url = env_vars['SALESFORCE_DEV_URL']
+    
+    print_colored(f"Campaign: '{campaign_name}'", Colors.CYAN)
+    contact_list, duplicates = dedupe_contacts(contact_list)
+    print_colored(f"Contacts to process: {len(contact_list)}", Colors.CYAN)
+    if duplicates:
+        print_colored(f"Collapsed {duplicates} repeated contact(s) (same email or patient id)", Colors.YELLOW)
+    
+    outbox_file = config.get_setting(env_vars, 'SALESFORCE_OUTBOX_FILE', 'salesforce_outbox.db')
+    if queue_only:
+        print()
+        return queue_campaign_contacts(outbox_file, campaign_name, contact_list)
+    
+    # Optional: record this run's Salesforce traffic (PHI redacted) for offline replay
+    capture_file = config.get_setting(env_vars, 'SALESFORCE_CAPTURE_FILE')
+    if capture_file:
+        # replay_traffic.py rebuilds the run from the tool, strategy and contact count
+        transport.start_capture(capture_file, tool='campaign_contact_manager', campaign=campaign_name,
+                                contacts=len(contact_list), strategy=strategy, plan_only=plan_only)
+        print_colored(f"📼 Capturing Salesforce traffic to {capture_file}", Colors.CYAN)
+    print()
     
-    # Step 4: Verify results
-    print_colored("Step 4: Verification...", Colors.BLUE)
-    verify_campaign_membership(access_token, instance_url, campaign_id)
+    try:
+        # Get access token
+        access_token, instance_url = get_access_token(client_id, client_secret, dev_url, step="Step 1")
+        
+        return manage_campaign_contacts(access_token, instance_url, campaign_name, contact_list, strategy,
+                                        plan_only, outbox_file)
+    finally:
+        if capture_file:
+            calls = transport.stop_capture()
+            print_colored(f"📼 Captured {calls} Salesforce call(s) to {capture_file}", Colors.CYAN)
+
+def process_multi_campaign_contacts(assignments, plan_only=False):
+    """Add contacts to several campaigns in one run; assignments maps campaign name -> contact list.
+    Each distinct email is resolved (and created) once, all campaigns are looked up together, and the
+    memberships for every campaign are written with sObject Collections (campaigns mixed per request).
+    Returns {campaign name: members added}."""
+    print_colored("=== Salesforce Multi-Campaign Contact Manager ===", Colors.MAGENTA)
+    print()
     
+    env_vars = load_env_file()
+    
+    contacts = {}
+    wanted = {}
+    for campaign_name, contact_list in assignments.items():
+        emails = wanted.setdefault(campaign_name, [])
+        for info in contact_list:
+            contact = info if isinstance(info, dict) else {"Email": info}
+            email = contact_email_key(contact)
+            if not email:
+                print_colored(f"⚠️  Skipping contact without an email in '{campaign_name}'", Colors.YELLOW)
+                continue
+            contacts.setdefault(email, contact)
+            if email not in emails:
+                emails.append(email)
+    requested = sum(len(emails) for emails in wanted.values())
+    print_colored(f"Campaigns: {len(wanted)}", Colors.CYAN)
+    print_colored(f"Assignments: {requested} ({len(contacts)} distinct contact(s))", Colors.CYAN)
     print()
-    print_colored("=== Campaign Contact Management Complete ===", Colors.GREEN)
-    print_colored(f"✅ Campaign: {campaign_name} (ID: {campaign_id})", Colors.YELLOW)
-    print_colored(f"✅ Successful additions: {successful_additions}/{len(contact_list)}", Colors.YELLOW)
+    
+    access_token, instance_url = get_access_token(env_vars['SALESFORCE_CLIENT_ID'],
+                                                  env_vars['SALESFORCE_CLIENT_SECRET'],
+                                                  env_vars['SALESFORCE_DEV_URL'], step="Step 1")
+    transport.reset_compression_stats()
+    
+    try:
+        print_colored("Step 2: Resolving campaigns, contacts and memberships with bulk reads...", Colors.BLUE)
+        campaigns, api_calls = batch.find_campaigns(access_token, instance_url, wanted)
+        records, calls = batch.query_in_batches(
+            access_token, instance_url,
+            "SELECT Id, Email FROM Contact WHERE Email IN ({values})",
+            [batch.soql_quote(email) for email in sorted(contacts)])
+        api_calls += calls
+        contact_ids = {}
+        for record in records:
+            contact_ids.setdefault((record.get('Email') or '').lower(), record['Id'])
+        members = set()
+        if campaigns and contact_ids:
+            members, calls = batch.find_campaign_members(access_token, instance_url,
+                                                         campaigns.values(), contact_ids.values())
+            api_calls += calls
+        
+        new_campaigns = [name for name in wanted if name not in campaigns]
+        new_contacts = [email for email in contacts if email not in contact_ids]
+        pending = [(name, email) for name, emails in wanted.items() for email in emails
+                   if (campaigns.get(name), contact_ids.get(email)) not in members]
+        print(f"  Campaigns to create: {len(new_campaigns)}")
+        print(f"  Contacts to create: {len(new_contacts)}")
+        print(f"  Member inserts: {len(pending)}")
+        print(f"  Skipped (already members): {requested - len(pending)}")
+        print(f"  Read calls: {api_calls}")
+        print()
+        if plan_only:
+            return {}
+        
+        print_colored("Step 3: Creating Campaigns, Contacts and Campaign Members (batched)...", Colors.BLUE)
+        if new_campaigns:
+            campaign_records = [build_campaign_data(name, created_from='the campaign contact manager', status='Planned')
+                                for name in new_campaigns]
+            results = batch.create_collection(access_token, instance_url, 'Campaign', campaign_records)
+            for name, (campaign_id, error) in zip(new_campaigns, results):
+                if campaign_id:
+                    campaigns[name] = campaign_id
+                else:
+                    print_colored(f"❌ Failed to create campaign '{name}': {error}", Colors.RED)
+        if new_contacts:
+            new_data = [
+                contacts[email] if len(contacts[email]) > 1 else generate_fictitious_contact_data(email=email)
+                for email in new_contacts
+            ]
+            results = batch.create_collection(access_token, instance_url, 'Contact', new_data)
+            for email, (contact_id, error) in zip(new_contacts, results):
+                if contact_id:
+                    contact_ids[email] = contact_id
+                else:
+                    print_colored(f"❌ Failed to create contact {email}: {error}", Colors.RED)
+        
+        inserts = [(name, {"CampaignId": campaigns[name], "ContactId": contact_ids[email], "Status": "Sent"})
+                   for name, email in pending if name in campaigns and email in contact_ids]
+        added = {name: 0 for name in wanted}
+        results = batch.create_collection(access_token, instance_url, 'CampaignMember',
+                                          [member for _, member in inserts])
+        for (name, member), (member_id, error) in zip(inserts, results):
+            if member_id:
+                added[name] += 1
+            else:
+                print_colored(f"❌ Failed to add contact {member['ContactId']} to '{name}': {error}", Colors.RED)
+    except transport.RequestException as e:
+        print_colored(f"❌ Network error during multi-campaign load: {str(e)}", Colors.RED)
+        sys.exit(1)
+    
+    print()
+    print_colored("=== Multi-Campaign Contact Management Complete ===", Colors.GREEN)
+    for name, emails in wanted.items():
+        status = "created" if name in new_campaigns else "existing"
+        print_colored(f"✅ {name} ({status}): {added[name]}/{len(emails)} added", Colors.YELLOW)
+    print_colored(f"✅ Contacts created: {sum(1 for email in new_contacts if email in contact_ids)}"
+                  f"/{len(new_contacts)}", Colors.YELLOW)
+    print_colored(f"✅ Request bytes saved (gzip): {transport.format_bytes_saved()}", Colors.YELLOW)
+    
+    return added
 
-def main():
+def main(strategy='serial', plan_only=False, queue_only=False, drain=False):
     """Main function with example usage"""
+    if drain:
+        drain_outbox()
+        return
     
     # Example campaign and contacts
     campaign_name = "Healthcare Outreach 2025"
@@ -513,7 +889,24 @@ def main():
     ]
     
     # Process the campaign and contacts
-    process_campaign_contacts(campaign_name, contact_list)
+    process_campaign_contacts(campaign_name, contact_list, strategy=strategy, plan_only=plan_only,
+                              queue_only=queue_only)
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Salesforce Campaign Contact Manager")
+    parser.add_argument('--plan', action='store_true',
+                        help="dry run: resolve existing records and print API call estimates without writing")
+    parser.add_argument('--strategy', choices=['serial', 'batched', 'bulk', 'auto'], default='serial',
+                        help="write strategy; 'auto' picks the one with the fewest API calls (default: serial)")
+    parser.add_argument('--queue', action='store_true',
+                        help="queue the contacts in the local outbox (SALESFORCE_OUTBOX_FILE) instead of sending them")
+    parser.add_argument('--drain', action='store_true',
+                        help="send the contacts queued in the local outbox, then exit")
+    profiling.add_profile_argument(parser, __file__)
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    profiling.run(main, args.profile, strategy=args.strategy, plan_only=args.plan,
+                  queue_only=args.queue, drain=args.drain)
@@ -4,7 +4,7 @@ Example usage of Campaign Contact Manager
 Shows how to use the campaign_contact_manager functions with your own data
 """
 
-from campaign_contact_manager import process_campaign_contacts
+from campaign_contact_manager import process_campaign_contacts, process_multi_campaign_contacts
 
 def example_1_simple_emails():
     """Example 1: Simple list of email addresses"""
@@ -87,6 +87,29 @@ def example_3_healthcare_specific():
     
     process_campaign_contacts(campaign_name, contact_list)
 
+def example_4_multi_campaign():
+    """Example 4: One cohort added to several campaigns in a single run"""
+    print("=== Example 4: Multi-Campaign Cohort ===")
+    
+    # The same contacts go into both campaigns; each is looked up (and created) only once
+    cohort = [
+        "mary.smith@email.com",
+        {
+            "FirstName": "Robert",
+            "LastName": "Davis",
+            "Email": "robert.davis@healthcare.com",
+            "Phone": "(555) 111-2222"
+        },
+        "patient1@healthcare.com"
+    ]
+    
+    assignments = {
+        "Diabetes Prevention Program": cohort,
+        "Patient Wellness Check 2025": cohort + ["patient2@healthcare.com"]
+    }
+    
+    process_multi_campaign_contacts(assignments)
+
 def custom_campaign_example():
     """Custom example - modify this for your own use"""
     print("=== Custom Campaign Example ===")
@@ -119,10 +142,11 @@ if __name__ == "__main__":
     print("1. Simple email list")
     print("2. Mixed contact information") 
     print("3. Healthcare-specific campaign")
-    print("4. Custom campaign (modify the code)")
+    print("4. One cohort into several campaigns")
+    print("5. Custom campaign (modify the code)")
     
     try:
-        choice = input("\nEnter choice (1-4): ").strip()
+        choice = input("\nEnter choice (1-5): ").strip()
         
         if choice == "1":
             example_1_simple_emails()
@@ -131,9 +155,11 @@ if __name__ == "__main__":
         elif choice == "3":
             example_3_healthcare_specific()
         elif choice == "4":
+            example_4_multi_campaign()
+        elif choice == "5":
             custom_campaign_example()
         else:
-            print("Invalid choice. Please run again and select 1-4.")
+            print("Invalid choice. Please run again and select 1-5.")
             
     except KeyboardInterrupt:
         print("\n\nExiting...")
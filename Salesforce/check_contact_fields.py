@@ -4,76 +4,10 @@ Salesforce Contact Fields Checker
 This script checks what fields are available on the Contact object
 """
 
-import os
-import sys
-import requests
-import json
-from pathlib import Path
-
-# Colors for terminal output
-class Colors:
-    RED = '\033[0;31m'
-    GREEN = '\033[0;32m'
-    YELLOW = '\033[1;33m'
-    BLUE = '\033[0;34m'
-    CYAN = '\033[0;36m'
-    NC = '\033[0m'  # No Color
-
-def print_colored(message, color):
-    """Print colored message to terminal"""
-    print(f"{color}{message}{Colors.NC}")
-
-def load_env_file():
-    """Load environment variables from .env file"""
-    # Check parent directory first, then current directory
-    env_file = Path('../.env') if Path('../.env').exists() else Path('.env')
-    if not env_file.exists():
-        print_colored("Error: .env file not found", Colors.RED)
-        print("Please create a .env file with your Salesforce credentials:")
-        print("Expected locations: ../.env or ./.env")
-        sys.exit(1)
-    
-    print_colored(f"Loading configuration from {env_file} file...", Colors.GREEN)
-    
-    # Parse .env file manually to handle quotes properly
-    env_vars = {}
-    with open(env_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#') and '=' in line:
-                key, value = line.split('=', 1)
-                value = value.strip('"\'')
-                env_vars[key] = value
-    
-    return env_vars
-
-def get_access_token(client_id, client_secret, dev_url):
-    """Request access token using OAuth Client Credentials Flow"""
-    token_url = f"{dev_url}/services/oauth2/token"
-    
-    headers = {
-        'Content-Type': 'application/x-www-form-urlencoded'
-    }
-    
-    data = {
-        'grant_type': 'client_credentials',
-        'client_id': client_id,
-        'client_secret': client_secret
-    }
-    
-    try:
-        response = requests.post(token_url, headers=headers, data=data)
-        response.raise_for_status()
-        
-        token_data = response.json()
-        access_token = token_data.get('access_token')
-        instance_url = token_data.get('instance_url')
-        
-        return access_token, instance_url
-        
-    except requests.exceptions.RequestException as e:
-        print_colored(f"❌ Failed to get access token: {str(e)}", Colors.RED)
-        sys.exit(1)
+from sfclient import transport
+from sfclient.auth import get_access_token
+from sfclient.config import load_env_file
+from sfclient.console import Colors, print_colored
 
 def check_contact_fields(access_token, instance_url):
     """Check Contact object fields"""
@@ -88,7 +22,7 @@ def check_contact_fields(access_token, instance_url):
     describe_url = f"{instance_url}/services/data/v58.0/sobjects/Contact/describe"
     
     try:
-        response = requests.get(describe_url, headers=headers)
+        response = transport.get(describe_url, headers=headers)
         response.raise_for_status()
         
         contact_metadata = response.json()
@@ -161,7 +95,7 @@ def check_contact_fields(access_token, instance_url):
         
         return patient_id_field is not None
         
-    except requests.exceptions.RequestException as e:
+    except transport.RequestException as e:
         print_colored(f"❌ Error checking fields: {str(e)}", Colors.RED)
         return False
 
@@ -174,13 +108,9 @@ def main():
     env_vars = load_env_file()
     
     # Extract required credentials
-    client_id = env_vars.get('SALESFORCE_CLIENT_ID')
-    client_secret = env_vars.get('SALESFORCE_CLIENT_SECRET')
-    dev_url = env_vars.get('SALESFORCE_DEV_URL')
-    
-    if not client_id or not client_secret or not dev_url:
-        print_colored("Error: Missing credentials in .env file", Colors.RED)
-        sys.exit(1)
+    client_id = env_vars['SALESFORCE_CLIENT_ID']
+    client_secret = env_vars['SALESFORCE_CLIENT_SECRET']
+    dev_url = env_vars['SALESFORCE_DEV_URL']
     
     # Get access token
     access_token, instance_url = get_access_token(client_id, client_secret, dev_url)
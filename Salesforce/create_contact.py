@@ -4,94 +4,14 @@ Salesforce Contact Creation Test Script
 This script creates a new Contact record in Salesforce with fictitious data
 """
 
-import os
-import sys
-import requests
-import json
+import argparse
 import random
-from pathlib import Path
 from datetime import datetime
 
-# Colors for terminal output
-class Colors:
-    RED = '\033[0;31m'
-    GREEN = '\033[0;32m'
-    YELLOW = '\033[1;33m'
-    BLUE = '\033[0;34m'
-    CYAN = '\033[0;36m'
-    NC = '\033[0m'  # No Color
-
-def print_colored(message, color):
-    """Print colored message to terminal"""
-    print(f"{color}{message}{Colors.NC}")
-
-def load_env_file():
-    """Load environment variables from .env file"""
-    # Check parent directory first, then current directory
-    env_file = Path('../.env') if Path('../.env').exists() else Path('.env')
-    if not env_file.exists():
-        print_colored("Error: .env file not found", Colors.RED)
-        print("Please create a .env file with your Salesforce credentials:")
-        print("Expected locations: ../.env or ./.env")
-        print("SALESFORCE_CLIENT_ID=your_consumer_key")
-        print("SALESFORCE_CLIENT_SECRET=your_consumer_secret")
-        print("SALESFORCE_DEV_URL=https://your_domain.my.salesforce.com")
-        sys.exit(1)
-    
-    print_colored(f"Loading configuration from {env_file} file...", Colors.GREEN)
-    
-    # Parse .env file manually to handle quotes properly
-    env_vars = {}
-    with open(env_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#') and '=' in line:
-                key, value = line.split('=', 1)
-                # Remove surrounding quotes if present
-                value = value.strip('"\'')
-                env_vars[key] = value
-    
-    return env_vars
-
-def get_access_token(client_id, client_secret, dev_url):
-    """Request access token using OAuth Client Credentials Flow"""
-    print_colored("Step 1: Requesting Access Token...", Colors.BLUE)
-    
-    token_url = f"{dev_url}/services/oauth2/token"
-    
-    headers = {
-        'Content-Type': 'application/x-www-form-urlencoded'
-    }
-    
-    data = {
-        'grant_type': 'client_credentials',
-        'client_id': client_id,
-        'client_secret': client_secret
-    }
-    
-    try:
-        response = requests.post(token_url, headers=headers, data=data)
-        response.raise_for_status()
-        
-        token_data = response.json()
-        access_token = token_data.get('access_token')
-        instance_url = token_data.get('instance_url')
-        
-        if not access_token:
-            print_colored("❌ Failed to obtain access token", Colors.RED)
-            print_colored(f"Response: {response.text}", Colors.YELLOW)
-            sys.exit(1)
-        
-        print_colored("✅ Successfully obtained access token", Colors.GREEN)
-        print_colored(f"Instance URL: {instance_url}", Colors.CYAN)
-        print()
-        
-        return access_token, instance_url
-        
-    except requests.exceptions.RequestException as e:
-        print_colored("❌ Failed to connect to Salesforce", Colors.RED)
-        print_colored(f"Error: {str(e)}", Colors.RED)
-        sys.exit(1)
+from sfclient import profiling, transport
+from sfclient.auth import get_access_token
+from sfclient.config import load_env_file
+from sfclient.console import Colors, print_colored
 
 def generate_fictitious_contact_data():
     """Generate fictitious contact data"""
@@ -155,7 +75,7 @@ def create_contact(access_token, instance_url, contact_data):
     create_url = f"{instance_url}/services/data/v58.0/sobjects/Contact"
     
     try:
-        response = requests.post(create_url, headers=headers, json=contact_data)
+        response = transport.post(create_url, headers=headers, json=contact_data)
         
         if response.status_code == 201:
             # Success - Contact created
@@ -192,12 +112,12 @@ def create_contact(access_token, instance_url, contact_data):
                 else:
                     print(f"  {error_data}")
                     
-            except json.JSONDecodeError:
+            except ValueError:
                 print_colored(f"Raw response: {response.text}", Colors.YELLOW)
                 
             return None
             
-    except requests.exceptions.RequestException as e:
+    except transport.RequestException as e:
         print_colored("❌ Network error while creating contact", Colors.RED)
         print_colored(f"Error: {str(e)}", Colors.RED)
         return None
@@ -221,7 +141,7 @@ def verify_contact(access_token, instance_url, contact_id):
     }
     
     try:
-        response = requests.get(query_url, headers=headers, params=params)
+        response = transport.get(query_url, headers=headers, params=params)
         response.raise_for_status()
         
         result = response.json()
@@ -239,7 +159,7 @@ def verify_contact(access_token, instance_url, contact_id):
         else:
             print_colored("⚠️  Contact not found in verification query", Colors.YELLOW)
             
-    except requests.exceptions.RequestException as e:
+    except transport.RequestException as e:
         print_colored("❌ Error verifying contact", Colors.RED)
         print_colored(f"Error: {str(e)}", Colors.RED)
 
@@ -252,24 +172,15 @@ def main():
     env_vars = load_env_file()
     
     # Extract required credentials
-    client_id = env_vars.get('SALESFORCE_CLIENT_ID')
-    client_secret = env_vars.get('SALESFORCE_CLIENT_SECRET')
-    dev_url = env_vars.get('SALESFORCE_DEV_URL')
-    
-    # Check if required variables are set
-    if not client_id or not client_secret or not dev_url:
-        print_colored("Error: Missing required credentials in .env file", Colors.RED)
-        print("Required variables:")
-        print(f"  SALESFORCE_CLIENT_ID={client_id or '<missing>'}")
-        print(f"  SALESFORCE_CLIENT_SECRET={client_secret or '<missing>'}")
-        print(f"  SALESFORCE_DEV_URL={dev_url or '<missing>'}")
-        sys.exit(1)
+    client_id = env_vars['SALESFORCE_CLIENT_ID']
+    client_secret = env_vars['SALESFORCE_CLIENT_SECRET']
+    dev_url = env_vars['SALESFORCE_DEV_URL']
     
     print_colored(f"Using Salesforce URL: {dev_url}", Colors.CYAN)
     print()
     
     # Get access token
-    access_token, instance_url = get_access_token(client_id, client_secret, dev_url)
+    access_token, instance_url = get_access_token(client_id, client_secret, dev_url, step="Step 1")
     
     # Generate fictitious contact data
     contact_data = generate_fictitious_contact_data()
@@ -292,5 +203,12 @@ def main():
         print_colored("❌ Test Result: FAILED", Colors.RED)
         print_colored("Check the error messages above for details", Colors.YELLOW)
 
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Salesforce Contact Creation Test")
+    profiling.add_profile_argument(parser, __file__)
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    profiling.run(main, args.profile)
@@ -4,98 +4,14 @@ Salesforce Duplicate Patient ID Finder
 This script finds duplicate patient_id__c records and displays their information
 """
 
-import os
 import sys
-import requests
-import json
-from pathlib import Path
+import argparse
 from collections import defaultdict
 
-# Colors for terminal output
-class Colors:
-    RED = '\033[0;31m'
-    GREEN = '\033[0;32m'
-    YELLOW = '\033[1;33m'
-    BLUE = '\033[0;34m'
-    CYAN = '\033[0;36m'
-    MAGENTA = '\033[0;35m'
-    NC = '\033[0m'  # No Color
-
-def print_colored(message, color):
-    """Print colored message to terminal"""
-    print(f"{color}{message}{Colors.NC}")
-
-def load_env_file():
-    """Load environment variables from .env file"""
-    # Check parent directory first, then current directory
-    env_file = Path('../.env') if Path('../.env').exists() else Path('.env')
-    if not env_file.exists():
-        print_colored("Error: .env file not found", Colors.RED)
-        print("Please create a .env file with your Salesforce credentials:")
-        print("Expected locations: ../.env or ./.env")
-        print("SALESFORCE_CLIENT_ID=your_client_id")
-        print("SALESFORCE_CLIENT_SECRET=your_client_secret")
-        print("SALESFORCE_DEV_URL=https://your_domain.my.salesforce.com")
-        sys.exit(1)
-    
-    print_colored(f"Loading configuration from {env_file} file...", Colors.GREEN)
-    
-    # Parse .env file manually to handle quotes properly
-    env_vars = {}
-    with open(env_file, 'r') as f:
-        for line_number, line in enumerate(f, 1):
-            line = line.strip()
-            # Skip empty lines and comments
-            if not line or line.startswith('#'):
-                continue
-            # Check if line contains an equals sign
-            if '=' not in line:
-                print(f"⚠️  Warning: Skipping malformed line {line_number}: '{line}'")
-                continue
-            # Split only on the first equals sign
-            key, value = line.split('=', 1)
-            key = key.strip()
-            value = value.strip()
-            # Skip if key is empty
-            if not key:
-                print(f"⚠️  Warning: Skipping line {line_number} with empty key")
-                continue
-            # Strip quotes if present
-            value = value.strip('"\'')
-            env_vars[key] = value
-    
-    required_vars = ['SALESFORCE_CLIENT_ID', 'SALESFORCE_CLIENT_SECRET', 'SALESFORCE_DEV_URL']
-    missing_vars = [var for var in required_vars if var not in env_vars]
-    
-    if missing_vars:
-        print_colored(f"Error: Missing required environment variables: {', '.join(missing_vars)}", Colors.RED)
-        sys.exit(1)
-    
-    return env_vars
-
-def get_access_token(client_id, client_secret, instance_url):
-    """Get OAuth access token"""
-    token_url = f"{instance_url}/services/oauth2/token"
-    
-    data = {
-        'grant_type': 'client_credentials',
-        'client_id': client_id,
-        'client_secret': client_secret
-    }
-    
-    try:
-        response = requests.post(token_url, data=data, timeout=30)
-        response.raise_for_status()
-        
-        token_data = response.json()
-        return token_data['access_token']
-        
-    except requests.exceptions.RequestException as e:
-        print_colored(f"❌ Error getting access token: {e}", Colors.RED)
-        sys.exit(1)
-    except KeyError:
-        print_colored(f"❌ Error: Invalid response format from token endpoint", Colors.RED)
-        sys.exit(1)
+from sfclient import profiling, transport
+from sfclient.auth import get_access_token
+from sfclient.config import load_env_file
+from sfclient.console import Colors, print_colored
 
 def find_duplicate_patient_ids(access_token, instance_url):
     """Find contacts with duplicate patient_id__c values"""
@@ -118,7 +34,7 @@ def find_duplicate_patient_ids(access_token, instance_url):
     params = {'q': query}
     
     try:
-        response = requests.get(query_url, headers=headers, params=params, timeout=30)
+        response = transport.get(query_url, headers=headers, params=params, timeout=30)
         response.raise_for_status()
         
         data = response.json()
@@ -128,7 +44,7 @@ def find_duplicate_patient_ids(access_token, instance_url):
         
         return contacts
         
-    except requests.exceptions.RequestException as e:
+    except transport.RequestException as e:
         print_colored(f"❌ Error querying contacts: {e}", Colors.RED)
         sys.exit(1)
 
@@ -226,7 +142,7 @@ def main():
     
     # Get access token
     print_colored("🔐 Getting access token...", Colors.BLUE)
-    access_token = get_access_token(client_id, client_secret, instance_url)
+    access_token, _ = get_access_token(client_id, client_secret, instance_url)
     print_colored("✅ Access token obtained", Colors.GREEN)
     print()
     
@@ -243,5 +159,12 @@ def main():
     print_colored("🏁 DUPLICATE ANALYSIS COMPLETE", Colors.GREEN)
     print_colored("=" * 70, Colors.GREEN)
 
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Salesforce Duplicate Patient ID Finder")
+    profiling.add_profile_argument(parser, __file__)
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    profiling.run(main, args.profile)
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Synthetic Contact Generator for load tests
+Generates fictitious contacts with NumPy, one vectorized chunk at a time, and writes them to
+CSV, JSONL or Parquet for ingest_contacts.py. Patient ids never repeat within a run, and the
+same --seed always gives the same file.
+
+Patient ids are drawn from a 9-digit space (100000000-999999999) that the Synthea dataset does
+not use. Position i of a run maps to FIRST_ID + (a * i + b) mod SPACE, where a and b come from the
+seed and a is coprime with SPACE. The mapping is a bijection, so ids are unique without storing or
+checking the ones already issued. Runs with the same seed and non-overlapping --offset ranges
+(shards) never share an id either.
+
+Usage:
+    python generate_contacts.py contacts.csv --count 1000000 --seed 42
+    python generate_contacts.py contacts.parquet --count 5000000
+    python generate_contacts.py shard2.jsonl.gz --count 1000000 --offset 1000000 --seed 42
+"""
+
+import argparse
+import gzip
+import math
+import sys
+import time
+from pathlib import Path
+
+from sfclient.console import Colors, print_colored
+
+FIRST_NAMES = [
+    "Emma", "Liam", "Olivia", "Noah", "Ava", "William", "Sophia", "Mason",
+    "Isabella", "James", "Charlotte", "Benjamin", "Amelia", "Lucas", "Mia",
+    "Harper", "Ethan", "Evelyn", "Alexander", "Abigail", "Henry", "Emily",
+    "Sebastian", "Elizabeth", "Jackson", "Sofia", "Aiden", "Avery", "Matthew"
+]
+
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+    "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson",
+    "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee", "Perez", "Thompson",
+    "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson"
+]
+
+TITLES = ["Patient", "Healthcare Consumer", "Individual"]
+
+# Output columns, named so ingest_contacts.py maps them without --map
+COLUMNS = ('FirstName', 'LastName', 'Email', 'patient_id__c', 'Phone', 'Title')
+
+FIRST_ID = 100_000_000
+ID_SPACE = 900_000_000
+
+DEFAULT_CHUNK_SIZE = 500_000
+# Load-test files favour write speed over size
+GZIP_LEVEL = 1
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+def import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        print_colored("Error: generating contacts requires numpy (pip install numpy)", Colors.RED)
+        sys.exit(1)
+    return numpy
+
+def detect_format(path):
+    """Infer the output format from the file extension (.gz is allowed for csv and jsonl)"""
+    suffixes = [suffix.lower() for suffix in Path(path).suffixes]
+    if suffixes and suffixes[-1] == '.gz':
+        suffixes = suffixes[:-1]
+    extension = suffixes[-1].lstrip('.') if suffixes else ''
+    if extension in ('jsonl', 'ndjson', 'json'):
+        return 'jsonl'
+    if extension in ('parquet', 'pq'):
+        return 'parquet'
+    return 'csv'
+
+def id_permutation(seed):
+    """Multiplier and increment of the seeded bijection over [0, ID_SPACE)"""
+    np = import_numpy()
+    rng = np.random.default_rng([seed, 0])
+    while True:
+        multiplier = int(rng.integers(1, ID_SPACE))
+        if math.gcd(multiplier, ID_SPACE) == 1:
+            return multiplier, int(rng.integers(0, ID_SPACE))
+
+def patient_ids(start, count, permutation):
+    """Unique patient ids for run positions start .. start + count - 1"""
+    np = import_numpy()
+    multiplier, increment = permutation
+    positions = np.arange(start, start + count, dtype=np.int64)
+    # a and i are both below ID_SPACE (9e8), so a * i + b stays well inside int64
+    return FIRST_ID + (positions * multiplier + increment) % ID_SPACE
+
+def generate_chunk(rng, start, count, permutation):
+    """Draw `count` contacts as NumPy arrays of patient ids and vocabulary indexes (no strings yet)"""
+    return {
+        'patient_id': patient_ids(start, count, permutation),
+        'first': rng.integers(0, len(FIRST_NAMES), count),
+        'last': rng.integers(0, len(LAST_NAMES), count),
+        'area': rng.integers(200, 1000, count),
+        'exchange': rng.integers(200, 1000, count),
+        'line': rng.integers(1000, 10000, count),
+        'title': rng.integers(0, len(TITLES), count)
+    }
+
+# Rows are encoded as byte pieces: (uint8 matrix, lengths), one matrix row per contact, or a single
+# row broadcast to every contact. Concatenating the pieces and dropping the padding with a mask
+# builds every line of a chunk without a Python loop or per-row string concatenation.
+
+def literal(text):
+    data = text.encode('utf-8')
+    np = import_numpy()
+    return np.frombuffer(data, dtype=np.uint8)[None, :], np.array([len(data)])
+
+class Vocabulary:
+    """Words as a padded uint8 matrix; indexing with an array gathers one word per contact"""
+    def __init__(self, words):
+        np = import_numpy()
+        encoded = [word.encode('utf-8') for word in words]
+        self.lengths = np.array([len(word) for word in encoded])
+        self.matrix = np.zeros((len(encoded), self.lengths.max()), dtype=np.uint8)
+        for row, word in enumerate(encoded):
+            self.matrix[row, :len(word)] = np.frombuffer(word, dtype=np.uint8)
+
+    def __getitem__(self, index):
+        return self.matrix[index], self.lengths[index]
+
+def digits(values, width):
+    """Fixed-width decimal digits of non-negative integers below 10 ** width"""
+    np = import_numpy()
+    # Three digits at a time from a 1000 x 3 lookup table
+    table = vocabularies()['digits'].matrix
+    groups = []
+    remaining = values
+    for _ in range(math.ceil(width / 3)):
+        remaining, group = np.divmod(remaining, 1000)
+        groups.append(table[group])
+    return np.concatenate(groups[::-1], axis=1)[:, -width:], np.array([width])
+
+def encode(pieces, count):
+    """Concatenate pieces row by row; returns (bytes, per-row lengths)"""
+    np = import_numpy()
+    width = sum(matrix.shape[1] for matrix, _ in pieces)
+    rows = np.empty((count, width), dtype=np.uint8)
+    keep = np.ones((count, width), dtype=bool)
+    total = np.zeros(count, dtype=np.int64)
+    column = 0
+    for matrix, lengths in pieces:
+        piece_width = matrix.shape[1]
+        rows[:, column:column + piece_width] = matrix
+        if len(lengths) > 1 or lengths[0] < piece_width:
+            keep[:, column:column + piece_width] = np.arange(piece_width) < lengths[:, None]
+        total += lengths
+        column += piece_width
+    return rows[keep].tobytes(), total
+
+_VOCABULARIES = {}
+
+def vocabularies():
+    if not _VOCABULARIES:
+        _VOCABULARIES.update({
+            'FirstName': Vocabulary(FIRST_NAMES),
+            'LastName': Vocabulary(LAST_NAMES),
+            'first_lower': Vocabulary([name.lower() for name in FIRST_NAMES]),
+            'last_lower': Vocabulary([name.lower() for name in LAST_NAMES]),
+            'Title': Vocabulary(TITLES),
+            'digits': Vocabulary([f'{number:03d}' for number in range(1000)])
+        })
+    return _VOCABULARIES
+
+def column_pieces(chunk):
+    """Byte pieces of each output column"""
+    words = vocabularies()
+    patient_id = digits(chunk['patient_id'], 9)
+    return {
+        'FirstName': [words['FirstName'][chunk['first']]],
+        'LastName': [words['LastName'][chunk['last']]],
+        # first.last.pid<ID>@healthcaretest.com, the pattern the Snowflake procedures use for synthetic emails
+        'Email': [words['first_lower'][chunk['first']], literal('.'), words['last_lower'][chunk['last']],
+                  literal('.pid'), patient_id, literal('@healthcaretest.com')],
+        'patient_id__c': [patient_id],
+        'Phone': [literal('('), digits(chunk['area'], 3), literal(') '), digits(chunk['exchange'], 3),
+                  literal('-'), digits(chunk['line'], 4)],
+        'Title': [words['Title'][chunk['title']]]
+    }
+
+def open_output(path):
+    if str(path).lower().endswith('.gz'):
+        return gzip.open(path, 'wb', compresslevel=GZIP_LEVEL)
+    return open(path, 'wb')
+
+class CsvWriter:
+    """Header plus one line per contact; generated values never contain commas or quotes"""
+    def __init__(self, path):
+        self.file = open_output(path)
+        self.file.write((','.join(COLUMNS) + '\n').encode('utf-8'))
+
+    def write(self, chunk):
+        columns = column_pieces(chunk)
+        pieces = []
+        for column in COLUMNS:
+            if pieces:
+                pieces.append(literal(','))
+            pieces.extend(columns[column])
+        pieces.append(literal('\n'))
+        self.file.write(encode(pieces, len(chunk['patient_id']))[0])
+
+    def close(self):
+        self.file.close()
+
+class JsonlWriter:
+    """One JSON object per line, built from a template (values need no escaping)"""
+    def __init__(self, path):
+        self.file = open_output(path)
+
+    def write(self, chunk):
+        columns = column_pieces(chunk)
+        pieces = []
+        for column in COLUMNS:
+            prefix = '{' if not pieces else ', '
+            if column == 'patient_id__c':
+                pieces.append(literal(f'{prefix}"{column}": '))
+                pieces.extend(columns[column])
+            else:
+                pieces.append(literal(f'{prefix}"{column}": "'))
+                pieces.extend(columns[column])
+                pieces.append(literal('"'))
+        pieces.append(literal('}\n'))
+        self.file.write(encode(pieces, len(chunk['patient_id']))[0])
+
+    def close(self):
+        self.file.close()
+
+class ParquetWriter:
+    """One row group per chunk; string columns are handed to Arrow as offsets + data (requires pyarrow)"""
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            print_colored("Error: writing Parquet files requires pyarrow (pip install pyarrow)", Colors.RED)
+            sys.exit(1)
+        self.pa = pa
+        self.schema = pa.schema([(column, pa.int64() if column == 'patient_id__c' else pa.string())
+                                 for column in COLUMNS])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, chunk):
+        np = import_numpy()
+        pa = self.pa
+        count = len(chunk['patient_id'])
+        columns = column_pieces(chunk)
+        arrays = []
+        for column in COLUMNS:
+            if column == 'patient_id__c':
+                arrays.append(pa.array(chunk['patient_id'], type=pa.int64()))
+                continue
+            data, lengths = encode(columns[column], count)
+            offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int32)
+            arrays.append(pa.StringArray.from_buffers(count, pa.py_buffer(offsets), pa.py_buffer(data)))
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+WRITERS = {'csv': CsvWriter, 'jsonl': JsonlWriter, 'parquet': ParquetWriter}
+
+def generate_contacts_file(path, count, seed=0, offset=0, file_format=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write `count` synthetic contacts to path; returns (rows, elapsed seconds, generate seconds).
+    Generate time covers drawing the random arrays; the rest is encoding and writing."""
+    np = import_numpy()
+    file_format = file_format or detect_format(path)
+    permutation = id_permutation(seed)
+    # Shards with different offsets get their own name/phone stream but share the id bijection
+    rng = np.random.default_rng([seed, 1, offset])
+    writer = WRITERS[file_format](path)
+    started = time.perf_counter()
+    generate_seconds = 0.0
+    written = 0
+    try:
+        while written < count:
+            size = min(chunk_size, count - written)
+            chunk_started = time.perf_counter()
+            chunk = generate_chunk(rng, offset + written, size, permutation)
+            generate_seconds += time.perf_counter() - chunk_started
+            writer.write(chunk)
+            written += size
+    finally:
+        writer.close()
+    return written, time.perf_counter() - started, generate_seconds
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic contacts with unique patient ids for load tests")
+    parser.add_argument('output', help="output file (.csv, .jsonl, .parquet; .csv.gz and .jsonl.gz also accepted)")
+    parser.add_argument('--count', type=int, default=100_000, help="contacts to generate (default: 100000)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed; same seed, same file (default: 0)")
+    parser.add_argument('--offset', type=int, default=0,
+                        help="position of the first contact in the seed's id sequence; give shards "
+                             "non-overlapping ranges to keep ids unique across files (default: 0)")
+    parser.add_argument('--format', choices=FORMATS, help="output format (default: from the file extension)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"contacts generated per vectorized chunk (default: {DEFAULT_CHUNK_SIZE})")
+    args = parser.parse_args()
+    if args.count < 1:
+        parser.error("--count must be at least 1")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.offset < 0 or args.offset + args.count > ID_SPACE:
+        parser.error(f"--offset + --count must stay within the {ID_SPACE} available patient ids")
+
+    file_format = args.format or detect_format(args.output)
+    print_colored("=== Synthetic Contact Generator ===", Colors.MAGENTA)
+    print(f"  Output: {args.output} ({file_format})")
+    print(f"  Contacts: {args.count} (seed {args.seed}, offset {args.offset})")
+
+    rows, elapsed, generate_seconds = generate_contacts_file(
+        args.output, args.count, seed=args.seed, offset=args.offset,
+        file_format=file_format, chunk_size=args.chunk_size)
+
+    print_colored(f"✅ Wrote {rows} contacts in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s)",
+                  Colors.GREEN)
+    print(f"  Generation: {generate_seconds:.2f}s ({rows / generate_seconds if generate_seconds else 0:,.0f} rows/s), "
+          f"writing: {elapsed - generate_seconds:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Salesforce Campaign Contact Ingest
+Streams contacts from a CSV, JSONL or Parquet file into a campaign in fixed-size chunks.
+Only one chunk is held in memory at a time, so file size does not matter.
+
+Usage:
+    python ingest_contacts.py patients.csv --campaign "High Cost Patients Q3"
+    python ingest_contacts.py cohort.parquet --campaign "Diabetes Outreach" \\
+        --map FirstName=FIRST --map LastName=LAST --map Email=EMAIL --map patient_id__c=PATIENT_ID
+    python ingest_contacts.py export.jsonl.gz --campaign "Test" --plan
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import sys
+import time
+from itertools import chain, islice
+from pathlib import Path
+
+from campaign_contact_manager import (create_campaign, dedupe_contacts, find_campaign_by_name,
+                                      plan_campaign_contacts, write_campaign_plan)
+from sfclient import batch, config, profiling, transport
+from sfclient.auth import get_access_token
+from sfclient.config import load_env_file
+from sfclient.console import Colors, print_colored
+
+# Contact fields a source column can be mapped to. Name is split into FirstName/LastName.
+TARGET_FIELDS = ('FirstName', 'LastName', 'Email', 'patient_id__c', 'Name')
+
+# Source column names recognized without --map (compared case-insensitively)
+DEFAULT_COLUMN_ALIASES = {
+    'FirstName': ('firstname', 'first_name', 'first'),
+    'LastName': ('lastname', 'last_name', 'last'),
+    'Email': ('email', 'email_address'),
+    'patient_id__c': ('patient_id__c', 'patient_id', 'patientid'),
+    'Name': ('name', 'patient_name', 'full_name'),
+}
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+def detect_format(path):
+    """Infer the file format from its extension (.gz is allowed for csv and jsonl)"""
+    suffixes = [suffix.lower() for suffix in Path(path).suffixes]
+    if suffixes and suffixes[-1] == '.gz':
+        suffixes = suffixes[:-1]
+    extension = suffixes[-1].lstrip('.') if suffixes else ''
+    if extension in ('jsonl', 'ndjson', 'json'):
+        return 'jsonl'
+    if extension in ('parquet', 'pq'):
+        return 'parquet'
+    return 'csv'
+
+def open_text(path):
+    """Open a text file, transparently decompressing .gz"""
+    if str(path).lower().endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+def read_csv(path, batch_size):
+    """Yield CSV rows as dicts"""
+    with open_text(path) as f:
+        yield from csv.DictReader(f)
+
+def read_jsonl(path, batch_size):
+    """Yield one JSON object per non-empty line"""
+    with open_text(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                print_colored(f"⚠️  Skipping line {line_number}: invalid JSON ({e})", Colors.YELLOW)
+
+def read_parquet(path, batch_size):
+    """Yield Parquet rows as dicts, reading one record batch at a time (requires pyarrow)"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        print_colored("Error: reading Parquet files requires pyarrow (pip install pyarrow)", Colors.RED)
+        sys.exit(1)
+
+    parquet_file = pq.ParquetFile(path)
+    for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+        yield from record_batch.to_pylist()
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl, 'parquet': read_parquet}
+
+def parse_mappings(mapping_args):
+    """Parse --map FIELD=COLUMN options into {field: column}"""
+    mapping = {}
+    for item in mapping_args or []:
+        field, separator, column = item.partition('=')
+        if not separator or field not in TARGET_FIELDS or not column:
+            print_colored(f"Error: invalid --map '{item}' (expected FIELD=COLUMN, FIELD one of "
+                          f"{', '.join(TARGET_FIELDS)})", Colors.RED)
+            sys.exit(1)
+        mapping[field] = column
+    return mapping
+
+def resolve_mapping(explicit, columns):
+    """Complete explicit mappings with default aliases found in the first row's columns"""
+    mapping = dict(explicit)
+    by_lower = {str(column).lower(): column for column in columns}
+    for field, aliases in DEFAULT_COLUMN_ALIASES.items():
+        if field in mapping:
+            continue
+        for alias in aliases:
+            if alias in by_lower:
+                mapping[field] = by_lower[alias]
+                break
+    missing = [column for column in mapping.values() if column not in columns]
+    if missing:
+        print_colored(f"Error: mapped column(s) not found in file: {', '.join(missing)}", Colors.RED)
+        print(f"Available columns: {', '.join(str(column) for column in columns)}")
+        sys.exit(1)
+    if 'Email' not in mapping:
+        print_colored("Error: no Email column found; use --map Email=COLUMN", Colors.RED)
+        sys.exit(1)
+    return mapping
+
+def patient_id_value(value):
+    """Numeric patient ids are sent as numbers (patient_id__c is a Number field); others as text"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    return int(number) if number.is_integer() else number
+
+def to_contact(row, mapping):
+    """Map a source row to Contact fields; returns None when the row has no email"""
+    def value(field):
+        raw = row.get(mapping[field]) if field in mapping else None
+        return str(raw).strip() if raw is not None and str(raw).strip() else None
+
+    email = value('Email')
+    if not email:
+        return None
+
+    first_name = value('FirstName')
+    last_name = value('LastName')
+    if not last_name and value('Name'):
+        name_parts = value('Name').split(' ', 1)
+        first_name = first_name or name_parts[0]
+        last_name = name_parts[1] if len(name_parts) > 1 else None
+
+    contact = {"LastName": last_name or "Patient", "Email": email}
+    if first_name:
+        contact["FirstName"] = first_name
+    if value('patient_id__c') is not None:
+        contact["patient_id__c"] = patient_id_value(value('patient_id__c'))
+    return contact
+
+def read_chunks(rows, mapping_args, chunk_size, stats):
+    """Map rows to contacts, chunk_size rows at a time; the mapping is resolved from the first row"""
+    rows = iter(rows)
+    first_row = next(rows, None)
+    if first_row is None:
+        return
+    mapping = resolve_mapping(parse_mappings(mapping_args), list(first_row.keys()))
+    print_colored("Column mapping: " + ", ".join(f"{field} ← {column}" for field, column in mapping.items()),
+                  Colors.CYAN)
+    print()
+
+    rows = chain([first_row], rows)
+    while True:
+        chunk_rows = list(islice(rows, chunk_size))
+        if not chunk_rows:
+            return
+        chunk = [contact for contact in (to_contact(row, mapping) for row in chunk_rows) if contact]
+        stats['rows'] += len(chunk_rows)
+        stats['invalid'] += len(chunk_rows) - len(chunk)
+        if chunk:
+            yield chunk
+
+def new_stats():
+    """Empty run statistics"""
+    return {
+        'rows': 0, 'invalid': 0, 'chunks': 0, 'duplicates': 0, 'to_create': 0, 'member_inserts': 0,
+        'created': 0, 'added': 0, 'skipped': 0, 'chunk_sizes': [],
+        'estimates': {name: {'api_calls': 0, 'wall_seconds': 0.0} for name in batch.STRATEGIES}
+    }
+
+def ingest_chunks(access_token, instance_url, campaign_name, chunks, stats, strategy='batched', plan_only=False):
+    """Plan and write each chunk of contacts into the campaign, adding to stats.
+    Contacts repeated by email or patient id are collapsed within a chunk. Nothing is kept between chunks: a contact
+    repeating one from an earlier chunk is found by the chunk's lookups and skipped as an existing
+    member. stats['chunk_sizes'] lists the contacts planned per chunk."""
+    campaign_id = find_campaign_by_name(access_token, instance_url, campaign_name)
+    print()
+
+    for chunk in chunks:
+        stats['chunks'] += 1
+        contacts, collapsed = dedupe_contacts(chunk)
+        stats['duplicates'] += collapsed
+        print_colored(f"--- Chunk {stats['chunks']}: {len(contacts)} contact(s), "
+                      f"{stats['rows']} row(s) read ---", Colors.CYAN)
+        stats['chunk_sizes'].append(len(contacts))
+
+        plan = plan_campaign_contacts(access_token, instance_url, campaign_name, contacts, campaign_id=campaign_id)
+        stats['to_create'] += len(plan['to_create'])
+        stats['member_inserts'] += len(plan['to_create']) + len(plan['member_contact_ids'])
+        stats['skipped'] += plan['skipped']
+        for name, estimate in plan['estimates'].items():
+            stats['estimates'][name]['api_calls'] += estimate['api_calls']
+            stats['estimates'][name]['wall_seconds'] += estimate['wall_seconds']
+        if plan_only:
+            continue
+
+        if not campaign_id:
+            campaign_id = create_campaign(access_token, instance_url, campaign_name)
+            if not campaign_id:
+                print_colored("❌ Failed to create campaign. Exiting.", Colors.RED)
+                sys.exit(1)
+        chunk_strategy = plan['recommended'] if strategy == 'auto' else strategy
+        # A chunk costs the same in calls either way; the collection writer avoids per-record requests
+        if chunk_strategy == 'serial':
+            chunk_strategy = 'batched'
+        created, added = write_campaign_plan(access_token, instance_url, plan, chunk_strategy, campaign_id)
+        stats['created'] += created
+        stats['added'] += added
+        print()
+    return stats
+
+def ingest_file(path, campaign_name, file_format=None, mapping_args=None, chunk_size=batch.COLLECTION_BATCH_SIZE,
+                strategy='batched', plan_only=False):
+    """Stream a contact file into a campaign chunk by chunk; returns the run statistics"""
+    file_format = file_format or detect_format(path)
+    print_colored("=== Salesforce Campaign Contact Ingest ===", Colors.MAGENTA)
+    print_colored(f"File: {path} ({file_format}, chunks of {chunk_size})", Colors.CYAN)
+    print_colored(f"Campaign: '{campaign_name}'", Colors.CYAN)
+    print()
+
+    env_vars = load_env_file()
+    capture_file = config.get_setting(env_vars, 'SALESFORCE_CAPTURE_FILE')
+    if capture_file:
+        # The contact counts are only known at the end; replay_traffic.py rebuilds the chunks from them
+        transport.start_capture(capture_file, tool='ingest_contacts', campaign=campaign_name, source=str(path),
+                                strategy=strategy, plan_only=plan_only)
+        print_colored(f"📼 Capturing Salesforce traffic to {capture_file}", Colors.CYAN)
+
+    stats = new_stats()
+    started = time.perf_counter()
+    transport.reset_compression_stats()
+    try:
+        access_token, instance_url = get_access_token(env_vars['SALESFORCE_CLIENT_ID'],
+                                                      env_vars['SALESFORCE_CLIENT_SECRET'],
+                                                      env_vars['SALESFORCE_DEV_URL'], step="Step 1")
+        rows = READERS[file_format](path, chunk_size)
+        ingest_chunks(access_token, instance_url, campaign_name, read_chunks(rows, mapping_args, chunk_size, stats),
+                      stats, strategy, plan_only)
+    finally:
+        if capture_file:
+            calls = transport.stop_capture(contacts=sum(stats['chunk_sizes']), chunk_sizes=stats['chunk_sizes'])
+            print_colored(f"📼 Captured {calls} Salesforce call(s) to {capture_file}", Colors.CYAN)
+
+    stats['elapsed'] = time.perf_counter() - started
+    stats['compression'] = transport.compression_stats()
+    print_summary(stats, campaign_name, plan_only)
+    return stats
+
+def print_summary(stats, campaign_name, plan_only):
+    """Print totals for the whole file"""
+    print()
+    title = "=== Ingest Plan (dry run) ===" if plan_only else "=== Campaign Contact Ingest Complete ==="
+    print_colored(title, Colors.GREEN)
+    print(f"  Campaign: {campaign_name}")
+    print(f"  Rows read: {stats['rows']} in {stats['chunks']} chunk(s)")
+    print(f"  Rows skipped (no email): {stats['invalid']}")
+    print(f"  Duplicates collapsed (same email or patient id): {stats['duplicates']}")
+    print(f"  Skipped (already members): {stats['skipped']}")
+    if plan_only:
+        print(f"  Contacts to create: {stats['to_create']}")
+        print(f"  Member inserts: {stats['member_inserts']}")
+        print()
+        print_colored(f"  {'Strategy':<10}{'API calls':>12}{'Est. wall time':>18}", Colors.CYAN)
+        for name, estimate in stats['estimates'].items():
+            print(f"  {name:<10}{estimate['api_calls']:>12}{estimate['wall_seconds']:>17.1f}s")
+    else:
+        print(f"  Contacts created: {stats['created']}/{stats['to_create']}")
+        print(f"  Campaign members added: {stats['added']}/{stats['member_inserts']}")
+        print(f"  Request bytes saved (gzip): {transport.format_bytes_saved(stats['compression'])}")
+    rate = stats['rows'] / stats['elapsed'] if stats['elapsed'] else 0.0
+    print(f"  Elapsed: {stats['elapsed']:.1f}s ({rate:.0f} rows/s)")
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Stream contacts from a CSV, JSONL or Parquet file into a campaign")
+    parser.add_argument('file', help="contact file (.csv, .jsonl, .parquet; .csv.gz and .jsonl.gz also accepted)")
+    parser.add_argument('--campaign', required=True, help="campaign name (created if it does not exist)")
+    parser.add_argument('--format', choices=FORMATS, help="file format (default: from the file extension)")
+    parser.add_argument('--map', action='append', metavar='FIELD=COLUMN',
+                        help="map a source column to FirstName, LastName, Email, patient_id__c or Name "
+                             "(repeatable; common column names are mapped automatically)")
+    parser.add_argument('--chunk-size', type=int, default=batch.COLLECTION_BATCH_SIZE,
+                        help=f"contacts per chunk (default: {batch.COLLECTION_BATCH_SIZE})")
+    parser.add_argument('--strategy', choices=['batched', 'bulk', 'auto'], default='batched',
+                        help="write strategy per chunk (default: batched)")
+    parser.add_argument('--plan', action='store_true',
+                        help="dry run: resolve existing records and total the API call estimates without writing")
+    profiling.add_profile_argument(parser, __file__)
+    args = parser.parse_args()
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    profiling.run(ingest_file, args.profile, args.file, args.campaign, file_format=args.format,
+                  mapping_args=args.map, chunk_size=args.chunk_size, strategy=args.strategy, plan_only=args.plan)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Salesforce Test Data Purge
+Deletes the contacts and campaigns left behind by load tests and demos, so an org can be reset
+after a run. 99_cleanup.sql covers the Snowflake side.
+
+Test data is selected by marker:
+- Contacts:         Email ends with @healthcaretest.com (every generator in this folder and the
+                    Snowflake procedures use it); --email-domain replaces the domain
+- Campaigns:        Name starts with one of TEST_CAMPAIGN_PREFIXES (test_connection.py and the
+                    Debug scripts); --campaign adds a prefix
+
+Campaign members are not deleted separately: deleting a contact or campaign deletes its members.
+
+Small sets are deleted with sObject Collections (200 per call, --parallel calls at a time); sets
+above --bulk-threshold use one Bulk API 2.0 hardDelete job. Contacts and campaigns are deleted at
+the same time, and the run ends with records per second for each object.
+
+Usage:
+    python purge_test_data.py --dry-run
+    python purge_test_data.py
+    python purge_test_data.py --campaign "Load Test " --yes
+"""
+
+import argparse
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sfclient import batch, profiling, transport
+from sfclient.auth import get_access_token
+from sfclient.config import load_env_file
+from sfclient.console import Colors, print_colored
+
+TEST_EMAIL_DOMAINS = ('healthcaretest.com',)
+
+# Campaign names created by test_connection.py and the Debug scripts
+TEST_CAMPAIGN_PREFIXES = ('Connection Test Campaign ', 'DiagnosticTest_', 'LatencyProbe_')
+
+# Above this many records an object is read with a Bulk API 2.0 query and deleted with one
+# hardDelete job; below it, sObject Collections calls finish sooner than a job can be scheduled
+BULK_THRESHOLD = 2000
+DEFAULT_PARALLEL = 4
+
+# Deleted at the same time; Salesforce cascades the delete to their campaign members, so members
+# are never deleted directly (parallel member deletes contend for the parent rows' locks)
+PURGE_OBJECTS = ('Contact', 'Campaign')
+
+def selection_filters(email_domains, campaign_prefixes):
+    """SOQL WHERE clause per object for the test data markers"""
+    email = ' OR '.join(f"Email LIKE {batch.soql_like(domain, leading='%@')}" for domain in email_domains)
+    name = ' OR '.join(f"Name LIKE {batch.soql_like(prefix, trailing='%')}" for prefix in campaign_prefixes)
+    return {
+        'Contact': email or None,
+        'Campaign': name or None
+    }
+
+def select_ids(access_token, instance_url, sobject, where, bulk_threshold=BULK_THRESHOLD):
+    """Ids of the records matching where; a Bulk API 2.0 query when there are more than bulk_threshold.
+    Returns (ids, api_calls)."""
+    if not where:
+        return [], 0
+    count = batch.count_query(access_token, instance_url, f"SELECT COUNT() FROM {sobject} WHERE {where}")
+    if not count:
+        return [], 1
+    soql = f"SELECT Id FROM {sobject} WHERE {where}"
+    if count > bulk_threshold:
+        result = batch.bulk_query(access_token, instance_url, soql)
+        if result['state'] != 'JobComplete':
+            raise RuntimeError(f"Bulk query for {sobject} ended {result['state']}: {result['error_message']}")
+        return [row['Id'] for row in result['records']], 1 + result['api_calls']
+    records, calls = batch.query_all(access_token, instance_url, soql)
+    return [record['Id'] for record in records], 1 + calls
+
+def delete_method(count, bulk_threshold=BULK_THRESHOLD, hard=True):
+    if count > bulk_threshold:
+        return 'bulk hardDelete' if hard else 'bulk delete'
+    return 'collections'
+
+def estimated_calls(count, bulk_threshold=BULK_THRESHOLD):
+    """API calls to delete count records (a bulk job is create, upload, close and about 3 polls)"""
+    if count > bulk_threshold:
+        return 6
+    return math.ceil(count / batch.COLLECTION_BATCH_SIZE)
+
+def delete_records(access_token, instance_url, sobject, record_ids, bulk_threshold=BULK_THRESHOLD,
+                   parallel=DEFAULT_PARALLEL, hard=True):
+    """Delete record_ids of one object; returns a stats dict (method, deleted, failed, errors,
+    api_calls, seconds)"""
+    started = time.perf_counter()
+    stats = {'sobject': sobject, 'method': delete_method(len(record_ids), bulk_threshold, hard),
+             'deleted': 0, 'failed': 0, 'errors': [], 'api_calls': 0}
+    if len(record_ids) > bulk_threshold:
+        job = batch.bulk_delete(access_token, instance_url, sobject, record_ids, hard=hard)
+        stats['api_calls'] = job['api_calls']
+        if job['state'] == 'JobComplete':
+            stats['deleted'] = job['processed'] - job['failed']
+            stats['failed'] = job['failed']
+            if job['failed']:
+                stats['errors'].append(f"{job['failed']} row(s) failed in job {job['job_id']}")
+        else:
+            stats['failed'] = len(record_ids)
+            stats['errors'].append(f"job {job['job_id']} ended {job['state']}: {job['error_message']}")
+    else:
+        chunks = list(batch.chunked(record_ids, batch.COLLECTION_BATCH_SIZE))
+        with ThreadPoolExecutor(max_workers=max(1, min(parallel, len(chunks)))) as pool:
+            for results in pool.map(lambda chunk: batch.delete_collection(access_token, instance_url, chunk),
+                                    chunks):
+                stats['api_calls'] += 1
+                for deleted, error in results:
+                    if deleted:
+                        stats['deleted'] += 1
+                    else:
+                        stats['failed'] += 1
+                        if error not in stats['errors']:
+                            stats['errors'].append(error)
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+def purge(access_token, instance_url, selected, bulk_threshold=BULK_THRESHOLD, parallel=DEFAULT_PARALLEL,
+          hard=True):
+    """Delete the selected Ids ({sobject: ids}) of each object in PURGE_OBJECTS, the objects in parallel.
+    Returns one stats dict per object."""
+    objects = [sobject for sobject in PURGE_OBJECTS if selected.get(sobject)]
+    if not objects:
+        return []
+    with ThreadPoolExecutor(max_workers=len(objects)) as pool:
+        futures = [pool.submit(delete_records, access_token, instance_url, sobject, selected[sobject],
+                               bulk_threshold, parallel, hard) for sobject in objects]
+        return [future.result() for future in futures]
+
+def print_report(report, wall_seconds):
+    """Throughput per object and overall"""
+    print_colored(f"{'Object':<16}{'Method':<18}{'Deleted':>9}{'Failed':>8}{'Calls':>7}{'Seconds':>9}{'Rec/s':>9}",
+                  Colors.CYAN)
+    for stats in report:
+        rate = stats['deleted'] / stats['seconds'] if stats['seconds'] else 0
+        print(f"{stats['sobject']:<16}{stats['method']:<18}{stats['deleted']:>9}{stats['failed']:>8}"
+              f"{stats['api_calls']:>7}{stats['seconds']:>9.2f}{rate:>9,.0f}")
+        for error in stats['errors'][:5]:
+            print_colored(f"   ❌ {error}", Colors.RED)
+    deleted = sum(stats['deleted'] for stats in report)
+    print("-" * 76)
+    print_colored(f"✅ Deleted {deleted} record(s) in {wall_seconds:.2f}s "
+                  f"({deleted / wall_seconds if wall_seconds else 0:,.0f} records/s), "
+                  f"{sum(stats['api_calls'] for stats in report)} API call(s)", Colors.GREEN)
+
+def main(email_domains=TEST_EMAIL_DOMAINS, campaign_prefixes=TEST_CAMPAIGN_PREFIXES, dry_run=False, yes=False,
+         bulk_threshold=BULK_THRESHOLD, parallel=DEFAULT_PARALLEL, hard=True):
+    """Select the test data, confirm, then delete it"""
+    print_colored("=== Salesforce Test Data Purge ===", Colors.MAGENTA)
+    print()
+
+    env_vars = load_env_file()
+    access_token, instance_url = get_access_token(env_vars['SALESFORCE_CLIENT_ID'],
+                                                  env_vars['SALESFORCE_CLIENT_SECRET'],
+                                                  env_vars['SALESFORCE_DEV_URL'], step="Step 1")
+
+    print_colored("Step 2: Selecting test data...", Colors.BLUE)
+    print(f"  Contacts with email domain: {', '.join(email_domains) or '(none)'}")
+    print(f"  Campaigns named: {', '.join(f'{prefix}*' for prefix in campaign_prefixes) or '(none)'}")
+    filters = selection_filters(email_domains, campaign_prefixes)
+    started = time.perf_counter()
+    selected = {}
+    select_calls = 0
+    try:
+        for sobject in PURGE_OBJECTS:
+            selected[sobject], calls = select_ids(access_token, instance_url, sobject, filters[sobject],
+                                                  bulk_threshold)
+            select_calls += calls
+    except (transport.RequestException, RuntimeError) as e:
+        print_colored(f"❌ Selection failed: {str(e)}", Colors.RED)
+        return None
+
+    for sobject, ids in selected.items():
+        print(f"  {sobject:<16}{len(ids):>9} record(s)  -> {delete_method(len(ids), bulk_threshold, hard)}, "
+              f"~{estimated_calls(len(ids), bulk_threshold) if ids else 0} API call(s)")
+    print_colored(f"Selected in {time.perf_counter() - started:.2f}s ({select_calls} API call(s))", Colors.CYAN)
+    print()
+
+    total = sum(len(ids) for ids in selected.values())
+    if not total:
+        print_colored("✅ Nothing to purge", Colors.GREEN)
+        return []
+    if dry_run:
+        print_colored("Dry run: nothing deleted", Colors.YELLOW)
+        return []
+    if not yes:
+        answer = input(f"Delete these {total} record(s)? Type 'purge' to continue: ")
+        if answer.strip().lower() != 'purge':
+            print_colored("Aborted: nothing deleted", Colors.YELLOW)
+            return []
+
+    print_colored("Step 3: Deleting...", Colors.BLUE)
+    started = time.perf_counter()
+    try:
+        report = purge(access_token, instance_url, selected, bulk_threshold, parallel, hard)
+    except transport.RequestException as e:
+        print_colored(f"❌ Network error during purge: {str(e)}", Colors.RED)
+        return None
+    print()
+    print_report(report, time.perf_counter() - started)
+    return report
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Delete Salesforce test contacts and campaigns (and their members)")
+    parser.add_argument('--email-domain', action='append', metavar='DOMAIN',
+                        help=f"contacts with this email domain are test data; repeatable "
+                             f"(default: {', '.join(TEST_EMAIL_DOMAINS)})")
+    parser.add_argument('--campaign', action='append', default=[], metavar='PREFIX',
+                        help="also purge campaigns whose name starts with PREFIX; repeatable")
+    parser.add_argument('--dry-run', action='store_true', help="show what would be deleted and stop")
+    parser.add_argument('--yes', action='store_true', help="delete without asking for confirmation")
+    parser.add_argument('--bulk-threshold', type=int, default=BULK_THRESHOLD, metavar='N',
+                        help=f"use Bulk API 2.0 for objects with more than N records (default: {BULK_THRESHOLD})")
+    parser.add_argument('--parallel', type=int, default=DEFAULT_PARALLEL, metavar='N',
+                        help=f"concurrent sObject Collections calls per object (default: {DEFAULT_PARALLEL})")
+    parser.add_argument('--soft-delete', action='store_true',
+                        help="bulk jobs use delete (Recycle Bin) instead of hardDelete, for users without "
+                             "the Bulk API Hard Delete permission")
+    profiling.add_profile_argument(parser, __file__)
+    args = parser.parse_args()
+    if args.bulk_threshold < 0:
+        parser.error("--bulk-threshold must be 0 or greater")
+    if args.parallel < 1:
+        parser.error("--parallel must be 1 or greater")
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    profiling.run(main, args.profile,
+                  email_domains=tuple(args.email_domain or TEST_EMAIL_DOMAINS),
+                  campaign_prefixes=TEST_CAMPAIGN_PREFIXES + tuple(args.campaign),
+                  dry_run=args.dry_run, yes=args.yes, bulk_threshold=args.bulk_threshold,
+                  parallel=args.parallel, hard=not args.soft_delete)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Salesforce Traffic Replayer
+Replays a capture recorded by the campaign contact manager or ingest_contacts.py
+(SALESFORCE_CAPTURE_FILE) against the same code path, strategy and contact counts, without
+touching a Salesforce org.
+
+Usage:
+    python replay_traffic.py capture.jsonl.gz              # original pacing
+    python replay_traffic.py capture.jsonl.gz --speed 10   # 10x faster
+    python replay_traffic.py capture.jsonl.gz --speed 0    # no pacing
+"""
+
+import argparse
+import contextlib
+import io
+import re
+import sys
+import time
+from collections import Counter
+
+from campaign_contact_manager import manage_campaign_contacts
+from ingest_contacts import ingest_chunks, new_stats
+from sfclient import transport
+from sfclient.console import Colors, print_colored
+
+# Email literals in a recorded Contact lookup ("Email = '...'" or "Email IN ('...', ...)")
+EMAIL_CONDITION = re.compile(r"\bEmail\s+(?:=\s*'[^']*'|IN\s*\([^)]*\))", re.IGNORECASE)
+SOQL_LITERAL = re.compile(r"'([^']*)'")
+
+def recorded_emails(replayer):
+    """Pseudonymized emails looked up in the capture, in first-seen order. Pseudonyms are stable, so
+    placeholders that use them match the recorded query responses the way the original contacts did."""
+    emails = {}
+    for record in replayer.queues.get('GET /services/data/v58.0/query Contact', ()):
+        for condition in EMAIL_CONDITION.findall(record.get('params', {}).get('q', '')):
+            for email in SOQL_LITERAL.findall(condition):
+                emails.setdefault(email, None)
+    return list(emails)
+
+def build_placeholder_contacts(count, emails=()):
+    """Build stand-in contacts; the replayed responses decide hits, misses and errors"""
+    emails = list(emails)[:count]
+    emails += [f"replay.patient{i}@replay.invalid" for i in range(len(emails) + 1, count + 1)]
+    return [
+        {
+            "FirstName": "Replay",
+            "LastName": f"Patient{i}",
+            "Email": email
+        }
+        for i, email in enumerate(emails, 1)
+    ]
+
+def split_chunks(contacts, sizes):
+    """Cut contacts into consecutive chunks of the given sizes"""
+    chunks = []
+    for size in sizes:
+        chunks.append(contacts[:size])
+        contacts = contacts[size:]
+    return chunks
+
+def run_recorded(meta, campaign_name, contact_count, emails=()):
+    """Drive the code path the capture was recorded from; returns the successful additions"""
+    strategy = meta.get('strategy', 'serial')
+    plan_only = bool(meta.get('plan_only'))
+    contacts = build_placeholder_contacts(contact_count, emails)
+    if meta.get('tool') == 'ingest_contacts':
+        chunks = split_chunks(contacts, meta.get('chunk_sizes', []))
+        stats = ingest_chunks('replay-token', 'https://replay.invalid', campaign_name, chunks, new_stats(),
+                              strategy, plan_only)
+        return stats['added']
+    result = manage_campaign_contacts('replay-token', 'https://replay.invalid', campaign_name, contacts,
+                                      strategy, plan_only)
+    return 0 if plan_only else result[1]
+
+def summarize_capture(replayer):
+    """Summarize the recorded traffic mix (status codes and Salesforce error codes)"""
+    statuses = Counter()
+    error_codes = Counter()
+    for queue in replayer.queues.values():
+        for record in queue:
+            statuses[record.get('status', record.get('error'))] += 1
+            response = record.get('response')
+            if isinstance(response, list):
+                for item in response:
+                    if isinstance(item, dict) and item.get('errorCode'):
+                        error_codes[item['errorCode']] += 1
+    return statuses, error_codes
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured Salesforce traffic against the campaign manager")
+    parser.add_argument('capture_file', help="gzip JSONL file written via SALESFORCE_CAPTURE_FILE")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="pacing multiplier: 1 = original latencies, 10 = 10x faster, 0 = no pacing")
+    parser.add_argument('--verbose', action='store_true', help="show the campaign manager's own output")
+    args = parser.parse_args()
+
+    print_colored("=== Salesforce Traffic Replay ===", Colors.MAGENTA)
+    replayer = transport.start_replay(args.capture_file, speed=args.speed)
+    campaign_name = replayer.meta.get('campaign', 'Replay Campaign')
+    contact_count = int(replayer.meta.get('contacts', 0))
+    # Captures without a tool came from the serial campaign contact manager
+    tool = replayer.meta.get('tool', 'campaign_contact_manager')
+    mode = 'plan only' if replayer.meta.get('plan_only') else replayer.meta.get('strategy', 'serial')
+    # The replay starts after authentication, so the recorded token exchange is not served
+    replayer.queues.pop('POST /services/oauth2/token', None)
+    recorded_calls = replayer.remaining()
+    emails = recorded_emails(replayer)
+
+    statuses, error_codes = summarize_capture(replayer)
+    print_colored(f"Capture: {args.capture_file}", Colors.CYAN)
+    print(f"  Tool: {tool} ({mode})")
+    print(f"  Campaign: {campaign_name}")
+    print(f"  Contacts: {contact_count}")
+    print(f"  Recorded calls: {recorded_calls}")
+    print(f"  Status mix: {dict(statuses)}")
+    if error_codes:
+        print(f"  Salesforce error codes: {dict(error_codes)}")
+    print(f"  Recorded wall time: {replayer.recorded_wall_ms / 1000:.2f}s")
+    print()
+
+    started = time.perf_counter()
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with output:
+            successful = run_recorded(replayer.meta, campaign_name, contact_count, emails)
+    except SystemExit:
+        successful = 0
+    finally:
+        transport.stop_replay()
+    elapsed = time.perf_counter() - started
+
+    print_colored("Replay Results:", Colors.BLUE)
+    print(f"  Calls served: {sum(replayer.served.values())}/{recorded_calls}")
+    print(f"  Calls without a recorded response: {sum(replayer.missing.values())}")
+    for key, count in sorted(replayer.missing.items()):
+        print(f"    • {key}: {count}")
+    print(f"  Successful additions: {successful}/{contact_count}")
+    print(f"  Replay wall time: {elapsed:.2f}s (speed {args.speed:g}x)")
+
+    if replayer.missing:
+        print_colored("❌ The code issued calls that are not in the capture", Colors.RED)
+        sys.exit(1)
+    if replayer.remaining():
+        print_colored(f"📉 {replayer.remaining()} recorded call(s) were not needed by this code", Colors.CYAN)
+    print_colored("✅ Replay completed against the captured traffic", Colors.GREEN)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Shared Salesforce client used by the scripts in this folder and by the
+SALESFORCE_CAMPAIGN_MANAGER procedure (uploaded to a stage as sfclient.zip).
+
+Submodules are imported on first use, so `import sfclient` costs nothing:
+- console:   Colors and print_colored
+- config:    .env discovery and a cached parse
+- auth:      OAuth Client Credentials token requests and vended tokens for procedures
+- transport: the shared HTTP path (capture / replay, circuit breaker); loads requests lazily
+- circuit:   circuit breaker state persisted across Snowflake procedure calls
+- batch:     bulk reads, sObject Collections, Bulk API 2.0 and the cost model
+- records:   Campaign and Contact record builders, patient id matching
+- outbox:    store-and-forward queue for campaign writes (SQLite for the CLI, a table for procedures)
+- profiling: --profile support for the CLI scripts
+"""
+
+import importlib
+
+API_VERSION = 'v58.0'
+
+_SUBMODULES = ('console', 'config', 'auth', 'transport', 'circuit', 'batch', 'records', 'outbox', 'profiling')
+
+# Names re-exported at package level -> submodule that defines them
+_EXPORTS = {
+    'Colors': 'console',
+    'print_colored': 'console',
+    'load_env_file': 'config',
+    'get_access_token': 'auth',
+    'fetch_token': 'auth',
+    'TokenError': 'auth',
+}
+
+__all__ = ['API_VERSION', *_SUBMODULES, *_EXPORTS]
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'.{name}', __name__)
+    if name in _EXPORTS:
+        module = importlib.import_module(f'.{_EXPORTS[name]}', __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
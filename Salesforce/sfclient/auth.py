@@ -0,0 +1,116 @@
+"""
+OAuth Client Credentials Flow for Salesforce
+fetch_token raises on failure (procedure / library use): an HTTPError when the token endpoint
+is down (5xx), otherwise TokenError; get_access_token prints
+progress and exits (CLI use). Snowflake procedures use use_vended_token instead, which
+reads the token cached by the GET_SALESFORCE_TOKEN procedure and refreshes it on 401.
+"""
+
+import json
+import sys
+import threading
+import time
+
+from . import transport
+from .console import Colors, print_colored
+
+# Token vending procedure (Snowflake/Synthea-Synthetic-Provider-Data/19_proc__salesforce_token_vending.sql)
+TOKEN_VENDING_PROCEDURE = 'CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.GET_SALESFORCE_TOKEN'
+
+# A vended token is reused in-process until it is this close to its expiry
+VENDED_TOKEN_MARGIN_SECONDS = 300
+
+_vended_tokens = {}
+_vended_lock = threading.Lock()
+
+class TokenError(Exception):
+    """The token endpoint answered but did not issue an access token"""
+
+def request_token(client_id, client_secret, base_url, timeout=30):
+    """POST the client credentials grant; returns the raw response"""
+    token_url = f"{base_url.rstrip('/')}/services/oauth2/token"
+
+    headers = {
+        'Content-Type': 'application/x-www-form-urlencoded'
+    }
+
+    data = {
+        'grant_type': 'client_credentials',
+        'client_id': client_id,
+        'client_secret': client_secret
+    }
+
+    return transport.post(token_url, headers=headers, data=data, timeout=timeout)
+
+def fetch_token(client_id, client_secret, base_url, timeout=30):
+    """Request an access token; returns the token response (access_token, instance_url, ...)"""
+    response = request_token(client_id, client_secret, base_url, timeout)
+    if response.status_code >= 500:
+        response.raise_for_status()
+    if response.status_code != 200:
+        raise TokenError(f"Failed to get access token. Status: {response.status_code}, Response: {response.text}")
+
+    token_data = response.json()
+    if not token_data.get('access_token'):
+        raise TokenError(f"Token response has no access_token: {response.text}")
+    return token_data
+
+def get_access_token(client_id, client_secret, dev_url, step=None):
+    """Request access token using OAuth Client Credentials Flow; returns (access_token, instance_url)"""
+    if step:
+        print_colored(f"{step}: Requesting Access Token...", Colors.BLUE)
+
+    try:
+        token_data = fetch_token(client_id, client_secret, dev_url)
+    except TokenError as e:
+        print_colored("❌ Failed to obtain access token", Colors.RED)
+        print_colored(str(e), Colors.YELLOW)
+        sys.exit(1)
+    except transport.RequestException as e:
+        print_colored("❌ Failed to connect to Salesforce", Colors.RED)
+        print_colored(f"Error: {str(e)}", Colors.RED)
+        sys.exit(1)
+
+    access_token = token_data['access_token']
+    instance_url = token_data.get('instance_url') or dev_url.rstrip('/')
+
+    if step:
+        print_colored("✅ Successfully obtained access token", Colors.GREEN)
+        print_colored(f"Instance URL: {instance_url}", Colors.CYAN)
+        print()
+
+    return access_token, instance_url
+
+def vended_token(session, stale_version=None, procedure=TOKEN_VENDING_PROCEDURE):
+    """Token dict from the vending procedure: access_token, instance_url, issued_at, expires_epoch, version.
+    The last token is kept per process and reused until it nears expiry. stale_version asks the
+    vendor to replace that token (it was rejected); a newer cached token is returned as is.
+    When the vendor could not reach Salesforce a transport ConnectionError is raised, so callers
+    treat it as an outage (circuit.is_outage) rather than a TokenError."""
+    with _vended_lock:
+        cached = _vended_tokens.get(procedure)
+        if (stale_version is None and cached
+                and cached['expires_epoch'] - time.time() > VENDED_TOKEN_MARGIN_SECONDS):
+            return cached
+        result = session.call(procedure, stale_version)
+        token = json.loads(result) if isinstance(result, str) else dict(result)
+        if token.get('unavailable'):
+            raise transport.ConnectionError(f"{procedure} could not reach Salesforce: {token.get('error')}")
+        if not token.get('access_token'):
+            raise TokenError(f"{procedure} returned no access token: {token.get('error', 'unknown error')}")
+        _vended_tokens[procedure] = token
+        return token
+
+def use_vended_token(session, procedure=TOKEN_VENDING_PROCEDURE):
+    """Get a vended token and have the transport swap in a new one when Salesforce answers 401.
+    Returns (access_token, instance_url)."""
+    token = vended_token(session, procedure=procedure)
+
+    def refresh(stale_access_token):
+        current = _vended_tokens.get(procedure) or token
+        if current['access_token'] != stale_access_token:
+            return current['access_token']
+        return vended_token(session, current['version'], procedure)['access_token']
+
+    transport.set_token_refresher(refresh)
+    return token['access_token'], token['instance_url']
@@ -0,0 +1,525 @@
+"""
+Batched and bulk Salesforce helpers
+- Dedup: collapse repeated input records (same patient id or email) before any call is made
+- Bulk reads: SOQL IN-list queries in fixed-size chunks
+- Batched writes and deletes: sObject Collections (up to 200 records per call)
+- Batched reads: Composite Batch (up to 25 independent subrequests per call)
+- Multi-campaign reads: campaigns by name and memberships for many campaigns and contacts at once
+- Bulk writes: Bulk API 2.0 ingest jobs (insert, delete, hardDelete; CSV upload, gzip-compressed by the
+  transport; poll, results)
+- Bulk reads: Bulk API 2.0 query jobs (poll, then CSV result pages via Sforce-Locator)
+- PK chunking: split an object into Id ranges so several query jobs can run in parallel
+- Graph writes: Composite Graph (dependent subrequests, all-or-none per graph, one round trip)
+- Cost model: estimated API calls and wall time for the serial, batched and bulk strategies
+"""
+
+import csv
+import io
+import math
+import string
+import time
+
+from . import API_VERSION, transport
+
+# sObject Collections accepts at most 200 records per request
+COLLECTION_BATCH_SIZE = 200
+
+# Values per SOQL IN (...) list; keeps GET query URLs well under the 16KB URI limit
+SOQL_IN_BATCH_SIZE = 100
+
+# Bulk API 2.0 job polling
+BULK_POLL_SECONDS = 2.0
+BULK_TIMEOUT_SECONDS = 600
+
+# Rows per Bulk API 2.0 query result page (the API allows larger pages; this bounds memory per page)
+BULK_QUERY_PAGE_SIZE = 50000
+
+# Cost model inputs (per-call latency is measured at plan time; these cover server-side work)
+COLLECTION_RECORD_MS = 4.0
+BULK_JOB_BASE_SECONDS = 5.0
+BULK_RECORD_MS = 0.5
+
+# Salesforce Ids sort in ASCII order; the first 15 characters are case-sensitive base 62
+ID_ALPHABET = string.digits + string.ascii_uppercase + string.ascii_lowercase
+ID_LENGTH = 15
+
+# Composite Graph accepts at most 500 nodes (subrequests) per graph
+GRAPH_MAX_NODES = 500
+
+# Composite Batch accepts at most 25 subrequests per request
+COMPOSITE_BATCH_SIZE = 25
+
+STRATEGIES = ('serial', 'batched', 'bulk')
+
+
+def json_headers(access_token):
+    return {
+        'Authorization': f'Bearer {access_token}',
+        'Content-Type': 'application/json'
+    }
+
+
+def chunked(items, size):
+    """Yield successive fixed-size slices of a list"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def dedupe(items, *keys):
+    """Collapse items that share any key with an earlier item, keeping the first.
+    keys are functions returning a hashable key (or None to skip that key for the item).
+    Returns (unique items, owners) where owners[i] is the index in unique that stands for items[i],
+    so results computed for the unique items can be fanned out to every input."""
+    unique = []
+    owners = []
+    seen = [{} for _ in keys]
+    for item in items:
+        item_keys = [key(item) for key in keys]
+        owner = next((index.get(value) for index, value in zip(seen, item_keys)
+                      if value is not None and value in index), None)
+        if owner is None:
+            owner = len(unique)
+            unique.append(item)
+        for index, value in zip(seen, item_keys):
+            if value is not None:
+                index.setdefault(value, owner)
+        owners.append(owner)
+    return unique, owners
+
+
+def soql_quote(value):
+    """Quote a value as a SOQL string literal"""
+    escaped = str(value).replace('\\', '\\\\').replace("'", "\\'")
+    return f"'{escaped}'"
+
+
+def soql_like(value, leading='', trailing=''):
+    """Quote a value as a SOQL LIKE pattern matching it literally; leading and trailing
+    are added as-is (e.g. '%' for "ends with" / "starts with")"""
+    escaped = str(value).replace('\\', '\\\\').replace("'", "\\'").replace('%', '\\%').replace('_', '\\_')
+    return f"'{leading}{escaped}{trailing}'"
+
+
+def query_all(access_token, instance_url, soql):
+    """Run a SOQL query and follow nextRecordsUrl; returns (records, api_calls)"""
+    headers = json_headers(access_token)
+    response = transport.get(f"{instance_url}/services/data/{API_VERSION}/query",
+                             headers=headers, params={'q': soql})
+    response.raise_for_status()
+    result = response.json()
+    records = result.get('records', [])
+    calls = 1
+    while not result.get('done', True) and result.get('nextRecordsUrl'):
+        response = transport.get(f"{instance_url}{result['nextRecordsUrl']}", headers=headers)
+        response.raise_for_status()
+        result = response.json()
+        records.extend(result.get('records', []))
+        calls += 1
+    return records, calls
+
+
+def query_in_batches(access_token, instance_url, soql_template, literals, batch_size=SOQL_IN_BATCH_SIZE):
+    """Run soql_template once per chunk of SOQL literals; the template has an {values} placeholder"""
+    records = []
+    calls = 0
+    for chunk in chunked(list(literals), batch_size):
+        chunk_records, chunk_calls = query_all(access_token, instance_url,
+                                               soql_template.format(values=', '.join(chunk)))
+        records.extend(chunk_records)
+        calls += chunk_calls
+    return records, calls
+
+
+def create_collection(access_token, instance_url, sobject, records, batch_size=COLLECTION_BATCH_SIZE,
+                      raise_unavailable=False):
+    """Create records with sObject Collections (allOrNone=false).
+    Returns a list aligned with records of (record_id or None, error message or None).
+    With raise_unavailable a 5xx response raises HTTPError instead of failing every record in the chunk."""
+    url = f"{instance_url}/services/data/{API_VERSION}/composite/sobjects"
+    headers = json_headers(access_token)
+    results = []
+    for chunk in chunked(records, batch_size):
+        payload = {
+            'allOrNone': False,
+            'records': [dict({'attributes': {'type': sobject}}, **record) for record in chunk]
+        }
+        response = transport.post(url, headers=headers, json=payload)
+        if raise_unavailable and response.status_code >= 500:
+            response.raise_for_status()
+        if response.status_code != 200:
+            results.extend([(None, f"HTTP {response.status_code}: {response.text[:200]}")] * len(chunk))
+            continue
+        for item in response.json():
+            if item.get('success'):
+                results.append((item.get('id'), None))
+            else:
+                errors = item.get('errors') or [{}]
+                message = f"{errors[0].get('statusCode', 'UNKNOWN')}: {errors[0].get('message', '')}"
+                results.append((None, message))
+    return results
+
+
+def delete_collection(access_token, instance_url, record_ids, batch_size=COLLECTION_BATCH_SIZE):
+    """Delete records of any type with sObject Collections (allOrNone=false).
+    Returns a list aligned with record_ids of (deleted, error message or None)."""
+    url = f"{instance_url}/services/data/{API_VERSION}/composite/sobjects"
+    headers = json_headers(access_token)
+    results = []
+    for chunk in chunked(record_ids, batch_size):
+        response = transport.delete(url, headers=headers, params={'ids': ','.join(chunk), 'allOrNone': 'false'})
+        if response.status_code != 200:
+            results.extend([(False, f"HTTP {response.status_code}: {response.text[:200]}")] * len(chunk))
+            continue
+        for item in response.json():
+            if item.get('success'):
+                results.append((True, None))
+            else:
+                errors = item.get('errors') or [{}]
+                results.append((False, f"{errors[0].get('statusCode', 'UNKNOWN')}: {errors[0].get('message', '')}"))
+    return results
+
+
+def composite_batch(access_token, instance_url, paths, batch_size=COMPOSITE_BATCH_SIZE):
+    """GET independent resources with Composite Batch; paths are relative to /services/data
+    (e.g. 'v58.0/sobjects/Contact/describe'). Returns a list aligned with paths of (status code, body)."""
+    url = f"{instance_url}/services/data/{API_VERSION}/composite/batch"
+    headers = json_headers(access_token)
+    results = []
+    for chunk in chunked(paths, batch_size):
+        response = transport.post(url, headers=headers, json={
+            'haltOnError': False,
+            'batchRequests': [{'method': 'GET', 'url': path} for path in chunk]
+        })
+        response.raise_for_status()
+        results.extend((item.get('statusCode'), item.get('result')) for item in response.json().get('results', []))
+    return results
+
+
+def find_campaigns(access_token, instance_url, names, batch_size=SOQL_IN_BATCH_SIZE):
+    """Look up several campaigns by name with IN-list queries; returns ({name: campaign_id}, api_calls)"""
+    records, calls = query_in_batches(access_token, instance_url,
+                                      "SELECT Id, Name FROM Campaign WHERE Name IN ({values})",
+                                      [soql_quote(name) for name in sorted(set(names))], batch_size)
+    campaigns = {}
+    for record in records:
+        campaigns.setdefault(record['Name'], record['Id'])
+    return campaigns, calls
+
+
+def find_campaign_members(access_token, instance_url, campaign_ids, contact_ids, batch_size=SOQL_IN_BATCH_SIZE):
+    """Existing memberships for every pair of the given campaigns and contacts.
+    Returns ({(campaign_id, contact_id)}, api_calls)."""
+    pairs = set()
+    calls = 0
+    contact_literals = [soql_quote(contact_id) for contact_id in sorted(set(contact_ids))]
+    for campaign_chunk in chunked(sorted(set(campaign_ids)), batch_size):
+        campaign_list = ', '.join(soql_quote(campaign_id) for campaign_id in campaign_chunk)
+        records, chunk_calls = query_in_batches(
+            access_token, instance_url,
+            f"SELECT CampaignId, ContactId FROM CampaignMember WHERE CampaignId IN ({campaign_list}) "
+            f"AND ContactId IN ({{values}})",
+            contact_literals, batch_size)
+        calls += chunk_calls
+        pairs.update((record['CampaignId'], record['ContactId']) for record in records)
+    return pairs, calls
+
+
+def graph_node(reference_id, method, url, body=None):
+    """Build one Composite Graph subrequest; url is relative to the instance (/services/data/...)"""
+    node = {'method': method, 'url': url, 'referenceId': reference_id}
+    if body is not None:
+        node['body'] = body
+    return node
+
+
+def composite_graph(access_token, instance_url, graphs):
+    """Send several graphs in one Composite Graph request; graphs maps graphId -> list of nodes.
+    Each graph commits or rolls back as a unit. Returns {graphId: (successful, {referenceId: (status, body)})}"""
+    response = transport.post(f"{instance_url}/services/data/{API_VERSION}/composite/graph",
+                              headers=json_headers(access_token),
+                              json={'graphs': [{'graphId': graph_id, 'compositeRequest': nodes}
+                                               for graph_id, nodes in graphs.items()]})
+    response.raise_for_status()
+    results = {}
+    for graph in response.json().get('graphs', []):
+        nodes = {
+            node.get('referenceId'): (node.get('httpStatusCode'), node.get('body'))
+            for node in (graph.get('graphResponse') or {}).get('compositeResponse', [])
+        }
+        results[graph.get('graphId')] = (bool(graph.get('isSuccessful')), nodes)
+    return results
+
+
+def graph_error(nodes):
+    """First real error of a rolled-back graph (skips the PROCESSING_HALTED placeholders)"""
+    for status, body in nodes.values():
+        if status and status < 400 or not isinstance(body, list):
+            continue
+        for error in body:
+            if error.get('errorCode') != 'PROCESSING_HALTED':
+                return f"{error.get('errorCode', 'UNKNOWN')}: {error.get('message', '')}"
+    return 'graph rolled back'
+
+
+def records_to_csv(records):
+    """Serialize dict records to CSV for Bulk API 2.0 (header = union of keys)"""
+    fields = []
+    for record in records:
+        for key in record:
+            if key not in fields:
+                fields.append(key)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, lineterminator='\n')
+    writer.writeheader()
+    for record in records:
+        writer.writerow({
+            key: ('true' if value is True else 'false' if value is False else value)
+            for key, value in record.items()
+        })
+    return buffer.getvalue()
+
+
+def bulk_insert(access_token, instance_url, sobject, records, fetch_results=True,
+                poll_seconds=BULK_POLL_SECONDS, timeout_seconds=BULK_TIMEOUT_SECONDS):
+    """Insert records with a Bulk API 2.0 ingest job and wait for it to finish.
+    Returns a dict with job_id, state, processed, failed, successful rows, failed rows and api_calls."""
+    return bulk_ingest(access_token, instance_url, sobject, records, 'insert', fetch_results,
+                       poll_seconds, timeout_seconds)
+
+
+def bulk_delete(access_token, instance_url, sobject, record_ids, hard=True, fetch_results=False,
+                poll_seconds=BULK_POLL_SECONDS, timeout_seconds=BULK_TIMEOUT_SECONDS):
+    """Delete records of one sObject type with a Bulk API 2.0 ingest job. hard=True skips the
+    Recycle Bin (needs the "Bulk API Hard Delete" permission). Same result dict as bulk_insert."""
+    return bulk_ingest(access_token, instance_url, sobject, [{'Id': record_id} for record_id in record_ids],
+                       'hardDelete' if hard else 'delete', fetch_results, poll_seconds, timeout_seconds)
+
+
+def bulk_ingest(access_token, instance_url, sobject, records, operation, fetch_results=True,
+                poll_seconds=BULK_POLL_SECONDS, timeout_seconds=BULK_TIMEOUT_SECONDS):
+    """Run a Bulk API 2.0 ingest job (insert, delete or hardDelete) and wait for it to finish"""
+    jobs_url = f"{instance_url}/services/data/{API_VERSION}/jobs/ingest"
+    headers = json_headers(access_token)
+
+    response = transport.post(jobs_url, headers=headers, json={
+        'object': sobject,
+        'operation': operation,
+        'contentType': 'CSV',
+        'lineEnding': 'LF'
+    })
+    response.raise_for_status()
+    job_id = response.json()['id']
+    calls = 1
+
+    upload_headers = {'Authorization': f'Bearer {access_token}', 'Content-Type': 'text/csv'}
+    response = transport.put(f"{jobs_url}/{job_id}/batches", headers=upload_headers,
+                             data=records_to_csv(records).encode('utf-8'))
+    response.raise_for_status()
+    response = transport.patch(f"{jobs_url}/{job_id}", headers=headers, json={'state': 'UploadComplete'})
+    response.raise_for_status()
+    calls += 2
+
+    deadline = time.time() + timeout_seconds
+    while True:
+        time.sleep(poll_seconds)
+        response = transport.get(f"{jobs_url}/{job_id}", headers=headers)
+        response.raise_for_status()
+        calls += 1
+        job = response.json()
+        if job.get('state') in ('JobComplete', 'Failed', 'Aborted') or time.time() > deadline:
+            break
+
+    result = {
+        'job_id': job_id,
+        'state': job.get('state'),
+        'processed': int(job.get('numberRecordsProcessed') or 0),
+        'failed': int(job.get('numberRecordsFailed') or 0),
+        'error_message': job.get('errorMessage'),
+        'successful': [],
+        'errors': [],
+        'api_calls': calls
+    }
+
+    if fetch_results and result['state'] == 'JobComplete':
+        response = transport.get(f"{jobs_url}/{job_id}/successfulResults/", headers=upload_headers)
+        response.raise_for_status()
+        result['successful'] = list(csv.DictReader(io.StringIO(response.text)))
+        result['api_calls'] += 1
+        if result['failed']:
+            response = transport.get(f"{jobs_url}/{job_id}/failedResults/", headers=upload_headers)
+            response.raise_for_status()
+            result['errors'] = list(csv.DictReader(io.StringIO(response.text)))
+            result['api_calls'] += 1
+
+    return result
+
+
+def count_query(access_token, instance_url, soql):
+    """Run a SELECT COUNT() query; returns the row count"""
+    response = transport.get(f"{instance_url}/services/data/{API_VERSION}/query",
+                             headers=json_headers(access_token), params={'q': soql})
+    response.raise_for_status()
+    return int(response.json().get('totalSize') or 0)
+
+
+def start_bulk_query(access_token, instance_url, soql, include_deleted=False):
+    """Create a Bulk API 2.0 query job; returns the job id"""
+    response = transport.post(f"{instance_url}/services/data/{API_VERSION}/jobs/query",
+                              headers=json_headers(access_token), json={
+                                  'operation': 'queryAll' if include_deleted else 'query',
+                                  'query': soql,
+                                  'contentType': 'CSV',
+                                  'lineEnding': 'LF'
+                              })
+    response.raise_for_status()
+    return response.json()['id']
+
+
+def wait_bulk_query(access_token, instance_url, job_id,
+                    poll_seconds=BULK_POLL_SECONDS, timeout_seconds=BULK_TIMEOUT_SECONDS):
+    """Poll a query job until it finishes; returns (job info, api_calls)"""
+    url = f"{instance_url}/services/data/{API_VERSION}/jobs/query/{job_id}"
+    headers = json_headers(access_token)
+    deadline = time.time() + timeout_seconds
+    calls = 0
+    while True:
+        time.sleep(poll_seconds)
+        response = transport.get(url, headers=headers)
+        response.raise_for_status()
+        calls += 1
+        job = response.json()
+        if job.get('state') in ('JobComplete', 'Failed', 'Aborted') or time.time() > deadline:
+            return job, calls
+
+
+def bulk_query_pages(access_token, instance_url, job_id, page_size=BULK_QUERY_PAGE_SIZE):
+    """Yield the CSV text of each result page of a completed query job (one API call per page)"""
+    url = f"{instance_url}/services/data/{API_VERSION}/jobs/query/{job_id}/results"
+    headers = {'Authorization': f'Bearer {access_token}', 'Accept': 'text/csv'}
+    params = {'maxRecords': page_size}
+    while True:
+        response = transport.get(url, headers=headers, params=params)
+        response.raise_for_status()
+        yield response.text
+        locator = response.headers.get('Sforce-Locator')
+        if not locator or locator == 'null':
+            return
+        params = {'maxRecords': page_size, 'locator': locator}
+
+
+def bulk_query(access_token, instance_url, soql, include_deleted=False, page_size=BULK_QUERY_PAGE_SIZE,
+               poll_seconds=BULK_POLL_SECONDS, timeout_seconds=BULK_TIMEOUT_SECONDS):
+    """Run a SOQL query as a Bulk API 2.0 query job and read every result page.
+    Records are dicts keyed by the CSV header (relationship fields keep their dotted names, e.g. Contact.Email).
+    Returns a dict with job_id, state, error_message, records and api_calls."""
+    job_id = start_bulk_query(access_token, instance_url, soql, include_deleted)
+    job, calls = wait_bulk_query(access_token, instance_url, job_id, poll_seconds, timeout_seconds)
+    result = {
+        'job_id': job_id,
+        'state': job.get('state'),
+        'error_message': job.get('errorMessage'),
+        'records': [],
+        'api_calls': 1 + calls
+    }
+    if result['state'] == 'JobComplete':
+        for page in bulk_query_pages(access_token, instance_url, job_id, page_size):
+            result['records'].extend(csv.DictReader(io.StringIO(page)))
+            result['api_calls'] += 1
+    return result
+
+
+def id_to_int(record_id):
+    """Position of a Salesforce Id (15 or 18 characters) in the base-62 Id space"""
+    value = 0
+    for char in record_id[:ID_LENGTH]:
+        value = value * len(ID_ALPHABET) + ID_ALPHABET.index(char)
+    return value
+
+
+def int_to_id(value):
+    """Inverse of id_to_int; returns a 15-character Id"""
+    chars = []
+    for _ in range(ID_LENGTH):
+        value, digit = divmod(value, len(ID_ALPHABET))
+        chars.append(ID_ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+def id_ranges(first_id, last_id, chunks):
+    """Split [first_id, last_id] into up to `chunks` contiguous Id ranges of equal width.
+    Returns [(lower, upper)] with lower inclusive and upper exclusive; the last upper is None (open)."""
+    low = id_to_int(first_id)
+    high = id_to_int(last_id) + 1
+    width = max(1, math.ceil((high - low) / max(1, chunks)))
+    bounds = list(range(low, high, width))
+    return [(int_to_id(start), int_to_id(bounds[i + 1]) if i + 1 < len(bounds) else None)
+            for i, start in enumerate(bounds)]
+
+
+def pk_chunk_filters(access_token, instance_url, sobject, chunks, where=None):
+    """SOQL conditions that split an object into Id ranges (client-side PK chunking).
+    Records are created with sequential Ids, so equal-width ranges hold roughly equal row counts.
+    Returns (conditions, api_calls); conditions is empty when no rows match."""
+    base = f"SELECT Id FROM {sobject}" + (f" WHERE {where}" if where else "")
+    first, calls = query_all(access_token, instance_url, f"{base} ORDER BY Id ASC LIMIT 1")
+    if not first:
+        return [], calls
+    last, more_calls = query_all(access_token, instance_url, f"{base} ORDER BY Id DESC LIMIT 1")
+    conditions = []
+    for lower, upper in id_ranges(first[0]['Id'], last[0]['Id'], chunks):
+        condition = f"Id >= '{lower}'" + (f" AND Id < '{upper}'" if upper else "")
+        conditions.append(f"({where}) AND {condition}" if where else condition)
+    return conditions, calls + more_calls
+
+
+def bulk_job_seconds(record_count):
+    """Estimated server-side processing time for one Bulk API 2.0 job"""
+    return BULK_JOB_BASE_SECONDS + record_count * BULK_RECORD_MS / 1000.0
+
+
+def estimate_strategies(contacts, creates, member_inserts, campaign_exists, read_calls,
+                        latency_ms, verify_calls=1):
+    """Estimate API calls and wall time for each write strategy.
+
+    contacts        -- number of contacts requested
+    creates         -- contacts that do not exist yet
+    member_inserts  -- contacts that are not yet campaign members
+    campaign_exists -- whether the campaign already exists
+    read_calls      -- bulk read calls needed to resolve contacts and members
+    latency_ms      -- measured average round trip per API call
+    verify_calls    -- calls made after the writes (membership verification)
+    """
+    setup_calls = 2 + (0 if campaign_exists else 1)  # token, campaign lookup, campaign create
+    latency = latency_ms / 1000.0
+    estimates = {}
+
+    # Serial: one lookup per contact, one create per new contact, one member insert per contact
+    serial_calls = setup_calls + contacts + creates + contacts + verify_calls
+    estimates['serial'] = {'api_calls': serial_calls, 'wall_seconds': serial_calls * latency}
+
+    # Batched: bulk reads, then sObject Collections in batches of 200
+    create_batches = math.ceil(creates / COLLECTION_BATCH_SIZE)
+    member_batches = math.ceil(member_inserts / COLLECTION_BATCH_SIZE)
+    batched_calls = setup_calls + read_calls + create_batches + member_batches + verify_calls
+    estimates['batched'] = {
+        'api_calls': batched_calls,
+        'wall_seconds': batched_calls * latency + (creates + member_inserts) * COLLECTION_RECORD_MS / 1000.0
+    }
+
+    # Bulk: bulk reads, then one ingest job per object (create, upload, close, polls, results)
+    bulk_calls = setup_calls + read_calls + verify_calls
+    bulk_seconds = 0.0
+    for count, fetch_results in ((creates, True), (member_inserts, False)):
+        if count:
+            job_seconds = bulk_job_seconds(count)
+            polls = max(1, math.ceil(job_seconds / BULK_POLL_SECONDS))
+            bulk_calls += 3 + polls + (1 if fetch_results else 0)
+            bulk_seconds += job_seconds
+    estimates['bulk'] = {'api_calls': bulk_calls, 'wall_seconds': bulk_calls * latency + bulk_seconds}
+
+    return estimates
+
+
+def choose_strategy(estimates):
+    """Pick the strategy with the fewest API calls, breaking ties on wall time"""
+    return min(STRATEGIES, key=lambda name: (estimates[name]['api_calls'], estimates[name]['wall_seconds']))
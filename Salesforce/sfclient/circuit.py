@@ -0,0 +1,80 @@
+"""
+Circuit breaker state shared across Snowflake procedure calls
+The transport's breaker only lives as long as the Python process. use_persistent_breaker loads it
+from SALESFORCE_CIRCUIT_BREAKER at the start of a procedure call and writes every change back, so
+an outage seen by one call makes the following calls fail fast until a probe gets through.
+"""
+
+from . import transport
+
+# Breaker state table (Snowflake/Synthea-Synthetic-Provider-Data/19_proc__salesforce_token_vending.sql)
+BREAKER_TABLE = 'CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SALESFORCE_CIRCUIT_BREAKER'
+BREAKER_NAME = 'SALESFORCE'
+
+def load_breaker(session, table=BREAKER_TABLE):
+    """The saved breaker state, or None when there is none"""
+    rows = session.sql(
+        f"SELECT STATE, CONSECUTIVE_FAILURES, DATE_PART(EPOCH_SECOND, OPENED_AT) AS OPENED_EPOCH, LAST_ERROR "
+        f"FROM {table} WHERE BREAKER_NAME = ?",
+        params=[BREAKER_NAME]
+    ).collect()
+    if not rows:
+        return None
+    row = rows[0]
+    return {
+        'state': row['STATE'],
+        'failures': row['CONSECUTIVE_FAILURES'],
+        'opened_at': row['OPENED_EPOCH'],
+        'last_error': row['LAST_ERROR']
+    }
+
+def save_breaker(session, state, table=BREAKER_TABLE):
+    """Store a transport.breaker_state()"""
+    session.sql(
+        f"MERGE INTO {table} t "
+        f"USING (SELECT ? AS BREAKER_NAME, ? AS STATE, ? AS CONSECUTIVE_FAILURES, "
+        f"TO_TIMESTAMP_LTZ(?) AS OPENED_AT, ? AS LAST_ERROR) s "
+        f"ON t.BREAKER_NAME = s.BREAKER_NAME "
+        f"WHEN MATCHED THEN UPDATE SET STATE = s.STATE, CONSECUTIVE_FAILURES = s.CONSECUTIVE_FAILURES, "
+        f"OPENED_AT = s.OPENED_AT, LAST_ERROR = s.LAST_ERROR, UPDATED_AT = CURRENT_TIMESTAMP() "
+        f"WHEN NOT MATCHED THEN INSERT (BREAKER_NAME, STATE, CONSECUTIVE_FAILURES, OPENED_AT, LAST_ERROR, "
+        f"UPDATED_AT) VALUES (s.BREAKER_NAME, s.STATE, s.CONSECUTIVE_FAILURES, s.OPENED_AT, s.LAST_ERROR, "
+        f"CURRENT_TIMESTAMP())",
+        params=[BREAKER_NAME, state['state'], state['failures'],
+                int(state['opened_at']) if state['opened_at'] else None, state['last_error']]
+    ).collect()
+
+def use_persistent_breaker(session, table=BREAKER_TABLE):
+    """Restore the breaker saved by earlier calls and save every later change.
+    Persistence is best effort: without the table the breaker still protects this call.
+    Returns transport.breaker_state()."""
+    try:
+        transport.restore_breaker(load_breaker(session, table))
+    except Exception:
+        transport.restore_breaker(None)
+
+    def save(state):
+        try:
+            save_breaker(session, state, table)
+        except Exception:
+            pass
+
+    transport.set_breaker_listener(save)
+    return transport.breaker_state()
+
+def is_outage(error):
+    """True when error means Salesforce could not be reached (connection, timeout, open circuit or 5xx)"""
+    if isinstance(error, (transport.ConnectionError, transport.Timeout)):
+        return True
+    response = getattr(error, 'response', None)
+    return isinstance(error, transport.HTTPError) and response is not None and response.status_code >= 500
+
+def unavailable_result(state=None):
+    """Procedure result for calls refused because the breaker is open"""
+    return f"ERROR: SALESFORCE_UNAVAILABLE - {transport.format_breaker(state)}"
+
+def error_result(context, error):
+    """Procedure result for a failed stage; an open circuit is reported as SALESFORCE_UNAVAILABLE"""
+    if isinstance(error, transport.CircuitOpenError):
+        return f"ERROR: SALESFORCE_UNAVAILABLE - {context}: {transport.format_breaker(error.state)}"
+    return f"ERROR: {context} - {str(error)}"
@@ -0,0 +1,82 @@
+"""
+.env configuration for the Salesforce scripts
+The file is parsed once per process and cached until it changes on disk.
+"""
+
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+from .console import Colors, print_colored
+
+# Checked in order: parent directory first, then current directory
+ENV_FILE_LOCATIONS = ('../.env', '.env')
+
+REQUIRED_VARS = ('SALESFORCE_CLIENT_ID', 'SALESFORCE_CLIENT_SECRET', 'SALESFORCE_DEV_URL')
+
+def find_env_file(locations=ENV_FILE_LOCATIONS):
+    """Return the first existing .env file, or None"""
+    for location in locations:
+        path = Path(location)
+        if path.exists():
+            return path
+    return None
+
+@lru_cache(maxsize=8)
+def _parse_env_file(resolved_path, _mtime_ns):
+    # Parse .env file manually to handle quotes properly
+    env_vars = {}
+    with open(resolved_path, 'r') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            # Skip empty lines and comments
+            if not line or line.startswith('#'):
+                continue
+            # Check if line contains an equals sign
+            if '=' not in line:
+                print(f"⚠️  Warning: Skipping malformed line {line_number}: '{line}'")
+                continue
+            # Split only on the first equals sign
+            key, value = line.split('=', 1)
+            key = key.strip()
+            value = value.strip()
+            # Skip if key is empty
+            if not key:
+                print(f"⚠️  Warning: Skipping line {line_number} with empty key")
+                continue
+            # Strip quotes if present
+            value = value.strip('"\'')
+            env_vars[key] = value
+    return env_vars
+
+def parse_env_file(env_file):
+    """Parse a .env file into a dict (cached per path and modification time)"""
+    path = Path(env_file).resolve()
+    return dict(_parse_env_file(str(path), path.stat().st_mtime_ns))
+
+def get_setting(env_vars, name, default=None):
+    """Read a setting; the process environment overrides the .env file"""
+    return os.environ.get(name) or env_vars.get(name) or default
+
+def load_env_file(required=REQUIRED_VARS):
+    """Load environment variables from .env file, exiting with a hint when it is missing or incomplete"""
+    env_file = find_env_file()
+    if env_file is None:
+        print_colored("Error: .env file not found", Colors.RED)
+        print("Please create a .env file with your Salesforce credentials:")
+        print("Expected locations: ../.env or ./.env")
+        print("SALESFORCE_CLIENT_ID=your_client_id")
+        print("SALESFORCE_CLIENT_SECRET=your_client_secret")
+        print("SALESFORCE_DEV_URL=https://your_domain.my.salesforce.com")
+        sys.exit(1)
+
+    print_colored(f"Loading configuration from {env_file} file...", Colors.GREEN)
+    env_vars = parse_env_file(env_file)
+
+    missing_vars = [var for var in required if not env_vars.get(var)]
+    if missing_vars:
+        print_colored(f"Error: Missing required environment variables: {', '.join(missing_vars)}", Colors.RED)
+        sys.exit(1)
+
+    return env_vars
@@ -0,0 +1,22 @@
+"""
+Terminal output helpers shared by the Salesforce scripts
+"""
+
+# Colors for terminal output
+class Colors:
+    RED = '\033[0;31m'
+    GREEN = '\033[0;32m'
+    YELLOW = '\033[1;33m'
+    BLUE = '\033[0;34m'
+    CYAN = '\033[0;36m'
+    MAGENTA = '\033[0;35m'
+    PURPLE = MAGENTA
+    WHITE = '\033[0;37m'
+    BOLD = '\033[1m'
+    UNDERLINE = '\033[4m'
+    NC = '\033[0m'  # No Color
+    END = NC
+
+def print_colored(message, color=Colors.NC):
+    """Print colored message to terminal"""
+    print(f"{color}{message}{Colors.NC}")
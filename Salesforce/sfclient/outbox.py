@@ -0,0 +1,323 @@
+"""
+Store-and-forward queue for campaign writes
+Campaign pushes that cannot reach Salesforce are queued instead of being lost, and drain() sends
+them later while the org is healthy. Each drain round takes up to DRAIN_BATCH_ITEMS of the oldest
+pending items (any mix of campaigns), resolves their campaigns, contacts and memberships with bulk
+reads and writes what is missing with sObject Collections. A burst of single-patient pushes
+therefore becomes a few batched calls, and the pause between rounds caps the drain rate.
+
+A round is claimed before it is sent: its rows move to SENDING under the drain's run id, so
+concurrent drains never send the same rows. Rows still claimed when a drain stops go back to
+PENDING; rows left SENDING by a drain that died are reclaimed after CLAIM_TIMEOUT_MINUTES.
+
+Two stores share the drain:
+- SqliteOutbox:    a local SQLite file (CLI)
+- SnowflakeOutbox: the SALESFORCE_OUTBOX table (procedures, DRAIN_SALESFORCE_OUTBOX)
+"""
+
+import json
+import math
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from . import batch, records, transport
+
+# Outbox table (Snowflake/Synthea-Synthetic-Provider-Data/29_proc__drain_salesforce_outbox.sql)
+OUTBOX_TABLE = 'CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SALESFORCE_OUTBOX'
+
+# Items per drain round; each round makes at most one collection call per object type
+DRAIN_BATCH_ITEMS = batch.COLLECTION_BATCH_SIZE
+# Pause between rounds so a large backlog is spread out instead of bursting the org's API limits
+DRAIN_INTERVAL_SECONDS = 1.0
+DRAIN_MAX_ITEMS = 2000
+
+# A SENDING row claimed longer ago than this belongs to a drain that died and can be claimed again
+CLAIM_TIMEOUT_MINUTES = 30
+
+# An item rejected this many times (validation errors, not outages) is parked as FAILED
+MAX_ATTEMPTS = 5
+
+# Fields a queued contact can be matched on in Salesforce
+MATCH_FIELDS = ('patient_id__c', 'Email')
+
+# Rows per INSERT / MERGE statement when writing to the Snowflake table
+SNOWFLAKE_ROWS_PER_STATEMENT = 200
+
+def queue_item(campaign_name, contact, match_field='patient_id__c'):
+    """A campaign write: add contact (a Contact record, created if no contact matches) to the campaign"""
+    if match_field not in MATCH_FIELDS:
+        raise ValueError(f"match_field must be one of {', '.join(MATCH_FIELDS)}")
+    if contact.get(match_field) in (None, ''):
+        raise ValueError(f"Queued contact has no {match_field}")
+    return {'campaign': campaign_name, 'contact': contact, 'match_field': match_field}
+
+def match_key(field, value):
+    """Normalized value for matching a contact on field"""
+    return records.patient_id_key(value) if field == 'patient_id__c' else str(value).strip().lower()
+
+def match_literal(field, value):
+    """SOQL literal for a match value"""
+    if field == 'patient_id__c':
+        return records.patient_id_literal(value)
+    return batch.soql_quote(value)
+
+def item_key(item):
+    return (item['match_field'], match_key(item['match_field'], item['contact'][item['match_field']]))
+
+def collection_calls(records):
+    return math.ceil(len(records) / batch.COLLECTION_BATCH_SIZE)
+
+def send_items(access_token, instance_url, items):
+    """Write one round of queued items. Existing campaigns, contacts and members are reused, so
+    sending an item twice is harmless. Returns ({item id: error or None}, api_calls).
+    Raises RequestException when Salesforce is unreachable or answers 5xx, so no item is marked."""
+    names = sorted({item['campaign'] for item in items})
+    campaigns, api_calls = batch.find_campaigns(access_token, instance_url, names)
+    campaign_errors = {}
+    missing = [name for name in names if name not in campaigns]
+    if missing:
+        results = batch.create_collection(access_token, instance_url, 'Campaign',
+                                          [records.build_campaign_data(name, created_from='the outbound queue')
+                                           for name in missing],
+                                          raise_unavailable=True)
+        api_calls += collection_calls(missing)
+        for name, (campaign_id, error) in zip(missing, results):
+            if campaign_id:
+                campaigns[name] = campaign_id
+            else:
+                campaign_errors[name] = f"Failed to create campaign ({error})"
+
+    contact_ids = {}
+    for field in MATCH_FIELDS:
+        values = {item_key(item): item['contact'][field] for item in items if item['match_field'] == field}
+        if not values:
+            continue
+        matches, calls = batch.query_in_batches(
+            access_token, instance_url, f"SELECT Id, {field} FROM Contact WHERE {field} IN ({{values}})",
+            sorted({match_literal(field, value) for value in values.values()}))
+        api_calls += calls
+        for record in matches:
+            if record.get(field) not in (None, ''):
+                contact_ids.setdefault((field, match_key(field, record[field])), record['Id'])
+
+    contact_errors = {}
+    new_contacts = {}
+    for item in items:
+        key = item_key(item)
+        if key not in contact_ids and key not in new_contacts:
+            new_contacts[key] = item['contact']
+    if new_contacts:
+        results = batch.create_collection(access_token, instance_url, 'Contact', list(new_contacts.values()),
+                                          raise_unavailable=True)
+        api_calls += collection_calls(new_contacts)
+        for key, (contact_id, error) in zip(new_contacts, results):
+            if contact_id:
+                contact_ids[key] = contact_id
+            else:
+                contact_errors[key] = f"Failed to create contact ({error})"
+
+    pairs = {}
+    for item in items:
+        campaign_id, contact_id = campaigns.get(item['campaign']), contact_ids.get(item_key(item))
+        if campaign_id and contact_id:
+            pairs.setdefault((campaign_id, contact_id), None)
+    member_errors = {}
+    if pairs:
+        members, calls = batch.find_campaign_members(access_token, instance_url,
+                                                     {pair[0] for pair in pairs}, {pair[1] for pair in pairs})
+        api_calls += calls
+        inserts = [pair for pair in pairs if pair not in members]
+        results = batch.create_collection(access_token, instance_url, 'CampaignMember', [
+            {"CampaignId": campaign_id, "ContactId": contact_id, "Status": "Sent"}
+            for campaign_id, contact_id in inserts
+        ], raise_unavailable=True)
+        api_calls += collection_calls(inserts)
+        for pair, (_member_id, error) in zip(inserts, results):
+            if error:
+                member_errors[pair] = f"Failed to add to campaign ({error})"
+
+    errors = {}
+    for item in items:
+        key = item_key(item)
+        pair = (campaigns.get(item['campaign']), contact_ids.get(key))
+        errors[item['id']] = (campaign_errors.get(item['campaign']) or contact_errors.get(key)
+                              or member_errors.get(pair))
+    return errors, api_calls
+
+def drain(store, access_token, instance_url, max_items=DRAIN_MAX_ITEMS, batch_items=DRAIN_BATCH_ITEMS,
+          interval_seconds=DRAIN_INTERVAL_SECONDS):
+    """Send up to max_items pending items in rounds of batch_items, oldest first.
+    Each round is claimed for this drain's run id before it is sent, so concurrent drains send
+    disjoint rows. Stops early when Salesforce is unreachable; unsent items go back to pending.
+    Returns counts: rounds, sent, retrying, failed, api_calls and stopped (the reason, or None)."""
+    stats = {'rounds': 0, 'sent': 0, 'retrying': 0, 'failed': 0, 'api_calls': 0, 'stopped': None}
+    run_id = uuid.uuid4().hex
+    taken = 0
+    last_id = 0
+    try:
+        while taken < max_items:
+            items = store.claim(min(batch_items, max_items - taken), run_id, after_id=last_id)
+            if not items:
+                break
+            if stats['rounds']:
+                time.sleep(interval_seconds)
+            if transport.breaker_open():
+                stats['stopped'] = transport.format_breaker()
+                break
+            try:
+                errors, calls = send_items(access_token, instance_url, items)
+            except transport.RequestException as e:
+                stats['stopped'] = str(e)
+                break
+            stats['rounds'] += 1
+            stats['api_calls'] += calls
+            taken += len(items)
+            last_id = items[-1]['id']
+
+            outcomes = []
+            for item in items:
+                error = errors[item['id']]
+                if error is None:
+                    status = 'SENT'
+                else:
+                    status = 'FAILED' if item['attempts'] + 1 >= MAX_ATTEMPTS else 'PENDING'
+                stats[{'SENT': 'sent', 'FAILED': 'failed', 'PENDING': 'retrying'}[status]] += 1
+                outcomes.append((item['id'], status, error))
+            store.mark(outcomes)
+    finally:
+        store.release(run_id)
+    return stats
+
+def format_counts(counts):
+    return ", ".join(f"{status}={counts.get(status, 0)}" for status in ('PENDING', 'SENDING', 'SENT', 'FAILED'))
+
+class SqliteOutbox:
+    """Outbox in a local SQLite file (CLI)"""
+
+    def __init__(self, path):
+        import sqlite3
+
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "item_id INTEGER PRIMARY KEY AUTOINCREMENT, campaign_name TEXT NOT NULL, contact TEXT NOT NULL, "
+            "match_field TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'PENDING', attempts INTEGER NOT NULL DEFAULT 0, "
+            "last_error TEXT, source TEXT, enqueued_at TEXT NOT NULL, sent_at TEXT, claimed_by TEXT, claimed_at TEXT)")
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(outbox)")}
+        for column in ('claimed_by', 'claimed_at'):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE outbox ADD COLUMN {column} TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status, item_id)")
+        self.conn.commit()
+
+    def enqueue(self, items, source=None):
+        now = datetime.now().isoformat(timespec='seconds')
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO outbox (campaign_name, contact, match_field, source, enqueued_at) VALUES (?, ?, ?, ?, ?)",
+                [(item['campaign'], json.dumps(item['contact']), item['match_field'], source, now) for item in items])
+        return len(items)
+
+    def claim(self, limit, run_id, after_id=0):
+        now = datetime.now()
+        stale = (now - timedelta(minutes=CLAIM_TIMEOUT_MINUTES)).isoformat(timespec='seconds')
+        claimable = "(status = 'PENDING' OR (status = 'SENDING' AND claimed_at < ?))"
+        with self.conn:
+            self.conn.execute(
+                f"UPDATE outbox SET status = 'SENDING', claimed_by = ?, claimed_at = ? WHERE {claimable} "
+                f"AND item_id IN (SELECT item_id FROM outbox WHERE {claimable} AND item_id > ? "
+                f"ORDER BY item_id LIMIT ?)",
+                (run_id, now.isoformat(timespec='seconds'), stale, stale, after_id, limit))
+        rows = self.conn.execute(
+            "SELECT item_id, campaign_name, contact, match_field, attempts FROM outbox "
+            "WHERE status = 'SENDING' AND claimed_by = ? ORDER BY item_id", (run_id,)).fetchall()
+        return [{'id': item_id, 'campaign': campaign, 'contact': json.loads(contact), 'match_field': field,
+                 'attempts': attempts} for item_id, campaign, contact, field, attempts in rows]
+
+    def mark(self, outcomes):
+        now = datetime.now().isoformat(timespec='seconds')
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE outbox SET status = ?, attempts = attempts + ?, last_error = ?, sent_at = ?, "
+                "claimed_by = NULL, claimed_at = NULL WHERE item_id = ?",
+                [(status, 0 if status == 'SENT' else 1, error, now if status == 'SENT' else None, item_id)
+                 for item_id, status, error in outcomes])
+
+    def release(self, run_id):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE outbox SET status = 'PENDING', claimed_by = NULL, claimed_at = NULL "
+                "WHERE status = 'SENDING' AND claimed_by = ?", (run_id,))
+
+    def counts(self):
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+
+    def close(self):
+        self.conn.close()
+
+class SnowflakeOutbox:
+    """Outbox in the SALESFORCE_OUTBOX table (procedures)"""
+
+    def __init__(self, session, table=OUTBOX_TABLE):
+        self.session = session
+        self.table = table
+
+    def enqueue(self, items, source=None):
+        for chunk in batch.chunked(list(items), SNOWFLAKE_ROWS_PER_STATEMENT):
+            params = []
+            for item in chunk:
+                params.extend([item['campaign'], json.dumps(item['contact']), item['match_field'], source])
+            self.session.sql(
+                f"INSERT INTO {self.table} (CAMPAIGN_NAME, CONTACT, MATCH_FIELD, SOURCE) "
+                f"SELECT $1, PARSE_JSON($2), $3, $4 FROM VALUES {', '.join(['(?, ?, ?, ?)'] * len(chunk))}",
+                params=params
+            ).collect()
+        return len(items)
+
+    def claim(self, limit, run_id, after_id=0):
+        # The status check is repeated outside the subquery so a row claimed by a concurrent drain
+        # (whose UPDATE committed first) is not claimed again
+        claimable = (f"(STATUS = 'PENDING' OR (STATUS = 'SENDING' AND "
+                     f"CLAIMED_AT < DATEADD(MINUTE, -{int(CLAIM_TIMEOUT_MINUTES)}, CURRENT_TIMESTAMP())))")
+        self.session.sql(
+            f"UPDATE {self.table} SET STATUS = 'SENDING', CLAIMED_BY = ?, CLAIMED_AT = CURRENT_TIMESTAMP() "
+            f"WHERE {claimable} AND ITEM_ID IN (SELECT ITEM_ID FROM {self.table} WHERE {claimable} "
+            f"AND ITEM_ID > ? ORDER BY ITEM_ID LIMIT {int(limit)})",
+            params=[run_id, after_id]
+        ).collect()
+        rows = self.session.sql(
+            f"SELECT ITEM_ID, CAMPAIGN_NAME, TO_JSON(CONTACT) AS CONTACT, MATCH_FIELD, ATTEMPTS FROM {self.table} "
+            f"WHERE STATUS = 'SENDING' AND CLAIMED_BY = ? ORDER BY ITEM_ID",
+            params=[run_id]
+        ).collect()
+        return [{'id': row['ITEM_ID'], 'campaign': row['CAMPAIGN_NAME'], 'contact': json.loads(row['CONTACT']),
+                 'match_field': row['MATCH_FIELD'], 'attempts': row['ATTEMPTS']} for row in rows]
+
+    def mark(self, outcomes):
+        for chunk in batch.chunked(list(outcomes), SNOWFLAKE_ROWS_PER_STATEMENT):
+            params = []
+            for item_id, status, error in chunk:
+                params.extend([item_id, status, error])
+            self.session.sql(
+                f"MERGE INTO {self.table} t "
+                f"USING (SELECT $1 AS ITEM_ID, $2 AS STATUS, $3 AS LAST_ERROR "
+                f"FROM VALUES {', '.join(['(?, ?, ?)'] * len(chunk))}) s "
+                f"ON t.ITEM_ID = s.ITEM_ID "
+                f"WHEN MATCHED THEN UPDATE SET STATUS = s.STATUS, LAST_ERROR = s.LAST_ERROR, "
+                f"ATTEMPTS = t.ATTEMPTS + IFF(s.STATUS = 'SENT', 0, 1), "
+                f"SENT_AT = IFF(s.STATUS = 'SENT', CURRENT_TIMESTAMP(), NULL), CLAIMED_BY = NULL, CLAIMED_AT = NULL",
+                params=params
+            ).collect()
+
+    def release(self, run_id):
+        self.session.sql(
+            f"UPDATE {self.table} SET STATUS = 'PENDING', CLAIMED_BY = NULL, CLAIMED_AT = NULL "
+            f"WHERE STATUS = 'SENDING' AND CLAIMED_BY = ?",
+            params=[run_id]
+        ).collect()
+
+    def counts(self):
+        rows = self.session.sql(f"SELECT STATUS, COUNT(*) AS ITEMS FROM {self.table} GROUP BY STATUS").collect()
+        return {row['STATUS']: row['ITEMS'] for row in rows}
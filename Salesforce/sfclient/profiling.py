@@ -0,0 +1,76 @@
+"""
+Profiling hook for the Salesforce CLI scripts
+Adds a --profile option that runs the script under cProfile, writes a .pstats file
+(readable by snakeviz, flameprof or gprof2dot for flamegraphs) and prints where the
+time went: JSON encoding, terminal output, network waits or everything else.
+"""
+
+import sys
+from pathlib import Path
+
+# (category, substrings matched against "filename:function") checked in order
+TIME_CATEGORIES = [
+    ('network', ('socket', 'ssl', 'urllib3', 'http/client', 'select', 'getaddrinfo')),
+    ('json', ('json',)),
+    ('output', ('builtins.print', 'print_colored', "'write' of '_io")),
+]
+
+def add_profile_argument(parser, script_name):
+    """Add --profile [PATH] to an argparse parser"""
+    default_path = f"{Path(script_name).stem}.pstats"
+    parser.add_argument('--profile', nargs='?', const=default_path, default=None, metavar='PATH',
+                        help=f"run under cProfile and write stats to PATH (default: {default_path})")
+
+def categorize(stats):
+    """Split total self time into network / json / output / other buckets"""
+    totals = {name: 0.0 for name, _ in TIME_CATEGORIES}
+    totals['other'] = 0.0
+    for (filename, _lineno, function), (_cc, _nc, tottime, _ct, _callers) in stats.stats.items():
+        label = f"{filename}:{function}"
+        for name, patterns in TIME_CATEGORIES:
+            if any(pattern in label for pattern in patterns):
+                totals[name] += tottime
+                break
+        else:
+            totals['other'] += tottime
+    return totals
+
+def top_functions(stats, limit=10):
+    """Return (label, calls, cumulative seconds) for the top functions by cumulative time"""
+    stats.sort_stats('cumulative')
+    rows = []
+    for func in stats.fcn_list[:limit]:
+        _cc, ncalls, _tt, cumtime, _callers = stats.stats[func]
+        filename, lineno, function = func
+        label = function if filename == '~' else f"{Path(filename).name}:{lineno}({function})"
+        rows.append((label, ncalls, cumtime))
+    return rows
+
+def print_profile_report(stats, profile_path, limit=15):
+    """Print the time breakdown and top cumulative functions to stderr"""
+    out = sys.stderr
+    total = sum(categorize(stats).values()) or 1e-9
+    print(file=out)
+    print(f"=== Profile written to {profile_path} ===", file=out)
+    print("Time breakdown (self time):", file=out)
+    for name, seconds in categorize(stats).items():
+        print(f"  {name:<8} {seconds:8.3f}s  {seconds / total * 100:5.1f}%", file=out)
+    print(f"Top {limit} functions by cumulative time:", file=out)
+    for label, ncalls, cumtime in top_functions(stats, limit):
+        print(f"  {cumtime:8.3f}s  {ncalls:>7}  {label}", file=out)
+    print(f"Flamegraph: flameprof {profile_path} > profile.svg  (or: snakeviz {profile_path})", file=out)
+
+def run(func, profile_path=None, *args, **kwargs):
+    """Call func, under cProfile when profile_path is set"""
+    if not profile_path:
+        return func(*args, **kwargs)
+
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(profile_path)
+        print_profile_report(pstats.Stats(profiler), profile_path)
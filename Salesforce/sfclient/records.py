@@ -0,0 +1,53 @@
+"""
+Salesforce record builders and patient id helpers shared by the CLI, the outbox and the procedures
+patient_id__c is a Number field, so a patient id arrives as a JSON int or string, a Snowflake NUMBER
+or a Salesforce double; patient_id_key normalizes all of them for matching.
+"""
+
+from datetime import date, datetime
+
+def patient_id_key(patient_id):
+    """Normalize a patient id (JSON int/string, Snowflake NUMBER or Salesforce double) for matching"""
+    return float(patient_id)
+
+def patient_id_literal(patient_id):
+    """Format a patient id as a SOQL numeric literal"""
+    value = float(patient_id)
+    return str(int(value)) if value.is_integer() else str(value)
+
+def split_name(full_name):
+    """(FirstName, LastName) of a patient name; a missing part becomes 'Unknown' / 'Patient'"""
+    name_parts = str(full_name).strip().split(' ', 1)
+    first_name = name_parts[0] or 'Unknown'
+    last_name = name_parts[1] if len(name_parts) > 1 else 'Patient'
+    return first_name, last_name
+
+def created_on():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def build_campaign_data(campaign_name, created_from='Snowflake', status='In Progress'):
+    """Campaign record for a new campaign"""
+    return {
+        "Name": campaign_name,
+        "IsActive": True,
+        "Status": status,
+        "Type": "Other",
+        "StartDate": date.today().strftime('%Y-%m-%d'),
+        "Description": f"Campaign created from {created_from} on {created_on()}"
+    }
+
+def build_contact_data(first_name, last_name, patient_id, email, created_from='Snowflake'):
+    """Contact record for a patient"""
+    return {
+        "FirstName": first_name,
+        "LastName": last_name,
+        "Email": str(email),
+        "patient_id__c": float(patient_id),
+        "Title": "Patient",
+        "Description": f"Contact created from {created_from} on {created_on()}"
+    }
+
+def build_patient_contact(patient, created_from='Snowflake'):
+    """Contact record for a procedure input patient (name, patient_id and email)"""
+    first_name, last_name = split_name(patient['name'])
+    return build_contact_data(first_name, last_name, patient['patient_id'], patient['email'], created_from)
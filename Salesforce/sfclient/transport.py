@@ -0,0 +1,709 @@
+"""
+Shared Salesforce HTTP path
+Every REST call made by the scripts and the campaign procedure goes through request() so that:
+- Production traffic can be captured to a compact, PHI-redacted file (gzip JSONL)
+- A captured file can be replayed offline at original or accelerated pacing
+- A 401 on a Bearer request is retried once with a refreshed token when a refresher is set
+  (set_token_refresher); later requests carrying the rejected token get the new one
+- Identical GETs issued concurrently (same URL, params and token) share one in-flight request;
+  every caller receives the same response (set_coalescing)
+- Consecutive connection errors, timeouts and 5xx responses open a circuit breaker: further calls
+  fail fast with CircuitOpenError until a single probe succeeds after the cooldown (breaker_state)
+- Calls without their own timeout use REQUEST_TIMEOUT, so a dead org cannot hang the caller
+- Request bodies above GZIP_MIN_BYTES are sent gzip-compressed (Content-Encoding: gzip), and the
+  bytes saved are counted for the run's metrics (compression_stats)
+
+requests is imported on the first call, not at import time, so scripts start fast.
+Its exception classes are available here as attributes (transport.RequestException, ...), as is
+CircuitOpenError, a ConnectionError subclass, so existing handlers also catch an open circuit.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import defaultdict, deque
+
+# Fields that may contain patient identifiable information and are never written to disk
+PHI_FIELDS = {
+    'FirstName', 'LastName', 'Name', 'Email', 'Phone', 'MobilePhone', 'Title',
+    'Description', 'patient_id__c', 'Birthdate', 'MailingStreet', 'MailingCity',
+    'MailingPostalCode', 'name', 'email', 'patient_id'
+}
+
+# Credentials are masked entirely rather than hashed
+SECRET_FIELDS = {'access_token', 'client_id', 'client_secret', 'id_token', 'signature', 'refresh_token'}
+
+SOQL_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+SOQL_NUMERIC_LITERAL = re.compile(r"\b\d{5,}(?:\.\d+)?\b")
+RECORD_ID_SEGMENT = re.compile(r"/(?=[a-zA-Z0-9]*\d)[a-zA-Z0-9]{15}(?:[a-zA-Z0-9]{3})?(?=/|$)")
+SOQL_FROM_OBJECT = re.compile(r"\bFROM\s+(\w+)", re.IGNORECASE)
+# Exception messages embed the request URL (with the SOQL query string) and sometimes raw values
+MESSAGE_URL = re.compile(r"(?:https?://[^\s'\"()?]+|/[^\s'\"()?]*)(?:\?[^\s'\"()]*)?")
+EMAIL_ADDRESS = re.compile(r"[\w.+-]+(?:@|%40)[\w-]+(?:\.[\w-]+)+")
+
+# requests.exceptions classes exposed lazily as module attributes
+EXCEPTIONS = ('RequestException', 'HTTPError', 'ConnectionError', 'Timeout')
+
+# Bodies smaller than this are sent as-is; gzip overhead outweighs the saving on small payloads
+GZIP_MIN_BYTES = 2048
+# Level 6 is zlib's default: most of level 9's ratio at a fraction of the CPU
+GZIP_LEVEL = 6
+
+# (connect, read) seconds for calls that do not pass a timeout; Bulk API uploads need the long read
+REQUEST_TIMEOUT = (10, 120)
+
+# Open the breaker after this many consecutive failures, then let one probe through after the cooldown
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_COOLDOWN_SECONDS = 60
+
+_capture = None
+_replay = None
+_circuit_open_error = None
+_compression_min_bytes = GZIP_MIN_BYTES
+_token_refresher = None
+_replaced_tokens = {}
+_token_lock = threading.Lock()
+_coalesce_reads = True
+
+
+def __getattr__(name):
+    if name in EXCEPTIONS:
+        import requests
+        return getattr(requests.exceptions, name)
+    if name == 'CircuitOpenError':
+        return _circuit_open_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def redact_value(value):
+    """Replace a PHI value with a stable pseudonym (same input -> same token)"""
+    import hashlib
+    digest = hashlib.sha256(str(value).encode('utf-8')).hexdigest()[:12]
+    return f"redacted:{digest}"
+
+
+def redact(data):
+    """Recursively redact PHI and secrets from a JSON-compatible structure"""
+    if isinstance(data, dict):
+        redacted = {}
+        for key, value in data.items():
+            if key in SECRET_FIELDS:
+                redacted[key] = '***'
+            elif key in PHI_FIELDS and value is not None and not isinstance(value, (dict, list)):
+                redacted[key] = redact_value(value)
+            else:
+                redacted[key] = redact(value)
+        return redacted
+    if isinstance(data, list):
+        return [redact(item) for item in data]
+    return data
+
+
+def redact_soql(query):
+    """Redact string literals and long numeric literals (patient ids) from a SOQL query"""
+    query = SOQL_STRING_LITERAL.sub(lambda m: f"'{redact_value(m.group(0)[1:-1])}'", query)
+    return SOQL_NUMERIC_LITERAL.sub(lambda m: redact_value(m.group(0)), query)
+
+
+def redact_url(url):
+    """A URL with its query string redacted (SOQL literals pseudonymized, other values kept)"""
+    from urllib.parse import parse_qsl, urlencode
+
+    base, _, query = url.partition('?')
+    if not query:
+        return base
+    params = [(key, redact_soql(value) if key == 'q' else value) for key, value in parse_qsl(query)]
+    return f"{base}?{urlencode(params)}"
+
+
+def redact_message(message):
+    """Redact an exception message for the capture file: URLs lose their query literals, and
+    quoted literals, long numbers and email addresses elsewhere in the text are pseudonymized"""
+    parts = []
+    position = 0
+    for match in MESSAGE_URL.finditer(message):
+        parts.append(redact_soql(message[position:match.start()]))
+        parts.append(redact_url(match.group(0)))
+        position = match.end()
+    parts.append(redact_soql(message[position:]))
+    return EMAIL_ADDRESS.sub(lambda m: redact_value(m.group(0)), ''.join(parts))
+
+
+def has_raw_literals(text):
+    """True when text still holds an unredacted SOQL string literal or email address"""
+    from urllib.parse import unquote_plus
+
+    text = unquote_plus(text)
+    literals = [literal for literal in SOQL_STRING_LITERAL.findall(text) if not literal[1:].startswith('redacted:')]
+    return bool(literals) or bool(EMAIL_ADDRESS.search(text))
+
+
+def route_key(method, url, params=None):
+    """Build the replay key for a call: method, path with record ids removed and SOQL object"""
+    path = url.split('://', 1)[-1]
+    path = '/' + path.split('/', 1)[1] if '/' in path else '/'
+    path = RECORD_ID_SEGMENT.sub('/{id}', path.split('?', 1)[0])
+    soql_object = ''
+    if params and params.get('q'):
+        match = SOQL_FROM_OBJECT.search(params['q'])
+        soql_object = match.group(1) if match else ''
+    return f"{method.upper()} {path} {soql_object}".strip()
+
+
+class _CaptureWriter:
+    """Append-only writer for captured calls (thread safe)"""
+
+    def __init__(self, path, meta):
+        import gzip
+        from datetime import datetime
+
+        self.path = path
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.file = gzip.open(path, 'wt', encoding='utf-8')
+        self._write({
+            'type': 'session',
+            'started': datetime.now().isoformat(timespec='seconds'),
+            'meta': meta
+        })
+
+    def _write(self, record):
+        line = json.dumps(record, separators=(',', ':'), default=str)
+        with self.lock:
+            self.file.write(line + '\n')
+
+    def record(self, method, url, kwargs, response, started, latency_ms, error=None):
+        params = kwargs.get('params') or {}
+        entry = {
+            'type': 'call',
+            'offset_ms': round((started - self.started) * 1000, 1),
+            'latency_ms': round(latency_ms, 1),
+            'key': route_key(method, url, params),
+        }
+        if params:
+            entry['params'] = {k: redact_soql(v) if k == 'q' else v for k, v in params.items()}
+        if kwargs.get('json') is not None:
+            entry['body'] = redact(kwargs['json'])
+        elif isinstance(kwargs.get('data'), dict):
+            entry['body'] = redact(kwargs['data'])
+        elif kwargs.get('data') is not None:
+            entry['body_bytes'] = len(kwargs['data'])
+
+        if error is not None:
+            entry['error'] = type(error).__name__
+            message = redact_message(str(error))
+            # Never write a message the redactor could not clean; the error type is enough to replay
+            entry['message'] = entry['error'] if has_raw_literals(message) else message
+        else:
+            entry['status'] = response.status_code
+            content_type = response.headers.get('Content-Type', '')
+            entry['content_type'] = content_type
+            if 'json' in content_type:
+                try:
+                    entry['response'] = redact(response.json())
+                except ValueError:
+                    entry['response_text'] = ''
+            elif response.content:
+                entry['response_bytes'] = len(response.content)
+            limit_info = response.headers.get('Sforce-Limit-Info')
+            if limit_info:
+                entry['limit_info'] = limit_info
+
+        self._write(entry)
+        self.calls += 1
+
+    def close(self, meta=None):
+        if meta:
+            self._write({'type': 'session_end', 'meta': meta})
+        with self.lock:
+            self.file.close()
+
+
+class _Replayer:
+    """Serves captured responses back in order, queued per route key"""
+
+    def __init__(self, path, speed=1.0):
+        import gzip
+
+        self.path = path
+        self.speed = speed
+        self.meta = {}
+        self.queues = defaultdict(deque)
+        self.served = defaultdict(int)
+        self.missing = defaultdict(int)
+        self.recorded_wall_ms = 0.0
+        self.lock = threading.Lock()
+
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                if record['type'] == 'session':
+                    self.meta = record.get('meta', {})
+                elif record['type'] == 'session_end':
+                    self.meta.update(record.get('meta', {}))
+                elif record['type'] == 'call':
+                    self.queues[record['key']].append(record)
+                    self.recorded_wall_ms = max(self.recorded_wall_ms,
+                                                record['offset_ms'] + record['latency_ms'])
+
+    def serve(self, method, url, kwargs):
+        import requests
+
+        key = route_key(method, url, kwargs.get('params'))
+        with self.lock:
+            queue = self.queues.get(key)
+            record = queue.popleft() if queue else None
+            if record is None:
+                self.missing[key] += 1
+            else:
+                self.served[key] += 1
+
+        if record is None:
+            raise requests.exceptions.ConnectionError(f"Replay has no recorded response for {key}")
+
+        if self.speed:
+            time.sleep(record['latency_ms'] / 1000.0 / self.speed)
+
+        if record.get('error'):
+            error_class = getattr(requests.exceptions, record['error'], requests.exceptions.RequestException)
+            raise error_class(record.get('message', 'replayed error'))
+
+        response = requests.Response()
+        response.status_code = record['status']
+        response.url = url
+        response.reason = 'Replayed'
+        response.headers['Content-Type'] = record.get('content_type', 'application/json')
+        if 'response' in record:
+            response._content = json.dumps(record['response']).encode('utf-8')
+        else:
+            response._content = b''
+        response.encoding = 'utf-8'
+        return response
+
+    def remaining(self):
+        return sum(len(queue) for queue in self.queues.values())
+
+
+class _CompressionStats:
+    """Request body bytes before and after compression (thread safe)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.compressed = 0
+        self.raw_bytes = 0
+        self.sent_bytes = 0
+
+    def add(self, raw_bytes, sent_bytes):
+        with self.lock:
+            self.requests += 1
+            self.compressed += 1 if sent_bytes < raw_bytes else 0
+            self.raw_bytes += raw_bytes
+            self.sent_bytes += sent_bytes
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'compressed': self.compressed,
+                'raw_bytes': self.raw_bytes,
+                'sent_bytes': self.sent_bytes,
+                'bytes_saved': self.raw_bytes - self.sent_bytes
+            }
+
+
+_compression_stats = _CompressionStats()
+
+
+class _Coalescer:
+    """Single-flight map: the first caller for a key sends the request, concurrent callers
+    with the same key wait for it and receive its response (or its exception)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.coalesced = 0
+
+    def run(self, key, call):
+        with self.lock:
+            flight = self.inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.inflight[key] = {'done': threading.Event(), 'response': None, 'error': None}
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight['done'].wait()
+            if flight['error'] is not None:
+                raise flight['error']
+            return flight['response']
+        try:
+            flight['response'] = call()
+            return flight['response']
+        except BaseException as e:
+            flight['error'] = e
+            raise
+        finally:
+            with self.lock:
+                del self.inflight[key]
+            flight['done'].set()
+
+
+_coalescer = _Coalescer()
+
+
+def set_coalescing(enabled=True):
+    """Share one in-flight response between concurrent identical GETs (on by default)"""
+    global _coalesce_reads
+    _coalesce_reads = enabled
+
+
+def coalesced_requests():
+    """Number of GETs answered by another caller's in-flight request since import"""
+    return _coalescer.coalesced
+
+
+def _coalesce_key(method, url, kwargs):
+    """Key for an idempotent read that may share a response, or None"""
+    if method.upper() != 'GET' or not _coalesce_reads or kwargs.get('stream'):
+        return None
+    params = kwargs.get('params') or {}
+    items = params.items() if isinstance(params, dict) else params
+    try:
+        return (url, tuple(sorted(items)), (kwargs.get('headers') or {}).get('Authorization'))
+    except TypeError:
+        return None
+
+
+def set_compression(min_bytes=GZIP_MIN_BYTES):
+    """Compress request bodies of at least min_bytes; None disables compression"""
+    global _compression_min_bytes
+    _compression_min_bytes = min_bytes
+
+
+def compression_stats():
+    """Request bodies sent since the last reset: requests, compressed, raw_bytes, sent_bytes, bytes_saved"""
+    return _compression_stats.snapshot()
+
+
+def reset_compression_stats():
+    _compression_stats.reset()
+
+
+def format_bytes_saved(stats=None):
+    """One-line summary of compression_stats(), e.g. '1.2 MB of 1.6 MB (75%), 12 of 14 requests'"""
+    stats = stats or compression_stats()
+    if not stats['raw_bytes']:
+        return "0 B (no request bodies)"
+    percent = stats['bytes_saved'] * 100 / stats['raw_bytes']
+    return (f"{_format_size(stats['bytes_saved'])} of {_format_size(stats['raw_bytes'])} ({percent:.0f}%), "
+            f"{stats['compressed']} of {stats['requests']} requests compressed")
+
+
+def _format_size(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024 or unit == 'MB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def _compress_body(kwargs):
+    """Return the send kwargs with a JSON or raw body gzip-compressed when it is large enough.
+    Form bodies (dicts, used for OAuth) are left alone and not counted."""
+    if kwargs.get('json') is not None:
+        body = json.dumps(kwargs['json'], separators=(',', ':'), allow_nan=False).encode('utf-8')
+        content_type = 'application/json'
+    elif isinstance(kwargs.get('data'), (bytes, str)):
+        body = kwargs['data'].encode('utf-8') if isinstance(kwargs['data'], str) else kwargs['data']
+        content_type = None
+    else:
+        return kwargs
+
+    sent = body
+    if _compression_min_bytes is not None and len(body) >= _compression_min_bytes:
+        import gzip
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        if len(compressed) < len(body):
+            sent = compressed
+    _compression_stats.add(len(body), len(sent))
+
+    headers = dict(kwargs.get('headers') or {})
+    if content_type and not any(key.lower() == 'content-type' for key in headers):
+        headers['Content-Type'] = content_type
+    if sent is not body:
+        headers['Content-Encoding'] = 'gzip'
+    send_kwargs = {key: value for key, value in kwargs.items() if key != 'json'}
+    send_kwargs.update(headers=headers, data=sent)
+    return send_kwargs
+
+
+def _circuit_open_class():
+    global _circuit_open_error
+    if _circuit_open_error is None:
+        import requests
+
+        class CircuitOpenError(requests.exceptions.ConnectionError):
+            """The breaker is open: the call was not sent"""
+
+            def __init__(self, state):
+                self.state = state
+                super().__init__(format_breaker(state))
+
+        _circuit_open_error = CircuitOpenError
+    return _circuit_open_error
+
+
+class _CircuitBreaker:
+    """CLOSED until threshold consecutive failures, then OPEN (calls short-circuit) until the
+    cooldown has passed; the next call is the HALF_OPEN probe, whose outcome closes or re-opens it.
+    A probe that never reports back (e.g. a local error) is replaced after another cooldown."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.threshold = BREAKER_FAILURE_THRESHOLD
+        self.cooldown = BREAKER_COOLDOWN_SECONDS
+        self.listener = None
+        self.restore(None)
+
+    def restore(self, state):
+        state = state or {}
+        with self.lock:
+            # A probe that was in flight elsewhere counts as not sent; the cooldown decides again
+            self.state = 'OPEN' if state.get('state') in ('OPEN', 'HALF_OPEN') else 'CLOSED'
+            self.failures = int(state.get('failures') or 0)
+            self.opened_at = float(state.get('opened_at') or 0) if self.state == 'OPEN' else None
+            self.last_error = state.get('last_error')
+
+    def _snapshot(self):
+        retry_in = None
+        if self.state != 'CLOSED':
+            retry_in = max(0.0, self.opened_at + self.cooldown - time.time())
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'opened_at': self.opened_at,
+            'last_error': self.last_error,
+            'retry_in': retry_in
+        }
+
+    def snapshot(self):
+        with self.lock:
+            return self._snapshot()
+
+    def is_open(self):
+        with self.lock:
+            return (self.threshold is not None and self.state != 'CLOSED'
+                    and time.time() - self.opened_at < self.cooldown)
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may be sent now"""
+        with self.lock:
+            if self.threshold is None or self.state == 'CLOSED':
+                return
+            if time.time() - self.opened_at >= self.cooldown:
+                # opened_at now marks the probe's start
+                self.state, self.opened_at = 'HALF_OPEN', time.time()
+                return
+            state = self._snapshot()
+        raise _circuit_open_class()(state)
+
+    def record(self, error=None):
+        """Count a call's outcome; error is a short description for a failure, None for success"""
+        with self.lock:
+            if error is None:
+                if self.state == 'CLOSED' and not self.failures:
+                    return
+                self.state, self.failures, self.opened_at, self.last_error = 'CLOSED', 0, None, None
+            else:
+                self.failures += 1
+                self.last_error = error[:500]
+                if self.state == 'HALF_OPEN' or (self.threshold is not None and self.failures >= self.threshold):
+                    self.state, self.opened_at = 'OPEN', time.time()
+            state, listener = self._snapshot(), self.listener
+        if listener is not None:
+            listener(state)
+
+
+_breaker = _CircuitBreaker()
+
+
+def set_circuit_breaker(threshold=BREAKER_FAILURE_THRESHOLD, cooldown_seconds=BREAKER_COOLDOWN_SECONDS):
+    """Consecutive failures that open the breaker (None disables it) and seconds before a probe"""
+    _breaker.threshold = threshold
+    _breaker.cooldown = cooldown_seconds
+
+
+def breaker_state():
+    """state (CLOSED, OPEN, HALF_OPEN), failures, opened_at (epoch), last_error, retry_in (seconds)"""
+    return _breaker.snapshot()
+
+
+def restore_breaker(state):
+    """Load a breaker_state() saved elsewhere (None resets to CLOSED)"""
+    _breaker.restore(state)
+
+
+def set_breaker_listener(listener):
+    """listener(breaker_state()) after every change in state or failure count; None disables"""
+    _breaker.listener = listener
+
+
+def breaker_open():
+    """True while calls are being short-circuited"""
+    return _breaker.is_open()
+
+
+def format_breaker(state=None):
+    """One-line description of the breaker, e.g. for an error result"""
+    state = state or breaker_state()
+    if state['state'] == 'CLOSED':
+        return f"Salesforce circuit closed ({state['failures']} consecutive failure(s))"
+    if state['state'] == 'HALF_OPEN':
+        return f"Salesforce circuit half-open, probe in flight (last error: {state['last_error']})"
+    return (f"Salesforce circuit open after {state['failures']} consecutive failure(s) "
+            f"(last error: {state['last_error']}); next probe in {state['retry_in']:.0f}s")
+
+
+def set_token_refresher(refresh):
+    """refresh(stale_access_token) -> new access token, called once per rejected token; None disables"""
+    global _token_refresher
+    with _token_lock:
+        _token_refresher = refresh
+        _replaced_tokens.clear()
+
+
+def _bearer_token(kwargs):
+    authorization = (kwargs.get('headers') or {}).get('Authorization', '')
+    return authorization[len('Bearer '):] if authorization.startswith('Bearer ') else None
+
+
+def _with_token(kwargs, access_token):
+    return dict(kwargs, headers=dict(kwargs['headers'], Authorization=f'Bearer {access_token}'))
+
+
+def _authorize(kwargs):
+    """Replace a token that was already refreshed after a 401"""
+    stale = _bearer_token(kwargs)
+    replacement = _replaced_tokens.get(stale) if stale else None
+    return _with_token(kwargs, replacement) if replacement else kwargs
+
+
+def _refreshed(kwargs):
+    """Send kwargs with a new token after a 401, or None when there is nothing to refresh"""
+    stale = _bearer_token(kwargs)
+    if stale is None or _token_refresher is None:
+        return None
+    with _token_lock:
+        if stale not in _replaced_tokens:
+            _replaced_tokens[stale] = _token_refresher(stale)
+        replacement = _replaced_tokens[stale]
+    return _with_token(kwargs, replacement) if replacement and replacement != stale else None
+
+
+def start_capture(path, **meta):
+    """Start recording all calls made through this module to a gzip JSONL file"""
+    global _capture
+    stop_capture()
+    _capture = _CaptureWriter(path, meta)
+    return _capture
+
+
+def stop_capture(**meta):
+    """Stop recording and flush the capture file; returns the number of calls recorded.
+    meta known only at the end of the run (e.g. contacts read from a stream) is added to the session's."""
+    global _capture
+    if _capture is None:
+        return 0
+    calls = _capture.calls
+    _capture.close(meta)
+    _capture = None
+    return calls
+
+
+def start_replay(path, speed=1.0):
+    """Serve all calls from a capture file instead of the network.
+    speed=1.0 keeps original latencies, speed=10 replays 10x faster, speed=0 disables pacing."""
+    global _replay
+    _replay = _Replayer(path, speed)
+    return _replay
+
+
+def stop_replay():
+    """Return to live network calls"""
+    global _replay
+    _replay = None
+
+
+def request(method, url, **kwargs):
+    """Issue an HTTP request (or serve it from a replay file), capturing it when enabled"""
+    if _replay is not None:
+        return _replay.serve(method, url, kwargs)
+
+    import requests
+
+    send_kwargs = _compress_body(_authorize(kwargs))
+    send_kwargs.setdefault('timeout', REQUEST_TIMEOUT)
+    key = _coalesce_key(method, url, send_kwargs)
+    if key is not None:
+        return _coalescer.run(key, lambda: _send_authorized(requests, method, url, kwargs, send_kwargs))
+    return _send_authorized(requests, method, url, kwargs, send_kwargs)
+
+
+def _send_authorized(requests, method, url, kwargs, send_kwargs):
+    response = _send(requests, method, url, kwargs, send_kwargs)
+    if response.status_code == 401:
+        retry_kwargs = _refreshed(send_kwargs)
+        if retry_kwargs is not None:
+            response = _send(requests, method, url, kwargs, retry_kwargs)
+    return response
+
+
+def _host(url):
+    from urllib.parse import urlsplit
+
+    return urlsplit(url).netloc or url.split('/', 1)[0]
+
+
+def _send(requests, method, url, kwargs, send_kwargs):
+    _breaker.before_call()
+    started = time.perf_counter()
+    try:
+        response = requests.request(method, url, **send_kwargs)
+    except requests.exceptions.RequestException as e:
+        if _capture is not None:
+            _capture.record(method, url, kwargs, None, started, (time.perf_counter() - started) * 1000, error=e)
+        if isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            # The message repeats the URL, whose path or SOQL may hold patient data; the breaker state is
+            # persisted and echoed in results, so it keeps only the exception type and host
+            _breaker.record(f"{type(e).__name__} ({_host(url)})")
+        raise
+
+    _breaker.record(f"HTTP {response.status_code}" if response.status_code >= 500 else None)
+    if _capture is not None:
+        _capture.record(method, url, kwargs, response, started, (time.perf_counter() - started) * 1000)
+    return response
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def patch(url, **kwargs):
+    return request('PATCH', url, **kwargs)
+
+
+def put(url, **kwargs):
+    return request('PUT', url, **kwargs)
+
+
+def delete(url, **kwargs):
+    return request('DELETE', url, **kwargs)
@@ -2,49 +2,33 @@
 """
 Comprehensive Salesforce Connection Test Script
 Tests all aspects of Salesforce connectivity and API access
+
+--concurrent runs the checks that only need the token (org query, Contact and Campaign
+describes) in parallel, fetches both describes with one Composite Batch request, creates
+the sample records in parallel and deletes them with one sObject Collections call.
 """
 
-import os
+import argparse
 import sys
-import requests
-import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from sfclient import API_VERSION, auth, batch, config, transport
+
 def load_env_variables():
     """Load environment variables from .env file"""
     # Check parent directory first, then current directory
-    env_file = '../.env' if os.path.exists('../.env') else '.env'
-    if not os.path.exists(env_file):
+    env_file = config.find_env_file()
+    if env_file is None:
         print("❌ Error: .env file not found")
         print("📋 Please copy env_template.txt to .env and add your credentials")
         print("   Expected locations: ../.env or ./.env")
         return None
     
-    env_vars = {}
-    with open(env_file, 'r') as f:
-        for line_number, line in enumerate(f, 1):
-            line = line.strip()
-            # Skip empty lines and comments
-            if not line or line.startswith('#'):
-                continue
-            # Check if line contains an equals sign
-            if '=' not in line:
-                print(f"⚠️  Warning: Skipping malformed line {line_number}: '{line}'")
-                continue
-            # Split only on the first equals sign
-            key, value = line.split('=', 1)
-            key = key.strip()
-            value = value.strip()
-            # Skip if key is empty
-            if not key:
-                print(f"⚠️  Warning: Skipping line {line_number} with empty key")
-                continue
-            # Strip quotes if present
-            value = value.strip('"\'')
-            env_vars[key] = value
+    env_vars = config.parse_env_file(env_file)
     
-    required_vars = ['SALESFORCE_CLIENT_ID', 'SALESFORCE_CLIENT_SECRET', 'SALESFORCE_DEV_URL']
-    missing_vars = [var for var in required_vars if var not in env_vars]
+    missing_vars = [var for var in config.REQUIRED_VARS if var not in env_vars]
     
     if missing_vars:
         print(f"❌ Error: Missing required environment variables: {', '.join(missing_vars)}")
@@ -56,16 +40,8 @@ def test_oauth_token(client_id, client_secret, instance_url):
     """Test OAuth token retrieval"""
     print("🔍 Testing OAuth 2.0 Token Retrieval...")
     
-    token_url = f"{instance_url}/services/oauth2/token"
-    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-    data = {
-        'grant_type': 'client_credentials',
-        'client_id': client_id,
-        'client_secret': client_secret
-    }
-    
     try:
-        response = requests.post(token_url, headers=headers, data=data)
+        response = auth.request_token(client_id, client_secret, instance_url)
         if response.status_code == 200:
             token_data = response.json()
             print("✅ OAuth token retrieved successfully")
@@ -85,36 +61,41 @@ def test_api_connectivity(access_token, instance_url):
     """Test basic API connectivity"""
     print("\n🔍 Testing Salesforce API Connectivity...")
     
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
-    
     # Test 1: Get organization info
     try:
-        org_url = f"{instance_url}/services/data/v58.0/query"
-        params = {'q': 'SELECT Id, Name, OrganizationType FROM Organization LIMIT 1'}
-        
-        response = requests.get(org_url, headers=headers, params=params)
-        if response.status_code == 200:
-            org_data = response.json()
-            if org_data['records']:
-                org_info = org_data['records'][0]
-                print("✅ API connectivity successful")
-                print(f"   Organization: {org_info.get('Name', 'N/A')}")
-                print(f"   Org Type: {org_info.get('OrganizationType', 'N/A')}")
-                print(f"   Org ID: {org_info.get('Id', 'N/A')}")
-                return True
-        
-        print(f"❌ API connectivity failed")
-        print(f"   Status Code: {response.status_code}")
-        print(f"   Error: {response.text}")
-        return False
+        response = query_org_info(access_token, instance_url)
+        return report_api_connectivity(response.status_code,
+                                       response.json() if response.status_code == 200 else response.text)
         
     except Exception as e:
         print(f"❌ API connectivity exception: {str(e)}")
         return False
 
+def query_org_info(access_token, instance_url):
+    """Query the organization record; returns the raw response"""
+    headers = {
+        'Authorization': f'Bearer {access_token}',
+        'Content-Type': 'application/json'
+    }
+    org_url = f"{instance_url}/services/data/v58.0/query"
+    params = {'q': 'SELECT Id, Name, OrganizationType FROM Organization LIMIT 1'}
+    return transport.get(org_url, headers=headers, params=params)
+
+def report_api_connectivity(status_code, body):
+    """Print the organization query result; body is the parsed JSON on 200, else the error"""
+    if status_code == 200 and body['records']:
+        org_info = body['records'][0]
+        print("✅ API connectivity successful")
+        print(f"   Organization: {org_info.get('Name', 'N/A')}")
+        print(f"   Org Type: {org_info.get('OrganizationType', 'N/A')}")
+        print(f"   Org ID: {org_info.get('Id', 'N/A')}")
+        return True
+    
+    print(f"❌ API connectivity failed")
+    print(f"   Status Code: {status_code}")
+    print(f"   Error: {body}")
+    return False
+
 def test_contact_object_access(access_token, instance_url):
     """Test Contact object access and custom fields"""
     print("\n🔍 Testing Contact Object Access...")
@@ -127,37 +108,40 @@ def test_contact_object_access(access_token, instance_url):
     try:
         # Test Contact object describe
         describe_url = f"{instance_url}/services/data/v58.0/sobjects/Contact/describe"
-        response = requests.get(describe_url, headers=headers)
-        
-        if response.status_code == 200:
-            contact_desc = response.json()
-            print("✅ Contact object access successful")
-            
-            # Check for patient_id__c field
-            fields = {field['name']: field for field in contact_desc['fields']}
-            
-            if 'patient_id__c' in fields:
-                patient_field = fields['patient_id__c']
-                print("✅ patient_id__c custom field found")
-                print(f"   Type: {patient_field.get('type', 'N/A')}")
-                print(f"   Required: {patient_field.get('nillable', True) == False}")
-                print(f"   Unique: {patient_field.get('unique', False)}")
-            else:
-                print("⚠️  patient_id__c custom field NOT found")
-                print("   This field is required for the integration")
-                print("   Please create it following the setup guide")
-            
-            return True
-        else:
-            print(f"❌ Contact object access failed")
-            print(f"   Status Code: {response.status_code}")
-            print(f"   Error: {response.text}")
-            return False
+        response = transport.get(describe_url, headers=headers)
+        return report_contact_object_access(response.status_code,
+                                            response.json() if response.status_code == 200 else response.text)
             
     except Exception as e:
         print(f"❌ Contact object access exception: {str(e)}")
         return False
 
+def report_contact_object_access(status_code, body):
+    """Print the Contact describe result; body is the parsed JSON on 200, else the error"""
+    if status_code == 200:
+        print("✅ Contact object access successful")
+        
+        # Check for patient_id__c field
+        fields = {field['name']: field for field in body['fields']}
+        
+        if 'patient_id__c' in fields:
+            patient_field = fields['patient_id__c']
+            print("✅ patient_id__c custom field found")
+            print(f"   Type: {patient_field.get('type', 'N/A')}")
+            print(f"   Required: {patient_field.get('nillable', True) == False}")
+            print(f"   Unique: {patient_field.get('unique', False)}")
+        else:
+            print("⚠️  patient_id__c custom field NOT found")
+            print("   This field is required for the integration")
+            print("   Please create it following the setup guide")
+        
+        return True
+    else:
+        print(f"❌ Contact object access failed")
+        print(f"   Status Code: {status_code}")
+        print(f"   Error: {body}")
+        return False
+
 def test_campaign_object_access(access_token, instance_url):
     """Test Campaign object access"""
     print("\n🔍 Testing Campaign Object Access...")
@@ -170,26 +154,50 @@ def test_campaign_object_access(access_token, instance_url):
     try:
         # Test Campaign object describe
         describe_url = f"{instance_url}/services/data/v58.0/sobjects/Campaign/describe"
-        response = requests.get(describe_url, headers=headers)
-        
-        if response.status_code == 200:
-            campaign_desc = response.json()
-            print("✅ Campaign object access successful")
-            print(f"   Creatable: {campaign_desc.get('createable', False)}")
-            print(f"   Updateable: {campaign_desc.get('updateable', False)}")
-            return True
-        else:
-            print(f"❌ Campaign object access failed")
-            print(f"   Status Code: {response.status_code}")
-            print(f"   Error: {response.text}")
-            return False
+        response = transport.get(describe_url, headers=headers)
+        return report_campaign_object_access(response.status_code,
+                                             response.json() if response.status_code == 200 else response.text)
             
     except Exception as e:
         print(f"❌ Campaign object access exception: {str(e)}")
         return False
 
-def test_create_sample_data(access_token, instance_url):
-    """Test creating sample contact and campaign"""
+def report_campaign_object_access(status_code, body):
+    """Print the Campaign describe result; body is the parsed JSON on 200, else the error"""
+    if status_code == 200:
+        print("✅ Campaign object access successful")
+        print(f"   Creatable: {body.get('createable', False)}")
+        print(f"   Updateable: {body.get('updateable', False)}")
+        return True
+    else:
+        print(f"❌ Campaign object access failed")
+        print(f"   Status Code: {status_code}")
+        print(f"   Error: {body}")
+        return False
+
+def sample_records():
+    """(object type, sObject, record data) for the test contact and campaign"""
+    test_patient_id = 999999  # Use high number to avoid conflicts
+    contact_data = {
+        "FirstName": "Test",
+        "LastName": "ConnectionPatient",
+        "Email": f"test.connection.{datetime.now().strftime('%Y%m%d%H%M%S')}@healthcaretest.com",
+        "patient_id__c": test_patient_id,
+        "Title": "Test Patient",
+        "Description": f"Test contact created by connection test on {datetime.now()}"
+    }
+    campaign_data = {
+        "Name": f"Connection Test Campaign {datetime.now().strftime('%Y%m%d%H%M%S')}",
+        "IsActive": True,
+        "Status": "In Progress",
+        "Type": "Other",
+        "Description": f"Test campaign created by connection test on {datetime.now()}"
+    }
+    return [('contact', 'Contact', contact_data), ('campaign', 'Campaign', campaign_data)]
+
+def test_create_sample_data(access_token, instance_url, parallel=False, timings=None):
+    """Test creating sample contact and campaign (at the same time when parallel).
+    When timings is a list, (check name, seconds) is appended for each record."""
     print("\n🔍 Testing Sample Data Creation...")
     
     headers = {
@@ -197,73 +205,61 @@ def test_create_sample_data(access_token, instance_url):
         'Content-Type': 'application/json'
     }
     
-    test_results = []
-    
-    # Test 1: Create test contact
-    try:
-        test_patient_id = 999999  # Use high number to avoid conflicts
-        contact_data = {
-            "FirstName": "Test",
-            "LastName": "ConnectionPatient",
-            "Email": f"test.connection.{datetime.now().strftime('%Y%m%d%H%M%S')}@healthcaretest.com",
-            "patient_id__c": test_patient_id,
-            "Title": "Test Patient",
-            "Description": f"Test contact created by connection test on {datetime.now()}"
-        }
-        
-        create_url = f"{instance_url}/services/data/v58.0/sobjects/Contact"
-        response = requests.post(create_url, headers=headers, json=contact_data)
-        
-        if response.status_code == 201:
-            contact_result = response.json()
-            contact_id = contact_result['id']
-            print("✅ Test contact created successfully")
-            print(f"   Contact ID: {contact_id}")
-            test_results.append(('contact', contact_id))
-        else:
-            print(f"⚠️  Test contact creation failed")
-            print(f"   Status Code: {response.status_code}")
-            print(f"   Error: {response.text}")
-            
-    except Exception as e:
-        print(f"❌ Test contact creation exception: {str(e)}")
+    def create(record):
+        object_type, sobject, data = record
+        started = time.perf_counter()
+        try:
+            create_url = f"{instance_url}/services/data/v58.0/sobjects/{sobject}"
+            return transport.post(create_url, headers=headers, json=data)
+        except Exception as e:
+            return e
+        finally:
+            if timings is not None:
+                timings.append((f"Create Test {sobject}", time.perf_counter() - started))
+    
+    records = sample_records()
+    if parallel:
+        with ThreadPoolExecutor(max_workers=len(records)) as pool:
+            responses = list(pool.map(create, records))
+    else:
+        responses = [create(record) for record in records]
     
-    # Test 2: Create test campaign
-    try:
-        campaign_data = {
-            "Name": f"Connection Test Campaign {datetime.now().strftime('%Y%m%d%H%M%S')}",
-            "IsActive": True,
-            "Status": "In Progress",
-            "Type": "Other",
-            "Description": f"Test campaign created by connection test on {datetime.now()}"
-        }
-        
-        create_url = f"{instance_url}/services/data/v58.0/sobjects/Campaign"
-        response = requests.post(create_url, headers=headers, json=campaign_data)
-        
-        if response.status_code == 201:
-            campaign_result = response.json()
-            campaign_id = campaign_result['id']
-            print("✅ Test campaign created successfully")
-            print(f"   Campaign ID: {campaign_id}")
-            test_results.append(('campaign', campaign_id))
+    test_results = []
+    for (object_type, _, _), response in zip(records, responses):
+        if isinstance(response, Exception):
+            print(f"❌ Test {object_type} creation exception: {str(response)}")
+        elif response.status_code == 201:
+            record_id = response.json()['id']
+            print(f"✅ Test {object_type} created successfully")
+            print(f"   {object_type.capitalize()} ID: {record_id}")
+            test_results.append((object_type, record_id))
         else:
-            print(f"⚠️  Test campaign creation failed")
+            print(f"⚠️  Test {object_type} creation failed")
             print(f"   Status Code: {response.status_code}")
             print(f"   Error: {response.text}")
-            
-    except Exception as e:
-        print(f"❌ Test campaign creation exception: {str(e)}")
     
     return test_results
 
-def cleanup_test_data(access_token, instance_url, test_results):
-    """Clean up test data created during testing"""
+def cleanup_test_data(access_token, instance_url, test_results, batched=False):
+    """Clean up test data created during testing (one sObject Collections delete when batched)"""
     if not test_results:
         return
     
     print("\n🧹 Cleaning up test data...")
     
+    if batched:
+        try:
+            results = batch.delete_collection(access_token, instance_url,
+                                              [record_id for _, record_id in test_results])
+            for (object_type, record_id), (deleted, error) in zip(test_results, results):
+                if deleted:
+                    print(f"✅ Cleaned up test {object_type}: {record_id}")
+                else:
+                    print(f"⚠️  Failed to clean up test {object_type}: {record_id} ({error})")
+        except Exception as e:
+            print(f"❌ Cleanup exception: {str(e)}")
+        return
+    
     headers = {
         'Authorization': f'Bearer {access_token}',
         'Content-Type': 'application/json'
@@ -278,7 +274,7 @@ def cleanup_test_data(access_token, instance_url, test_results):
             else:
                 continue
             
-            response = requests.delete(delete_url, headers=headers)
+            response = transport.delete(delete_url, headers=headers)
             if response.status_code == 204:
                 print(f"✅ Cleaned up test {object_type}: {record_id}")
             else:
@@ -311,7 +307,96 @@ def print_summary(results):
         print(f"\n⚠️  {failed_tests} test(s) failed. Please review the issues above.")
         print("   Check the debugging section in README.md for solutions.")
 
-def main():
+def timed(function, *args):
+    """Call function; returns (result or the exception raised, seconds)"""
+    started = time.perf_counter()
+    try:
+        result = function(*args)
+    except Exception as e:
+        result = e
+    return result, time.perf_counter() - started
+
+def print_timings(timings, wall_seconds):
+    """Per-check times, their sum and the actual wall time"""
+    print("\n⏱️  CHECK TIMINGS")
+    for check_name, seconds in timings:
+        print(f"   {seconds:>7.2f}s  {check_name}")
+    total = sum(seconds for _, seconds in timings)
+    print("-" * 60)
+    print(f"   Sum of checks: {total:.2f}s")
+    print(f"   Wall time:     {wall_seconds:.2f}s ({total - wall_seconds:.2f}s saved by running checks concurrently)")
+
+def run_concurrent_checks(env_vars):
+    """Same checks as main(), with the independent ones run in parallel.
+    Returns (results, timings)."""
+    instance_url = env_vars['SALESFORCE_DEV_URL']
+    results = []
+    timings = []
+    
+    # The token is needed by everything else
+    access_token, seconds = timed(test_oauth_token, env_vars['SALESFORCE_CLIENT_ID'],
+                                  env_vars['SALESFORCE_CLIENT_SECRET'], instance_url)
+    timings.append(("OAuth Token Retrieval", seconds))
+    results.append(("OAuth Token Retrieval", isinstance(access_token, str)))
+    if not isinstance(access_token, str):
+        return results, timings
+    
+    # Org query and both describes (one Composite Batch request) only need the token
+    describe_paths = [f"{API_VERSION}/sobjects/Contact/describe", f"{API_VERSION}/sobjects/Campaign/describe"]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        org_future = pool.submit(timed, query_org_info, access_token, instance_url)
+        describe_future = pool.submit(timed, batch.composite_batch, access_token, instance_url, describe_paths)
+        org_response, org_seconds = org_future.result()
+        describes, describe_seconds = describe_future.result()
+    timings.append(("API Connectivity", org_seconds))
+    timings.append(("Contact + Campaign Describe (Composite Batch)", describe_seconds))
+    
+    print("\n🔍 Testing Salesforce API Connectivity...")
+    if isinstance(org_response, Exception):
+        print(f"❌ API connectivity exception: {str(org_response)}")
+        api_success = False
+    else:
+        api_success = report_api_connectivity(
+            org_response.status_code,
+            org_response.json() if org_response.status_code == 200 else org_response.text)
+    results.append(("API Connectivity", api_success))
+    
+    print("\n🔍 Testing Contact Object Access...")
+    if isinstance(describes, Exception):
+        print(f"❌ Contact object access exception: {str(describes)}")
+        contact_success = False
+    else:
+        contact_success = report_contact_object_access(*describes[0])
+    results.append(("Contact Object Access", contact_success))
+    
+    print("\n🔍 Testing Campaign Object Access...")
+    if isinstance(describes, Exception):
+        print(f"❌ Campaign object access exception: {str(describes)}")
+        campaign_success = False
+    else:
+        campaign_success = report_campaign_object_access(*describes[1])
+    results.append(("Campaign Object Access", campaign_success))
+    
+    # Sample data needs both objects; the contact and campaign are created in parallel
+    if api_success and contact_success and campaign_success:
+        test_results = test_create_sample_data(access_token, instance_url, parallel=True, timings=timings)
+        results.append(("Sample Data Creation", len(test_results) > 0))
+        
+        if test_results:
+            _, seconds = timed(cleanup_test_data, access_token, instance_url, test_results, True)
+            timings.append(("Cleanup (sObject Collections delete)", seconds))
+    
+    return results, timings
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Salesforce Connection Test")
+    parser.add_argument('--concurrent', action='store_true',
+                        help="run independent checks in parallel, batch the describes and the cleanup, "
+                             "and report wall time against the sum of the check times")
+    return parser.parse_args()
+
+def main(concurrent=False):
     """Main test execution"""
     print("🚀 SALESFORCE CONNECTION TEST STARTING")
     print("="*60)
@@ -330,6 +415,16 @@ def main():
     print(f"   Instance URL: {env_vars['SALESFORCE_DEV_URL']}")
     print(f"   Client ID: {env_vars['SALESFORCE_CLIENT_ID'][:10]}...")
     
+    if concurrent:
+        started = time.perf_counter()
+        results, timings = run_concurrent_checks(env_vars)
+        wall_seconds = time.perf_counter() - started
+        print_summary(results)
+        print_timings(timings, wall_seconds)
+        if not results[0][1]:
+            sys.exit(1)
+        return
+    
     # Test OAuth token
     access_token = test_oauth_token(
         env_vars['SALESFORCE_CLIENT_ID'],
@@ -368,4 +463,5 @@ def main():
     print_summary(results)
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(concurrent=args.concurrent)
@@ -36,20 +36,55 @@ USE SCHEMA DEMO_ASSETS;
 
 -- Cortex Search Services
 
--- Create full patient dataset (1.42M records)
-CREATE OR REPLACE TABLE CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENTS_FULL_SCALE
+-- Upgrading from the CREATE OR REPLACE TABLE version of this script? Drop the old search table once first,
+-- since a table cannot be replaced by a dynamic table or view of the same name:
+-- DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_SEARCH_OPTIMIZED;
+
+-- Full patient dataset (1.42M records). Loaded once; afterwards SYNC_PATIENTS_FULL_SCALE only rewrites
+-- changed rows, so the change-tracked copy feeds incremental refreshes downstream
+-- (the shared source itself has no change tracking).
+CREATE TABLE IF NOT EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENTS_FULL_SCALE
+CHANGE_TRACKING = TRUE
 COMMENT = 'LINEAGE: Full clone from SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.PATIENTS'
 AS SELECT * FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.PATIENTS;
 
--- Create optimized search table for high-cost patients  
-CREATE OR REPLACE TABLE CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_SEARCH_OPTIMIZED
-COMMENT = 'LINEAGE: Optimized search table derived from PATIENTS_FULL_SCALE (1.21M high-cost patients)'
+ALTER TABLE CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENTS_FULL_SCALE SET CHANGE_TRACKING = TRUE;
+
+-- Daily delta sync: drop rows that changed or disappeared upstream, insert new and changed rows
+CREATE OR REPLACE TASK CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SYNC_PATIENTS_FULL_SCALE
+  WAREHOUSE = CURWH_HEALTHCARE_DEMO_SMALL
+  SCHEDULE = 'USING CRON 0 6 * * * UTC'
+  COMMENT = 'Applies SILVER.PATIENTS changes to PATIENTS_FULL_SCALE without rewriting unchanged rows'
+AS
+BEGIN
+  BEGIN TRANSACTION;
+  DELETE FROM CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENTS_FULL_SCALE t
+  WHERE NOT EXISTS (
+    SELECT 1 FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.PATIENTS s
+    WHERE s.PATIENT_ID = t.PATIENT_ID AND HASH(s.*) = HASH(t.*)
+  );
+  INSERT INTO CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENTS_FULL_SCALE
+  SELECT s.*
+  FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.PATIENTS s
+  LEFT JOIN CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENTS_FULL_SCALE t ON t.PATIENT_ID = s.PATIENT_ID
+  WHERE t.PATIENT_ID IS NULL;
+  COMMIT;
+END;
+
+ALTER TASK CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SYNC_PATIENTS_FULL_SCALE RESUME;
+
+-- Search rows for every patient in one pass (replaces the two UNION ALL branches behind
+-- PATIENT_SEARCH_MAXIMUM_SCALE). No AGE column: it depends on CURRENT_DATE, which would force full refreshes.
+CREATE OR REPLACE DYNAMIC TABLE CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_SEARCH_ALL
+  TARGET_LAG = '1 day'
+  WAREHOUSE = CURWH_HEALTHCARE_DEMO_SMALL
+  REFRESH_MODE = INCREMENTAL
+  COMMENT = 'LINEAGE: Search rows for all patients derived from PATIENTS_FULL_SCALE (1.42M patients)'
 AS
 SELECT
   PATIENT_ID,
   FIRST || ' ' || LAST as FULL_NAME,
-  FIRST, LAST, CITY, STATE, BIRTHDATE,
-  DATEDIFF('year', BIRTHDATE, '2024-09-19'::DATE) as AGE,
+  FIRST, LAST, CITY, STATE, BIRTHDATE, GENDER,
   HEALTHCARE_EXPENSES, HEALTHCARE_COVERAGE,
   (HEALTHCARE_EXPENSES + HEALTHCARE_COVERAGE) as TOTAL_COST,
   CASE
@@ -57,50 +92,53 @@ SELECT
     WHEN (HEALTHCARE_EXPENSES + HEALTHCARE_COVERAGE) > 1000000 THEN 'MILLION+'
     WHEN (HEALTHCARE_EXPENSES + HEALTHCARE_COVERAGE) > 500000 THEN 'CRITICAL'
     WHEN (HEALTHCARE_EXPENSES + HEALTHCARE_COVERAGE) > 100000 THEN 'HIGH'
-    ELSE 'MODERATE'
+    WHEN (HEALTHCARE_EXPENSES + HEALTHCARE_COVERAGE) > 50000 THEN 'MODERATE'
+    ELSE 'LOW'
   END as COST_CATEGORY,
   FIRST || ' ' || LAST || ' ' || CITY || ' ' || STATE as SEARCH_TEXT,
   PREFIX || ' ' || FIRST || ' ' || LAST || ' ' || SUFFIX as FULL_DISPLAY_NAME
-FROM CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENTS_FULL_SCALE
-WHERE (HEALTHCARE_EXPENSES + HEALTHCARE_COVERAGE) > 50000;
+FROM CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENTS_FULL_SCALE;
+
+-- High-cost patients with AGE computed at query time, so it never goes stale
+CREATE OR REPLACE VIEW CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_SEARCH_OPTIMIZED
+COMMENT = 'LINEAGE: High-cost patients (1.21M) from PATIENT_SEARCH_ALL with current AGE'
+AS
+SELECT
+  PATIENT_ID, FULL_NAME,
+  FIRST, LAST, CITY, STATE, BIRTHDATE,
+  DATEDIFF('year', BIRTHDATE, CURRENT_DATE()) as AGE,
+  HEALTHCARE_EXPENSES, HEALTHCARE_COVERAGE, TOTAL_COST,
+  COST_CATEGORY, SEARCH_TEXT, FULL_DISPLAY_NAME, GENDER
+FROM CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_SEARCH_ALL
+WHERE COST_CATEGORY <> 'LOW';
 
 
 -- 3.2 Cortex Search Services
+-- Both index PATIENT_SEARCH_ALL, so index refreshes pick up its deltas instead of re-scanning.
+-- BIRTHDATE replaces the stored AGE attribute; filter on birthdate ranges for age cohorts.
 -- Search Service 1: High-Cost Patients (1.21M records)
-CREATE CORTEX SEARCH SERVICE CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_SEARCH_FULL_SCALE
+CREATE OR REPLACE CORTEX SEARCH SERVICE CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_SEARCH_FULL_SCALE
 ON SEARCH_TEXT
-ATTRIBUTES PATIENT_ID, FULL_NAME, CITY, STATE, TOTAL_COST, COST_CATEGORY, AGE
+ATTRIBUTES PATIENT_ID, FULL_NAME, CITY, STATE, TOTAL_COST, COST_CATEGORY, BIRTHDATE
 WAREHOUSE = CURWH_HEALTHCARE_DEMO_SMALL
-TARGET_LAG = '30 days'
+TARGET_LAG = '1 day'
 COMMENT = 'Full-scale patient search on high-cost patients'
 AS (
-  SELECT PATIENT_ID, SEARCH_TEXT, FULL_NAME, CITY, STATE, TOTAL_COST, COST_CATEGORY, AGE
-  FROM CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_SEARCH_OPTIMIZED
+  SELECT PATIENT_ID, SEARCH_TEXT, FULL_NAME, CITY, STATE, TOTAL_COST, COST_CATEGORY, BIRTHDATE
+  FROM CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_SEARCH_ALL
+  WHERE COST_CATEGORY <> 'LOW'
 );
 
 -- Search Service 2: Maximum Scale (1.42M records)  
-CREATE CORTEX SEARCH SERVICE CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_SEARCH_MAXIMUM_SCALE
+CREATE OR REPLACE CORTEX SEARCH SERVICE CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_SEARCH_MAXIMUM_SCALE
 ON SEARCH_TEXT
-ATTRIBUTES PATIENT_ID, FULL_NAME, CITY, STATE, TOTAL_COST, COST_CATEGORY, AGE, GENDER
+ATTRIBUTES PATIENT_ID, FULL_NAME, CITY, STATE, TOTAL_COST, COST_CATEGORY, BIRTHDATE, GENDER
 WAREHOUSE = CURWH_HEALTHCARE_DEMO_SMALL
-TARGET_LAG = '30 days'
+TARGET_LAG = '1 day'
 COMMENT = 'Maximum scale search across all patients'
 AS (
   SELECT 
-    PATIENT_ID, SEARCH_TEXT, FULL_NAME, CITY, STATE, TOTAL_COST, COST_CATEGORY, AGE, GENDER
-  FROM CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_SEARCH_OPTIMIZED
-  UNION ALL
-  SELECT
-    PATIENT_ID,
-    FIRST || ' ' || LAST || ' ' || CITY || ' ' || STATE as SEARCH_TEXT,
-    FIRST || ' ' || LAST as FULL_NAME,
-    CITY, STATE,
-    HEALTHCARE_EXPENSES + HEALTHCARE_COVERAGE as TOTAL_COST,
-    'LOW' as COST_CATEGORY,
-    DATEDIFF('year', BIRTHDATE, '2024-09-19'::DATE) as AGE,
-    GENDER
-  FROM CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENTS_FULL_SCALE
-  WHERE (HEALTHCARE_EXPENSES + HEALTHCARE_COVERAGE) <= 50000
+    PATIENT_ID, SEARCH_TEXT, FULL_NAME, CITY, STATE, TOTAL_COST, COST_CATEGORY, BIRTHDATE, GENDER
+  FROM CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_SEARCH_ALL
 );
 
-
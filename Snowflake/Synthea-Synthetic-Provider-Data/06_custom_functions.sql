@@ -27,34 +27,99 @@ USE DATABASE CUR_SYNTHETIC_HEALTHCARE;
 USE SCHEMA DEMO_ASSETS;
 
 
+-- ==============================================================================
+-- SECTION 2: PRECOMPUTED PATIENT ROLLUPS
+-- ==============================================================================
+
+-- One row per patient with encounter/condition counts and cost tier, so the patient functions
+-- do a single-row point read instead of aggregating ENCOUNTERS and CONDITIONS on every call.
+-- The sources are shared tables and COUNT(DISTINCT) is not incremental, so REFRESH_MODE = AUTO
+-- resolves to a full refresh; TARGET_LAG bounds how often that happens.
+CREATE OR REPLACE DYNAMIC TABLE PATIENT_ROLLUPS
+  TARGET_LAG = '1 day'
+  WAREHOUSE = CURWH_HEALTHCARE_DEMO_SMALL
+  REFRESH_MODE = AUTO
+  CLUSTER BY (PATIENT_ID)
+  COMMENT = 'LINEAGE: Per-patient encounter/condition counts and cost tier from SILVER.PATIENTS, ENCOUNTERS, CONDITIONS'
+AS
+SELECT
+  p.PATIENT_ID,
+  p.FIRST, p.LAST, p.GENDER, p.CITY, p.STATE, p.BIRTHDATE,
+  p.HEALTHCARE_EXPENSES, p.HEALTHCARE_COVERAGE,
+  (p.HEALTHCARE_EXPENSES + p.HEALTHCARE_COVERAGE) as TOTAL_COST,
+  COALESCE(e.encounter_count, 0) as ENCOUNTER_COUNT,
+  COALESCE(c.condition_count, 0) as CONDITION_COUNT,
+  CASE 
+    WHEN (p.HEALTHCARE_EXPENSES + p.HEALTHCARE_COVERAGE) > 1000000 THEN 'MILLION+'
+    WHEN (p.HEALTHCARE_EXPENSES + p.HEALTHCARE_COVERAGE) > 500000 THEN 'CRITICAL'
+    WHEN (p.HEALTHCARE_EXPENSES + p.HEALTHCARE_COVERAGE) > 100000 THEN 'HIGH'
+    ELSE 'MODERATE'
+  END as RISK_LEVEL
+FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.PATIENTS p
+LEFT JOIN (
+  SELECT PATIENT_ID, COUNT(*) as encounter_count 
+  FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.ENCOUNTERS 
+  GROUP BY PATIENT_ID
+) e ON p.PATIENT_ID = e.PATIENT_ID
+LEFT JOIN (
+  SELECT PATIENT_ID, COUNT(DISTINCT CONDITION_ID) as condition_count
+  FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.CONDITIONS
+  GROUP BY PATIENT_ID  
+) c ON p.PATIENT_ID = c.PATIENT_ID;
+
+-- Per-patient condition list, maintained by Snowflake instead of a LISTAGG scan per call.
+-- AUTO uses incremental refresh when the source supports change tracking, full refresh otherwise.
+CREATE OR REPLACE DYNAMIC TABLE PATIENT_CONDITION_LISTS
+  TARGET_LAG = '1 day'
+  WAREHOUSE = CURWH_HEALTHCARE_DEMO_SMALL
+  REFRESH_MODE = AUTO
+  CLUSTER BY (PATIENT_ID)
+  COMMENT = 'LINEAGE: Distinct condition descriptions per patient from SILVER.CONDITIONS'
+AS
+SELECT
+  c.PATIENT_ID,
+  LISTAGG(DISTINCT c.DESCRIPTION, '; ') WITHIN GROUP (ORDER BY c.DESCRIPTION) as CONDITIONS,
+  COUNT(DISTINCT c.DESCRIPTION) as CONDITION_DESCRIPTION_COUNT
+FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.CONDITIONS c
+GROUP BY c.PATIENT_ID;
+
 -- ==============================================================================
 -- SECTION 3: AI-POWERED PATIENT INSIGHTS FUNCTION
 -- ==============================================================================
 
--- Create function that generates AI insights using Cortex Complete
-CREATE OR REPLACE FUNCTION GENERATE_PATIENT_INSIGHTS(PATIENT_ID NUMBER)
+-- Prompt sent to Cortex Complete; shared with the insights cache (22_proc__patient_insights_cache.sql),
+-- which hashes it so a change in the patient's cost or demographics invalidates cached insights
+CREATE OR REPLACE FUNCTION PATIENT_INSIGHTS_PROMPT(INPUT_PATIENT_ID NUMBER)
 RETURNS STRING
 LANGUAGE SQL
-COMMENT = 'Generates AI-powered care management insights using Cortex Complete'
+COMMENT = 'Builds the care management prompt used by GENERATE_PATIENT_INSIGHTS'
 AS
 $$
-  SELECT SNOWFLAKE.CORTEX.COMPLETE(
-    'snowflake-arctic',
+  SELECT 
     'Analyze this healthcare patient data and provide care management insights: Patient ' || 
     p.FIRST || ' ' || p.LAST || 
     ', Age ' || DATEDIFF('year', p.BIRTHDATE, CURRENT_DATE()) || 
     ', Total Healthcare Costs: $' || TO_CHAR(p.HEALTHCARE_EXPENSES + p.HEALTHCARE_COVERAGE, '999,999,999') ||
     ', Gender: ' || p.GENDER || 
     '. Provide 3 specific recommendations for care management and cost reduction.'
-  )
   FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.PATIENTS p 
-  WHERE p.PATIENT_ID = PATIENT_ID
+  WHERE p.PATIENT_ID = INPUT_PATIENT_ID
+$$;
+
+-- Create function that generates AI insights using Cortex Complete
+CREATE OR REPLACE FUNCTION GENERATE_PATIENT_INSIGHTS(PATIENT_ID NUMBER)
+RETURNS STRING
+LANGUAGE SQL
+COMMENT = 'Generates AI-powered care management insights using Cortex Complete'
+AS
+$$
+  SELECT SNOWFLAKE.CORTEX.COMPLETE('snowflake-arctic', PATIENT_INSIGHTS_PROMPT(PATIENT_ID))
 $$;
 
 -- ==============================================================================
 -- SECTION 4: PATIENT SUMMARY FUNCTION
 -- ==============================================================================
--- Create comprehensive patient summary function
+-- Create comprehensive patient summary function (point read from PATIENT_ROLLUPS)
 CREATE OR REPLACE FUNCTION GET_PATIENT_SUMMARY(INPUT_PATIENT_ID NUMBER)  
 RETURNS STRING
 LANGUAGE SQL
@@ -64,47 +129,45 @@ $$
   SELECT 
     'PATIENT PROFILE' || CHR(10) ||
     '================' || CHR(10) ||
-    'Name: ' || p.FIRST || ' ' || p.LAST || CHR(10) ||
-    'Age: ' || DATEDIFF('year', p.BIRTHDATE, CURRENT_DATE()) || ' years' || CHR(10) ||
-    'Gender: ' || p.GENDER || CHR(10) ||
-    'City: ' || p.CITY || ', ' || p.STATE || CHR(10) ||
-    'Total Healthcare Costs: $' || TO_CHAR(p.HEALTHCARE_EXPENSES + p.HEALTHCARE_COVERAGE, '999,999,999') || CHR(10) ||
-    'Patient Costs: $' || TO_CHAR(p.HEALTHCARE_EXPENSES, '999,999,999') || CHR(10) ||
-    'Insurance Coverage: $' || TO_CHAR(p.HEALTHCARE_COVERAGE, '999,999,999') || CHR(10) ||
-    'Encounters: ' || COALESCE(e.encounter_count, 0) || CHR(10) ||
-    'Active Conditions: ' || COALESCE(c.condition_count, 0) || CHR(10) ||
-    'Risk Level: ' || CASE 
-      WHEN (p.HEALTHCARE_EXPENSES + p.HEALTHCARE_COVERAGE) > 1000000 THEN 'MILLION+'
-      WHEN (p.HEALTHCARE_EXPENSES + p.HEALTHCARE_COVERAGE) > 500000 THEN 'CRITICAL'
-      WHEN (p.HEALTHCARE_EXPENSES + p.HEALTHCARE_COVERAGE) > 100000 THEN 'HIGH'
-      ELSE 'MODERATE'
-    END
-  FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.PATIENTS p
-  LEFT JOIN (
-    SELECT PATIENT_ID, COUNT(*) as encounter_count 
-    FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.ENCOUNTERS 
-    GROUP BY PATIENT_ID
-  ) e ON p.PATIENT_ID = e.PATIENT_ID
-  LEFT JOIN (
-    SELECT PATIENT_ID, COUNT(DISTINCT CONDITION_ID) as condition_count
-    FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.CONDITIONS
-    GROUP BY PATIENT_ID  
-  ) c ON p.PATIENT_ID = c.PATIENT_ID
-  WHERE p.PATIENT_ID = INPUT_PATIENT_ID
+    'Name: ' || r.FIRST || ' ' || r.LAST || CHR(10) ||
+    'Age: ' || DATEDIFF('year', r.BIRTHDATE, CURRENT_DATE()) || ' years' || CHR(10) ||
+    'Gender: ' || r.GENDER || CHR(10) ||
+    'City: ' || r.CITY || ', ' || r.STATE || CHR(10) ||
+    'Total Healthcare Costs: $' || TO_CHAR(r.TOTAL_COST, '999,999,999') || CHR(10) ||
+    'Patient Costs: $' || TO_CHAR(r.HEALTHCARE_EXPENSES, '999,999,999') || CHR(10) ||
+    'Insurance Coverage: $' || TO_CHAR(r.HEALTHCARE_COVERAGE, '999,999,999') || CHR(10) ||
+    'Encounters: ' || r.ENCOUNTER_COUNT || CHR(10) ||
+    'Active Conditions: ' || r.CONDITION_COUNT || CHR(10) ||
+    'Risk Level: ' || r.RISK_LEVEL
+  FROM PATIENT_ROLLUPS r
+  WHERE r.PATIENT_ID = INPUT_PATIENT_ID
 $$;
 
 -- ==============================================================================
 -- SECTION 5: PATIENT CONDITIONS FUNCTION
 -- ==============================================================================
--- Create function to get patient conditions list
-CREATE OR REPLACE FUNCTION GET_PATIENT_CONDITIONS(PATIENT_ID NUMBER)
+-- Create function to get patient conditions list (point read from PATIENT_CONDITION_LISTS)
+CREATE OR REPLACE FUNCTION GET_PATIENT_CONDITIONS(INPUT_PATIENT_ID NUMBER)
 RETURNS STRING
 LANGUAGE SQL
 COMMENT = 'Returns semicolon-separated list of all patient conditions'
 AS
 $$
-  SELECT 
-    LISTAGG(DISTINCT c.DESCRIPTION, '; ') WITHIN GROUP (ORDER BY c.DESCRIPTION)
-  FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.CONDITIONS c
-  WHERE c.PATIENT_ID = PATIENT_ID
-$$;
\ No newline at end of file
+  SELECT l.CONDITIONS
+  FROM PATIENT_CONDITION_LISTS l
+  WHERE l.PATIENT_ID = INPUT_PATIENT_ID
+$$;
+
+-- Batch variant for cohort enrichment: one query for many patients instead of one call per patient.
+-- Every requested id is returned; CONDITIONS is NULL when the patient has none.
+-- SELECT * FROM TABLE(GET_PATIENT_CONDITIONS_BATCH(ARRAY_CONSTRUCT(1992826, 1331092)));
+CREATE OR REPLACE FUNCTION GET_PATIENT_CONDITIONS_BATCH(PATIENT_IDS ARRAY)
+RETURNS TABLE (PATIENT_ID NUMBER, CONDITIONS STRING)
+LANGUAGE SQL
+COMMENT = 'Returns the semicolon-separated condition list for each patient id in the array'
+AS
+$$
+  SELECT ids.VALUE::NUMBER as PATIENT_ID, l.CONDITIONS
+  FROM TABLE(FLATTEN(INPUT => PATIENT_IDS)) ids
+  LEFT JOIN PATIENT_CONDITION_LISTS l ON l.PATIENT_ID = ids.VALUE::NUMBER
+$$;
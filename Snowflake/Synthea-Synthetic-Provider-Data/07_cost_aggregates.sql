@@ -0,0 +1,114 @@
+/*
+==============================================================================
+SNOWFLAKE INTELLIGENCE HEALTHCARE DEMO - COST AGGREGATES FOR CORTEX ANALYST
+==============================================================================
+Script: 07_cost_aggregates.sql
+Purpose: Precompute patient-level and month-level cost aggregates so the most
+         common Cortex Analyst questions do not scan CLAIMS_TX at query time
+Author: Snowflake Intelligence Demo Setup
+
+Prerequisites:
+- Script 01_infrastructure_setup.sql completed successfully
+- Access to SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS
+
+Used by:
+- Enhanced_Synthea_Healthcare.yaml (PATIENT_COST_SUMMARY, MONTHLY_COST_SUMMARY
+  logical tables and their verified queries)
+- 08_semantic_model_timing.sql (before/after timings)
+==============================================================================
+*/
+
+-- ==============================================================================
+-- SECTION 1: SET CONTEXT
+-- ==============================================================================
+
+USE WAREHOUSE CURWH_HEALTHCARE_DEMO_SMALL;
+USE DATABASE CUR_SYNTHETIC_HEALTHCARE;
+USE SCHEMA DEMO_ASSETS;
+
+-- ==============================================================================
+-- SECTION 2: PATIENT-LEVEL COST SUMMARY
+-- ==============================================================================
+
+-- One row per patient: demographics, lifetime cost and tier, plus claim and encounter totals
+CREATE OR REPLACE DYNAMIC TABLE PATIENT_COST_SUMMARY
+  TARGET_LAG = '1 day'
+  WAREHOUSE = CURWH_HEALTHCARE_DEMO_SMALL
+  REFRESH_MODE = AUTO
+  CLUSTER BY (STATE, COST_CATEGORY)
+  COMMENT = 'LINEAGE: Per-patient cost aggregates from SILVER.PATIENTS, CLAIMS_TX, ENCOUNTERS (Cortex Analyst)'
+AS
+SELECT
+  p.PATIENT_ID,
+  p.FIRST, p.LAST, p.GENDER, p.CITY, p.STATE, p.BIRTHDATE,
+  p.HEALTHCARE_EXPENSES, p.HEALTHCARE_COVERAGE,
+  (p.HEALTHCARE_EXPENSES + p.HEALTHCARE_COVERAGE) as TOTAL_COST,
+  CASE
+    WHEN (p.HEALTHCARE_EXPENSES + p.HEALTHCARE_COVERAGE) > 2000000 THEN 'ULTRA-HIGH'
+    WHEN (p.HEALTHCARE_EXPENSES + p.HEALTHCARE_COVERAGE) > 1000000 THEN 'MILLION+'
+    WHEN (p.HEALTHCARE_EXPENSES + p.HEALTHCARE_COVERAGE) > 500000 THEN 'CRITICAL'
+    WHEN (p.HEALTHCARE_EXPENSES + p.HEALTHCARE_COVERAGE) > 100000 THEN 'HIGH'
+    WHEN (p.HEALTHCARE_EXPENSES + p.HEALTHCARE_COVERAGE) > 50000 THEN 'MODERATE'
+    ELSE 'LOW'
+  END as COST_CATEGORY,
+  COALESCE(tx.claim_count, 0) as CLAIM_COUNT,
+  COALESCE(tx.total_charges, 0) as TOTAL_CHARGES,
+  COALESCE(tx.total_payments, 0) as TOTAL_PAYMENTS,
+  COALESCE(tx.total_adjustments, 0) as TOTAL_ADJUSTMENTS,
+  COALESCE(e.encounter_count, 0) as ENCOUNTER_COUNT,
+  COALESCE(e.total_claim_cost, 0) as TOTAL_ENCOUNTER_CLAIM_COST,
+  COALESCE(e.payer_coverage, 0) as TOTAL_PAYER_COVERAGE
+FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.PATIENTS p
+LEFT JOIN (
+  SELECT
+    PATIENT_ID,
+    COUNT(DISTINCT CLAIM_ID) as claim_count,
+    SUM(IFF(TYPE = 'CHARGE', AMOUNT, 0)) as total_charges,
+    SUM(COALESCE(PAYMENTS, 0)) as total_payments,
+    SUM(COALESCE(ADJUSTMENTS, 0)) as total_adjustments
+  FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.CLAIMS_TX
+  GROUP BY PATIENT_ID
+) tx ON p.PATIENT_ID = tx.PATIENT_ID
+LEFT JOIN (
+  SELECT
+    PATIENT_ID,
+    COUNT(*) as encounter_count,
+    SUM(TOTAL_CLAIM_COST) as total_claim_cost,
+    SUM(PAYER_COVERAGE) as payer_coverage
+  FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.ENCOUNTERS
+  GROUP BY PATIENT_ID
+) e ON p.PATIENT_ID = e.PATIENT_ID;
+
+-- ==============================================================================
+-- SECTION 3: MONTH-LEVEL COST SUMMARY
+-- ==============================================================================
+
+-- One row per month and patient state. Money and transaction counts add up across rows;
+-- CLAIM_COUNT and PATIENT_COUNT are distinct counts and must not be summed across months.
+CREATE OR REPLACE DYNAMIC TABLE MONTHLY_COST_SUMMARY
+  TARGET_LAG = '1 day'
+  WAREHOUSE = CURWH_HEALTHCARE_DEMO_SMALL
+  REFRESH_MODE = AUTO
+  CLUSTER BY (MONTH)
+  COMMENT = 'LINEAGE: Monthly claim transaction totals by patient state from SILVER.CLAIMS_TX, PATIENTS (Cortex Analyst)'
+AS
+SELECT
+  DATE_TRUNC('month', tx.FROMDATE)::DATE as MONTH,
+  p.STATE,
+  COUNT(*) as TRANSACTION_COUNT,
+  COUNT(DISTINCT tx.CLAIM_ID) as CLAIM_COUNT,
+  COUNT(DISTINCT tx.PATIENT_ID) as PATIENT_COUNT,
+  SUM(IFF(tx.TYPE = 'CHARGE', tx.AMOUNT, 0)) as TOTAL_CHARGES,
+  SUM(COALESCE(tx.PAYMENTS, 0)) as TOTAL_PAYMENTS,
+  SUM(COALESCE(tx.ADJUSTMENTS, 0)) as TOTAL_ADJUSTMENTS
+FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.CLAIMS_TX tx
+JOIN SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.PATIENTS p ON p.PATIENT_ID = tx.PATIENT_ID
+GROUP BY 1, 2;
+
+-- ==============================================================================
+-- SECTION 4: VERIFICATION
+-- ==============================================================================
+
+SELECT 'PATIENT_COST_SUMMARY' as table_name, COUNT(*) as row_count FROM PATIENT_COST_SUMMARY
+UNION ALL
+SELECT 'MONTHLY_COST_SUMMARY', COUNT(*) FROM MONTHLY_COST_SUMMARY;
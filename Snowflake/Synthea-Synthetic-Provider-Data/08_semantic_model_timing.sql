@@ -0,0 +1,150 @@
+/*
+==============================================================================
+SNOWFLAKE INTELLIGENCE HEALTHCARE DEMO - SEMANTIC MODEL TIMING HARNESS
+==============================================================================
+Script: 08_semantic_model_timing.sql
+Purpose: Time representative Cortex Analyst questions before and after the
+         cost aggregates: the SQL Analyst generates against the raw tables
+         versus the verified query SQL against the aggregate tables
+Author: Snowflake Intelligence Demo Setup
+
+Prerequisites:
+- Script 07_cost_aggregates.sql completed and both dynamic tables refreshed
+
+Notes:
+- The result cache is disabled so every statement runs on the warehouse
+- Each statement carries a QUERY_TAG of the form SEMANTIC_TIMING:<question>:<RAW|AGG>
+- Run the whole script twice and compare the second run (warm warehouse)
+==============================================================================
+*/
+
+-- ==============================================================================
+-- SECTION 1: SET CONTEXT
+-- ==============================================================================
+
+USE WAREHOUSE CURWH_HEALTHCARE_DEMO_SMALL;
+USE DATABASE CUR_SYNTHETIC_HEALTHCARE;
+USE SCHEMA DEMO_ASSETS;
+
+ALTER SESSION SET USE_CACHED_RESULT = FALSE;
+
+-- ==============================================================================
+-- SECTION 2: TOP HIGH-COST CLAIMANTS BY STATE
+-- ==============================================================================
+
+ALTER SESSION SET QUERY_TAG = 'SEMANTIC_TIMING:top_high_cost_claimants_by_state:RAW';
+SELECT p.STATE, p.PATIENT_ID, p.FIRST, p.LAST,
+       (p.HEALTHCARE_EXPENSES + p.HEALTHCARE_COVERAGE) as TOTAL_COST,
+       SUM(IFF(tx.TYPE = 'CHARGE', tx.AMOUNT, 0)) as TOTAL_CHARGES,
+       COUNT(DISTINCT tx.CLAIM_ID) as CLAIM_COUNT
+FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.PATIENTS p
+LEFT JOIN SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.CLAIMS_TX tx ON tx.PATIENT_ID = p.PATIENT_ID
+GROUP BY p.STATE, p.PATIENT_ID, p.FIRST, p.LAST, p.HEALTHCARE_EXPENSES, p.HEALTHCARE_COVERAGE
+QUALIFY ROW_NUMBER() OVER (PARTITION BY p.STATE ORDER BY TOTAL_COST DESC) <= 10
+ORDER BY p.STATE, TOTAL_COST DESC;
+
+ALTER SESSION SET QUERY_TAG = 'SEMANTIC_TIMING:top_high_cost_claimants_by_state:AGG';
+SELECT STATE, PATIENT_ID, FIRST, LAST, COST_CATEGORY, TOTAL_COST, TOTAL_CHARGES, CLAIM_COUNT
+FROM PATIENT_COST_SUMMARY
+QUALIFY ROW_NUMBER() OVER (PARTITION BY STATE ORDER BY TOTAL_COST DESC) <= 10
+ORDER BY STATE, TOTAL_COST DESC;
+
+-- ==============================================================================
+-- SECTION 3: PATIENTS BY COST CATEGORY AND STATE
+-- ==============================================================================
+
+ALTER SESSION SET QUERY_TAG = 'SEMANTIC_TIMING:patients_by_cost_category_and_state:RAW';
+SELECT STATE,
+       CASE
+         WHEN (HEALTHCARE_EXPENSES + HEALTHCARE_COVERAGE) > 2000000 THEN 'ULTRA-HIGH'
+         WHEN (HEALTHCARE_EXPENSES + HEALTHCARE_COVERAGE) > 1000000 THEN 'MILLION+'
+         WHEN (HEALTHCARE_EXPENSES + HEALTHCARE_COVERAGE) > 500000 THEN 'CRITICAL'
+         WHEN (HEALTHCARE_EXPENSES + HEALTHCARE_COVERAGE) > 100000 THEN 'HIGH'
+         WHEN (HEALTHCARE_EXPENSES + HEALTHCARE_COVERAGE) > 50000 THEN 'MODERATE'
+         ELSE 'LOW'
+       END as COST_CATEGORY,
+       COUNT(*) as PATIENT_COUNT,
+       SUM(HEALTHCARE_EXPENSES + HEALTHCARE_COVERAGE) as TOTAL_COST
+FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.PATIENTS
+GROUP BY 1, 2
+ORDER BY STATE, TOTAL_COST DESC;
+
+ALTER SESSION SET QUERY_TAG = 'SEMANTIC_TIMING:patients_by_cost_category_and_state:AGG';
+SELECT STATE, COST_CATEGORY, COUNT(*) as PATIENT_COUNT, SUM(TOTAL_COST) as TOTAL_COST
+FROM PATIENT_COST_SUMMARY
+GROUP BY STATE, COST_CATEGORY
+ORDER BY STATE, TOTAL_COST DESC;
+
+-- ==============================================================================
+-- SECTION 4: MONTHLY CLAIM COST TREND
+-- ==============================================================================
+
+ALTER SESSION SET QUERY_TAG = 'SEMANTIC_TIMING:monthly_claim_cost_trend:RAW';
+SELECT DATE_TRUNC('month', FROMDATE)::DATE as MONTH,
+       SUM(IFF(TYPE = 'CHARGE', AMOUNT, 0)) as TOTAL_CHARGES,
+       SUM(COALESCE(PAYMENTS, 0)) as TOTAL_PAYMENTS,
+       COUNT(*) as TRANSACTION_COUNT
+FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.CLAIMS_TX
+WHERE FROMDATE >= DATEADD('month', -12,
+        (SELECT DATE_TRUNC('month', MAX(FROMDATE)) FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.CLAIMS_TX))
+GROUP BY 1
+ORDER BY 1;
+
+ALTER SESSION SET QUERY_TAG = 'SEMANTIC_TIMING:monthly_claim_cost_trend:AGG';
+SELECT MONTH, SUM(TOTAL_CHARGES) as TOTAL_CHARGES, SUM(TOTAL_PAYMENTS) as TOTAL_PAYMENTS,
+       SUM(TRANSACTION_COUNT) as TRANSACTION_COUNT
+FROM MONTHLY_COST_SUMMARY
+WHERE MONTH >= DATEADD('month', -12, (SELECT MAX(MONTH) FROM MONTHLY_COST_SUMMARY))
+GROUP BY MONTH
+ORDER BY MONTH;
+
+-- ==============================================================================
+-- SECTION 5: YEARLY CLAIM CHARGES BY STATE
+-- ==============================================================================
+
+ALTER SESSION SET QUERY_TAG = 'SEMANTIC_TIMING:yearly_claim_charges_by_state:RAW';
+SELECT DATE_TRUNC('year', tx.FROMDATE)::DATE as YEAR, p.STATE,
+       SUM(IFF(tx.TYPE = 'CHARGE', tx.AMOUNT, 0)) as TOTAL_CHARGES,
+       SUM(COALESCE(tx.PAYMENTS, 0)) as TOTAL_PAYMENTS
+FROM SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.CLAIMS_TX tx
+JOIN SYNTHETIC_HEALTHCARE_DATA__CLINICAL_AND_CLAIMS.SILVER.PATIENTS p ON p.PATIENT_ID = tx.PATIENT_ID
+GROUP BY 1, 2
+ORDER BY 1, TOTAL_CHARGES DESC;
+
+ALTER SESSION SET QUERY_TAG = 'SEMANTIC_TIMING:yearly_claim_charges_by_state:AGG';
+SELECT DATE_TRUNC('year', MONTH) as YEAR, STATE, SUM(TOTAL_CHARGES) as TOTAL_CHARGES,
+       SUM(TOTAL_PAYMENTS) as TOTAL_PAYMENTS
+FROM MONTHLY_COST_SUMMARY
+GROUP BY 1, 2
+ORDER BY 1, TOTAL_CHARGES DESC;
+
+ALTER SESSION UNSET QUERY_TAG;
+ALTER SESSION UNSET USE_CACHED_RESULT;
+
+-- ==============================================================================
+-- SECTION 6: BEFORE / AFTER SUMMARY
+-- ==============================================================================
+
+-- Latest RAW and AGG execution per question in this session
+WITH timings AS (
+  SELECT
+    SPLIT_PART(QUERY_TAG, ':', 2) as question,
+    SPLIT_PART(QUERY_TAG, ':', 3) as variant,
+    TOTAL_ELAPSED_TIME as elapsed_ms,
+    BYTES_SCANNED
+  FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY_BY_SESSION(RESULT_LIMIT => 1000))
+  WHERE QUERY_TAG LIKE 'SEMANTIC_TIMING:%'
+    AND QUERY_TYPE = 'SELECT'
+    AND EXECUTION_STATUS = 'SUCCESS'
+  QUALIFY ROW_NUMBER() OVER (PARTITION BY QUERY_TAG ORDER BY START_TIME DESC) = 1
+)
+SELECT
+  question,
+  MAX(IFF(variant = 'RAW', elapsed_ms, NULL)) as raw_ms,
+  MAX(IFF(variant = 'AGG', elapsed_ms, NULL)) as agg_ms,
+  ROUND(raw_ms / NULLIF(agg_ms, 0), 1) as speedup,
+  MAX(IFF(variant = 'RAW', BYTES_SCANNED, NULL)) as raw_bytes_scanned,
+  MAX(IFF(variant = 'AGG', BYTES_SCANNED, NULL)) as agg_bytes_scanned
+FROM timings
+GROUP BY question
+ORDER BY question;
@@ -0,0 +1,163 @@
+-- Deploy Salesforce Token Vending: one cached OAuth access token for every Salesforce procedure
+-- GET_SALESFORCE_TOKEN returns the token cached in SALESFORCE_TOKEN_CACHE and only performs the
+-- client credentials exchange when the cache is empty, the token is close to its expiry, or a
+-- caller reports that Salesforce rejected it (401). The other procedures call it through
+-- sfclient.auth.use_vended_token, so they no longer read the secrets or request tokens themselves.
+-- It also creates SALESFORCE_CIRCUIT_BREAKER, where the procedures share the Salesforce circuit breaker
+-- (sfclient.circuit): after repeated connection errors or 5xx responses calls fail fast until a probe succeeds.
+-- When Salesforce cannot be reached for a refresh (connection error, timeout or 5xx) the result carries
+-- 'unavailable': true, so callers queue their work as during any other outage instead of failing.
+-- Deploy this script before the 2x procedures. Requires the shared sfclient.zip on HEALTHCARE_DEMO_STAGE.
+
+USE DATABASE CUR_SYNTHETIC_HEALTHCARE;
+USE SCHEMA DEMO_ASSETS;
+USE WAREHOUSE CURWH_HEALTHCARE_DEMO_SMALL;
+
+-- One row per token; readable only by the owner role (the procedure runs with owner's rights)
+CREATE TABLE IF NOT EXISTS SALESFORCE_TOKEN_CACHE (
+    TOKEN_NAME STRING NOT NULL,
+    ACCESS_TOKEN STRING,
+    INSTANCE_URL STRING,
+    ISSUED_AT TIMESTAMP_LTZ,
+    EXPIRES_AT TIMESTAMP_LTZ,
+    TOKEN_VERSION NUMBER,
+    REFRESH_REASON STRING
+)
+COMMENT = 'Cached Salesforce OAuth access token (GET_SALESFORCE_TOKEN); do not grant to other roles';
+
+REVOKE ALL PRIVILEGES ON TABLE SALESFORCE_TOKEN_CACHE FROM ROLE PUBLIC;
+
+-- Circuit breaker state; the procedures run as the caller, so callers need SELECT, INSERT and UPDATE
+CREATE TABLE IF NOT EXISTS SALESFORCE_CIRCUIT_BREAKER (
+    BREAKER_NAME STRING NOT NULL,
+    STATE STRING,
+    CONSECUTIVE_FAILURES NUMBER,
+    OPENED_AT TIMESTAMP_LTZ,
+    LAST_ERROR STRING,
+    UPDATED_AT TIMESTAMP_LTZ
+)
+COMMENT = 'Salesforce circuit breaker shared by procedure calls (sfclient.circuit)';
+
+-- STALE_VERSION: version of a token Salesforce rejected; it is replaced unless a newer one is cached
+CREATE OR REPLACE PROCEDURE GET_SALESFORCE_TOKEN(
+    STALE_VERSION NUMBER DEFAULT NULL
+)
+RETURNS VARIANT
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('requests', 'snowflake-snowpark-python')
+HANDLER = 'main'
+IMPORTS = ('@CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.HEALTHCARE_DEMO_STAGE/sfclient.zip')
+EXTERNAL_ACCESS_INTEGRATIONS = (SALESFORCE_SYNTHEA_INTEGRATION_JDB)
+SECRETS = (
+    'salesforce_client_id' = CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SALESFORCE_CLIENT_ID,
+    'salesforce_client_secret' = CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SALESFORCE_CLIENT_SECRET,
+    'salesforce_instance_url' = CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SALESFORCE_INSTANCE_URL
+)
+EXECUTE AS OWNER
+AS
+$$
+import time
+import _snowflake
+
+from sfclient import auth, circuit
+
+TOKEN_TABLE = 'CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SALESFORCE_TOKEN_CACHE'
+TOKEN_NAME = 'CLIENT_CREDENTIALS'
+
+# Client credentials tokens carry no expiry; they last for the org's session timeout (2 hours by default)
+SESSION_TIMEOUT_SECONDS = 7200
+# Refresh this long before the expiry so callers never start work with a token about to lapse
+REFRESH_MARGIN_SECONDS = 600
+
+def get_salesforce_credentials():
+    """Retrieve Salesforce credentials from Snowflake Secrets"""
+    try:
+        client_id = _snowflake.get_generic_secret_string('salesforce_client_id')
+        client_secret = _snowflake.get_generic_secret_string('salesforce_client_secret')
+        instance_url = _snowflake.get_generic_secret_string('salesforce_instance_url')
+
+        if not client_id or not client_secret or not instance_url:
+            raise Exception("One or more Salesforce credentials are missing from secrets")
+
+        return client_id, client_secret, instance_url
+    except Exception as e:
+        raise Exception(f"Failed to retrieve Salesforce credentials from secrets: {str(e)}")
+
+def cached_token(session):
+    """The cached token row, or None"""
+    rows = session.sql(
+        f"SELECT ACCESS_TOKEN, INSTANCE_URL, TO_VARCHAR(ISSUED_AT) AS ISSUED_AT, "
+        f"DATE_PART(EPOCH_SECOND, EXPIRES_AT) AS EXPIRES_EPOCH, TOKEN_VERSION "
+        f"FROM {TOKEN_TABLE} WHERE TOKEN_NAME = ?",
+        params=[TOKEN_NAME]
+    ).collect()
+    return rows[0] if rows else None
+
+def refresh_reason(row, stale_version):
+    """Why the cached token must be replaced, or None when it can be vended as is"""
+    if row is None or not row['ACCESS_TOKEN']:
+        return 'EMPTY'
+    if stale_version is not None and int(row['TOKEN_VERSION']) <= int(stale_version):
+        return 'REJECTED'
+    if int(row['EXPIRES_EPOCH']) - time.time() <= REFRESH_MARGIN_SECONDS:
+        return 'EXPIRING'
+    return None
+
+def store_token(session, token_data, instance_url, version, reason):
+    """Write a new token; a concurrent refresh that already stored this version wins"""
+    issued_epoch = int(token_data.get('issued_at') or time.time() * 1000) // 1000
+    session.sql(
+        f"MERGE INTO {TOKEN_TABLE} t "
+        f"USING (SELECT ? AS TOKEN_NAME, ? AS ACCESS_TOKEN, ? AS INSTANCE_URL, "
+        f"TO_TIMESTAMP_LTZ(?) AS ISSUED_AT, TO_TIMESTAMP_LTZ(?) AS EXPIRES_AT, "
+        f"? AS TOKEN_VERSION, ? AS REFRESH_REASON) s "
+        f"ON t.TOKEN_NAME = s.TOKEN_NAME "
+        f"WHEN MATCHED AND t.TOKEN_VERSION < s.TOKEN_VERSION THEN UPDATE SET "
+        f"ACCESS_TOKEN = s.ACCESS_TOKEN, INSTANCE_URL = s.INSTANCE_URL, ISSUED_AT = s.ISSUED_AT, "
+        f"EXPIRES_AT = s.EXPIRES_AT, TOKEN_VERSION = s.TOKEN_VERSION, REFRESH_REASON = s.REFRESH_REASON "
+        f"WHEN NOT MATCHED THEN INSERT (TOKEN_NAME, ACCESS_TOKEN, INSTANCE_URL, ISSUED_AT, EXPIRES_AT, "
+        f"TOKEN_VERSION, REFRESH_REASON) VALUES (s.TOKEN_NAME, s.ACCESS_TOKEN, s.INSTANCE_URL, s.ISSUED_AT, "
+        f"s.EXPIRES_AT, s.TOKEN_VERSION, s.REFRESH_REASON)",
+        params=[TOKEN_NAME, token_data['access_token'], instance_url, issued_epoch,
+                issued_epoch + SESSION_TIMEOUT_SECONDS, version, reason]
+    ).collect()
+    return cached_token(session)
+
+def vend(row, refreshed, reason=None):
+    """The token as returned to callers (sfclient.auth.vended_token)"""
+    return {
+        'access_token': row['ACCESS_TOKEN'],
+        'instance_url': row['INSTANCE_URL'],
+        'issued_at': row['ISSUED_AT'],
+        'expires_epoch': int(row['EXPIRES_EPOCH']),
+        'version': int(row['TOKEN_VERSION']),
+        'refreshed': refreshed,
+        'refresh_reason': reason
+    }
+
+def main(session, stale_version=None):
+    """Return the cached Salesforce token, refreshing it when empty, expiring or rejected"""
+    try:
+        row = cached_token(session)
+        reason = refresh_reason(row, stale_version)
+        if reason is None:
+            return vend(row, False)
+
+        client_id, client_secret, sf_instance_url = get_salesforce_credentials()
+        token_data = auth.fetch_token(client_id, client_secret, sf_instance_url)
+        instance_url = token_data.get('instance_url') or sf_instance_url.rstrip('/')
+        version = (int(row['TOKEN_VERSION'] or 0) if row is not None else 0) + 1
+        return vend(store_token(session, token_data, instance_url, version, reason), True, reason)
+
+    except Exception as e:
+        # An outage is flagged so sfclient.auth.vended_token raises it as a ConnectionError
+        return {'error': str(e), 'unavailable': circuit.is_outage(e)}
+
+$$;
+
+-- Check the cache without displaying the token
+SELECT TOKEN_NAME, INSTANCE_URL, ISSUED_AT, EXPIRES_AT, TOKEN_VERSION, REFRESH_REASON FROM SALESFORCE_TOKEN_CACHE;
+
+-- Check the circuit breaker; deleting the row closes it
+SELECT BREAKER_NAME, STATE, CONSECUTIVE_FAILURES, OPENED_AT, LAST_ERROR, UPDATED_AT FROM SALESFORCE_CIRCUIT_BREAKER;
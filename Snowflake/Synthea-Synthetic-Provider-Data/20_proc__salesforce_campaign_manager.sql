@@ -1,65 +1,56 @@
 -- Deploy Agent-Compatible Salesforce Campaign Manager
 -- Uses patient_id as unique identifier for contact lookup (not email)
--- Fixed version with proper secret references and Python formatting
+-- Patients repeated in the input (same patient_id or email) are collapsed before any Salesforce call
+-- Tokens come from GET_SALESFORCE_TOKEN (19_proc__salesforce_token_vending.sql), refreshed on 401
+-- Fails fast while the shared circuit breaker (SALESFORCE_CIRCUIT_BREAKER) is open. When Salesforce is
+-- unreachable the patients are queued in SALESFORCE_OUTBOX (CAMPAIGN_STATUS: QUEUED) and sent later by
+-- DRAIN_SALESFORCE_OUTBOX (29_proc__drain_salesforce_outbox.sql)
 
 USE DATABASE CUR_SYNTHETIC_HEALTHCARE;
 USE SCHEMA DEMO_ASSETS;
 USE WAREHOUSE CURWH_HEALTHCARE_DEMO_SMALL;
 
+-- Optional arguments change the signature; drop earlier versions so calls are not ambiguous
+DROP PROCEDURE IF EXISTS SALESFORCE_CAMPAIGN_MANAGER(STRING, STRING);
+DROP PROCEDURE IF EXISTS SALESFORCE_CAMPAIGN_MANAGER(STRING, STRING, BOOLEAN);
+
+-- PLAN_ONLY: resolve existing contacts/members with bulk reads and return API call estimates, no writes
+-- STRATEGY:  SERIAL (one call per record), BATCHED (sObject Collections), BULK (Bulk API 2.0),
+--            GRAPH (Composite Graph, one round trip for up to 75 patients)
+--            or AUTO (GRAPH for small requests, otherwise fewest API calls)
 CREATE OR REPLACE PROCEDURE SALESFORCE_CAMPAIGN_MANAGER(
     CAMPAIGN_NAME STRING,
-    PATIENTS_JSON STRING
+    PATIENTS_JSON STRING,
+    PROFILE BOOLEAN DEFAULT FALSE,
+    PLAN_ONLY BOOLEAN DEFAULT FALSE,
+    STRATEGY STRING DEFAULT 'SERIAL'
 )
 RETURNS STRING
 LANGUAGE PYTHON
 RUNTIME_VERSION = '3.11'
 PACKAGES = ('requests', 'snowflake-snowpark-python')
 HANDLER = 'main'
+-- Shared Salesforce client (Salesforce/sfclient), uploaded as a zip; see the Readme for the PUT command
+IMPORTS = ('@CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.HEALTHCARE_DEMO_STAGE/sfclient.zip')
 EXTERNAL_ACCESS_INTEGRATIONS = (SALESFORCE_SYNTHEA_INTEGRATION_JDB)
-SECRETS = (
-    'salesforce_client_id' = CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SALESFORCE_CLIENT_ID,
-    'salesforce_client_secret' = CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SALESFORCE_CLIENT_SECRET,
-    'salesforce_instance_url' = CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SALESFORCE_INSTANCE_URL
-)
 EXECUTE AS CALLER
 AS
 $$
-import requests
 import json
 import sys
-import _snowflake
-from datetime import datetime, date
+import cProfile
+import pstats
+import time
+from urllib.parse import quote
 
-def get_salesforce_credentials():
-    """Retrieve Salesforce credentials from Snowflake Secrets"""
-    try:
-        client_id = _snowflake.get_generic_secret_string('salesforce_client_id')
-        client_secret = _snowflake.get_generic_secret_string('salesforce_client_secret')
-        instance_url = _snowflake.get_generic_secret_string('salesforce_instance_url')
-        
-        if not client_id or not client_secret or not instance_url:
-            raise Exception("One or more Salesforce credentials are missing from secrets")
-            
-        return client_id, client_secret, instance_url
-    except Exception as e:
-        raise Exception(f"Failed to retrieve Salesforce credentials from secrets: {str(e)}")
+from sfclient import auth, batch, circuit, outbox, profiling, transport
+from sfclient.records import (build_campaign_data, build_contact_data, build_patient_contact, patient_id_key,
+                              patient_id_literal, split_name)
 
-def get_access_token(client_id, client_secret, instance_url):
-    """Get Salesforce OAuth access token"""
-    token_url = f"{instance_url}/services/oauth2/token"
-    
-    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-    data = {
-        'grant_type': 'client_credentials',
-        'client_id': client_id,
-        'client_secret': client_secret
-    }
-    
-    response = requests.post(token_url, headers=headers, data=data)
-    if response.status_code == 200:
-        return response.json()['access_token']
-    else:
-        raise Exception(f"Failed to get access token. Status: {response.status_code}, Response: {response.text}")
+def raise_if_unavailable(response):
+    """Raise an HTTPError on 5xx, so an outage is queued instead of counted as a failed patient"""
+    if response.status_code >= 500:
+        response.raise_for_status()
 
 def find_campaign_by_name(access_token, instance_url, campaign_name):
     """Find campaign by name in Salesforce"""
@@ -72,7 +63,8 @@ def find_campaign_by_name(access_token, instance_url, campaign_name):
     query_url = f"{instance_url}/services/data/v58.0/query"
     params = {'q': query}
     
-    response = requests.get(query_url, headers=headers, params=params)
+    response = transport.get(query_url, headers=headers, params=params)
+    raise_if_unavailable(response)
     if response.status_code == 200:
         data = response.json()
         if data['totalSize'] > 0:
@@ -86,16 +78,12 @@ def create_campaign(access_token, instance_url, campaign_name):
         'Content-Type': 'application/json'
     }
     
-    campaign_data = {
-        "Name": campaign_name,
-        "IsActive": True,
-        "Status": "In Progress",
-        "Type": "Other",
-        "Description": f"Campaign created from Snowflake on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-    }
+    campaign_data = build_campaign_data(campaign_name)
     
     create_url = f"{instance_url}/services/data/v58.0/sobjects/Campaign"
-    response = requests.post(create_url, headers=headers, json=campaign_data)
+    response = transport.post(create_url, headers=headers, json=campaign_data)
+    
+    raise_if_unavailable(response)
     
     if response.status_code == 201:
         return response.json()['id']
@@ -113,7 +101,8 @@ def find_contact_by_patient_id(access_token, instance_url, patient_id):
     query_url = f"{instance_url}/services/data/v58.0/query"
     params = {'q': query}
     
-    response = requests.get(query_url, headers=headers, params=params)
+    response = transport.get(query_url, headers=headers, params=params)
+    raise_if_unavailable(response)
     if response.status_code == 200:
         data = response.json()
         if data['totalSize'] > 0:
@@ -127,21 +116,12 @@ def create_contact(access_token, instance_url, patient_name, patient_id, email):
         'Content-Type': 'application/json'
     }
     
-    name_parts = str(patient_name).strip().split(' ', 1)
-    first_name = name_parts[0] if len(name_parts) > 0 else 'Unknown'
-    last_name = name_parts[1] if len(name_parts) > 1 else 'Patient'
-    
-    contact_data = {
-        "FirstName": first_name,
-        "LastName": last_name,
-        "Email": str(email),
-        "patient_id__c": float(patient_id),
-        "Title": "Patient",
-        "Description": f"Contact created from Snowflake on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-    }
+    first_name, last_name = split_name(patient_name)
+    contact_data = build_contact_data(first_name, last_name, patient_id, email)
     
     create_url = f"{instance_url}/services/data/v58.0/sobjects/Contact"
-    response = requests.post(create_url, headers=headers, json=contact_data)
+    response = transport.post(create_url, headers=headers, json=contact_data)
+    raise_if_unavailable(response)
     
     if response.status_code == 201:
         return response.json()['id']
@@ -162,7 +142,8 @@ def add_contact_to_campaign(access_token, instance_url, campaign_id, contact_id)
     }
     
     create_url = f"{instance_url}/services/data/v58.0/sobjects/CampaignMember"
-    response = requests.post(create_url, headers=headers, json=member_data)
+    response = transport.post(create_url, headers=headers, json=member_data)
+    raise_if_unavailable(response)
     
     if response.status_code == 201:
         return response.json()['id']
@@ -200,9 +181,337 @@ def parse_patients_json(patients_json):
     except Exception as e:
         raise ValueError(f"Error parsing patient data: {str(e)}")
 
-def main(session, campaign_name, patients_json):
+# Bulk API 2.0 jobs must finish inside the procedure call
+BULK_TIMEOUT_SECONDS = 240
+
+# GRAPH sends one graph per patient (3 nodes each); a new campaign is one graph of 1 + 2 nodes per patient,
+# so 75 patients stay well inside the Composite Graph node limits
+GRAPH_MAX_PATIENTS = 75
+
+def dedupe_patients(patients):
+    """Collapse patients repeated by patient_id or email (first one wins).
+    Returns (unique patients, number collapsed); a duplicate shares the outcome of the one kept."""
+    unique, _owners = batch.dedupe(patients,
+                                   lambda p: patient_id_key(p['patient_id']),
+                                   lambda p: str(p['email']).strip().lower())
+    return unique, len(patients) - len(unique)
+
+def estimate_strategies(contacts, creates, member_inserts, campaign_exists, read_calls, latency_ms):
+    """Estimate (API calls, wall seconds) for the SERIAL, BATCHED and BULK strategies"""
+    estimates = batch.estimate_strategies(contacts, creates, member_inserts, campaign_exists, read_calls,
+                                          latency_ms, verify_calls=0)
+    estimates = {name.upper(): (e['api_calls'], e['wall_seconds']) for name, e in estimates.items()}
+    if contacts <= GRAPH_MAX_PATIENTS:
+        # Token, the existing-contact read and one graph request; a missing campaign is detected by the
+        # first graph and costs one more
+        graph_calls = 3 + (0 if campaign_exists else 1)
+        estimates['GRAPH'] = (graph_calls, graph_calls * latency_ms / 1000.0)
+    return estimates
+
+def find_patient_contacts(access_token, instance_url, patients):
+    """Existing contacts of the patients with bulk reads; returns ({patient id key: contact Id}, calls)"""
+    patient_ids = sorted({patient_id_key(p['patient_id']) for p in patients})
+    records, calls = batch.query_in_batches(
+        access_token, instance_url,
+        "SELECT Id, patient_id__c FROM Contact WHERE patient_id__c IN ({values})",
+        [patient_id_literal(pid) for pid in patient_ids])
+    existing = {}
+    for record in records:
+        if record.get('patient_id__c') is not None:
+            existing.setdefault(patient_id_key(record['patient_id__c']), record['Id'])
+    return existing, calls
+
+def plan_campaign(access_token, instance_url, campaign_name, patients):
+    """Resolve campaign, contacts (by patient_id) and existing members with bulk reads"""
+    started = time.perf_counter()
+    campaign_id = find_campaign_by_name(access_token, instance_url, campaign_name)
+    read_calls = 0
+    
+    existing, calls = find_patient_contacts(access_token, instance_url, patients)
+    read_calls += calls
+    
+    members = set()
+    if campaign_id and existing:
+        records, calls = batch.query_in_batches(
+            access_token, instance_url,
+            f"SELECT ContactId FROM CampaignMember WHERE CampaignId = '{campaign_id}' AND ContactId IN ({{values}})",
+            [f"'{contact_id}'" for contact_id in sorted(set(existing.values()))])
+        read_calls += calls
+        members = {record['ContactId'] for record in records}
+    
+    latency_ms = (time.perf_counter() - started) * 1000 / (read_calls + 1)
+    
+    to_create = []
+    member_patients = []
+    skipped = []
+    for patient in patients:
+        contact_id = existing.get(patient_id_key(patient['patient_id']))
+        if not contact_id:
+            to_create.append(patient)
+        elif contact_id in members:
+            skipped.append(patient)
+        else:
+            member_patients.append((patient, contact_id))
+    
+    estimates = estimate_strategies(len(patients), len(to_create), len(to_create) + len(member_patients),
+                                    bool(campaign_id), read_calls, latency_ms)
+    recommended = min(estimates, key=lambda name: estimates[name])
+    
+    return {
+        'campaign_id': campaign_id,
+        'to_create': to_create,
+        'member_patients': member_patients,
+        'skipped': skipped,
+        'read_calls': read_calls,
+        'latency_ms': latency_ms,
+        'estimates': estimates,
+        'recommended': recommended
+    }
+
+def requested_parts(total_patients, duplicates):
+    """PATIENTS_REQUESTED, plus DUPLICATES_COLLAPSED when the input repeated patients"""
+    parts = [f"PATIENTS_REQUESTED: {total_patients + duplicates}"]
+    if duplicates:
+        parts.append(f"DUPLICATES_COLLAPSED: {duplicates}")
+    return parts
+
+def format_plan(campaign_name, plan, total_patients, duplicates=0):
+    """Format a dry-run plan as the procedure's structured output"""
+    result_parts = [
+        "MODE: PLAN",
+        f"CAMPAIGN: {campaign_name}",
+        f"CAMPAIGN_STATUS: {'EXISTING' if plan['campaign_id'] else 'WILL_CREATE'}",
+        *requested_parts(total_patients, duplicates),
+        f"CONTACTS_TO_CREATE: {len(plan['to_create'])}",
+        f"MEMBERS_TO_INSERT: {len(plan['to_create']) + len(plan['member_patients'])}",
+        f"SKIPPED_ALREADY_MEMBERS: {len(plan['skipped'])}",
+        f"MEASURED_LATENCY_MS: {plan['latency_ms']:.0f}"
+    ]
+    for name, (api_calls, wall_seconds) in plan['estimates'].items():
+        result_parts.append(f"EST_{name}: {api_calls} calls ~{wall_seconds:.1f}s")
+    result_parts.append(f"RECOMMENDED_STRATEGY: {plan['recommended']}")
+    return " | ".join(result_parts)
+
+def run_plan(access_token, instance_url, campaign_name, plan, strategy, total_patients, duplicates=0):
+    """Execute a resolved plan with the BATCHED or BULK strategy"""
+    campaign_id = plan['campaign_id']
+    campaign_created = False
+    if not campaign_id:
+        # Errors propagate to the caller, which queues the patients when Salesforce is unreachable
+        campaign_id = create_campaign(access_token, instance_url, campaign_name)
+        campaign_created = True
+    
+    failed_patients = []
+    member_patients = list(plan['member_patients'])
+    new_contacts = [build_patient_contact(p) for p in plan['to_create']]
+    
+    if new_contacts and strategy == 'BATCHED':
+        results = batch.create_collection(access_token, instance_url, 'Contact', new_contacts)
+        for patient, (contact_id, error) in zip(plan['to_create'], results):
+            if contact_id:
+                member_patients.append((patient, contact_id))
+            else:
+                failed_patients.append(f"{patient['name']}: Failed to create contact ({error})")
+    elif new_contacts:
+        job = batch.bulk_insert(access_token, instance_url, 'Contact', new_contacts,
+                                timeout_seconds=BULK_TIMEOUT_SECONDS)
+        created = {patient_id_key(row['patient_id__c']): row['sf__Id'] for row in job['successful']}
+        for patient in plan['to_create']:
+            contact_id = created.get(patient_id_key(patient['patient_id']))
+            if contact_id:
+                member_patients.append((patient, contact_id))
+            else:
+                failed_patients.append(f"{patient['name']}: Failed to create contact")
+    contact_creation_count = len(member_patients) - len(plan['member_patients'])
+    
+    members = [{"CampaignId": campaign_id, "ContactId": contact_id, "Status": "Sent"} for _, contact_id in member_patients]
+    successful_patients = 0
+    if members and strategy == 'BATCHED':
+        results = batch.create_collection(access_token, instance_url, 'CampaignMember', members)
+        for (patient, _), (member_id, error) in zip(member_patients, results):
+            if member_id:
+                successful_patients += 1
+            else:
+                failed_patients.append(f"{patient['name']}: Failed to add to campaign ({error})")
+    elif members:
+        job = batch.bulk_insert(access_token, instance_url, 'CampaignMember', members, fetch_results=False,
+                                timeout_seconds=BULK_TIMEOUT_SECONDS)
+        successful_patients = job['processed'] - job['failed']
+        if job['failed']:
+            failed_patients.append(f"{job['failed']} patient(s): Failed to add to campaign (bulk job {job['state']})")
+    
+    return format_result(campaign_name, campaign_created, total_patients, successful_patients,
+                         contact_creation_count, failed_patients,
+                         [f"STRATEGY: {strategy}", f"SKIPPED_ALREADY_MEMBERS: {len(plan['skipped'])}"], duplicates)
+
+def contact_upsert_node(reference_id, patient):
+    """Composite Graph node upserting the patient's contact on the patient_id__c external id.
+    Only used for patients without a contact: on an existing contact the upsert would overwrite
+    its name, email, title and description."""
+    contact_data = build_patient_contact(patient)
+    patient_id = contact_data.pop('patient_id__c')
+    return batch.graph_node(reference_id, 'PATCH',
+                            f"/services/data/{batch.API_VERSION}/sobjects/Contact/patient_id__c/{patient_id_literal(patient_id)}",
+                            contact_data)
+
+def member_node(reference_id, campaign_reference, contact_reference=None, contact_id=None):
+    """Composite Graph node adding a contact to the campaign; the campaign is referenced from an earlier
+    node, the contact either from an earlier node or by the Id of an existing contact"""
+    return batch.graph_node(reference_id, 'POST', f"/services/data/{batch.API_VERSION}/sobjects/CampaignMember", {
+        "CampaignId": f"@{{{campaign_reference}}}",
+        "ContactId": contact_id or f"@{{{contact_reference}.id}}",
+        "Status": "Sent"
+    })
+
+def patient_graph_nodes(patient, existing, campaign_reference, suffix=''):
+    """Nodes adding one patient: an existing contact is referenced by Id and left unchanged,
+    a new one is created by the upsert node"""
+    contact_id = existing.get(patient_id_key(patient['patient_id']))
+    if contact_id:
+        return [member_node(f"member{suffix}", campaign_reference, contact_id=contact_id)]
+    return [contact_upsert_node(f"contact{suffix}", patient),
+            member_node(f"member{suffix}", campaign_reference, f"contact{suffix}")]
+
+def run_graph(access_token, instance_url, campaign_name, patients, total_patients, duplicates=0):
+    """Find the campaign, create missing contacts and insert members in one Composite Graph round trip.
+    Existing contacts are found first with a bulk read and only referenced, so their fields are never
+    overwritten. Each patient is its own graph, so an existing member only rolls back that patient. When
+    the campaign does not exist a second request creates it with all contacts and members in one graph."""
+    existing, _calls = find_patient_contacts(access_token, instance_url, patients)
+    campaign_query = quote(f"SELECT Id FROM Campaign WHERE Name = {batch.soql_quote(campaign_name)} LIMIT 1")
+    graphs = {}
+    for i, patient in enumerate(patients):
+        graphs[f"patient{i}"] = [
+            batch.graph_node('campaign', 'GET', f"/services/data/{batch.API_VERSION}/query?q={campaign_query}")
+        ] + patient_graph_nodes(patient, existing, 'campaign.records[0].Id')
+    results = batch.composite_graph(access_token, instance_url, graphs)
+    round_trips = 1
+    campaign_created = False
+    
+    outcomes = []
+    _status, campaign_body = results.get('patient0', (False, {}))[1].get('campaign', (None, None))
+    if isinstance(campaign_body, dict) and campaign_body.get('totalSize') == 0:
+        nodes = [batch.graph_node('campaign', 'POST', f"/services/data/{batch.API_VERSION}/sobjects/Campaign",
+                                  build_campaign_data(campaign_name))]
+        for i, patient in enumerate(patients):
+            nodes.extend(patient_graph_nodes(patient, existing, 'campaign.id', suffix=str(i)))
+        successful, node_results = batch.composite_graph(access_token, instance_url, {'campaign': nodes})['campaign']
+        round_trips += 1
+        if not successful:
+            return f"ERROR: Composite graph rolled back, campaign not created - {batch.graph_error(node_results)}"
+        campaign_created = True
+        for i, patient in enumerate(patients):
+            outcomes.append((patient, True, node_results.get(f"contact{i}", (None, None))[0], None))
+    else:
+        for i, patient in enumerate(patients):
+            successful, node_results = results.get(f"patient{i}", (False, {}))
+            error = None if successful else f"Graph rolled back ({batch.graph_error(node_results)})"
+            outcomes.append((patient, successful, node_results.get('contact', (None, None))[0], error))
+    
+    successful_patients = 0
+    contact_creation_count = 0
+    failed_patients = []
+    for patient, successful, contact_status, error in outcomes:
+        if successful:
+            successful_patients += 1
+            if contact_status == 201:
+                contact_creation_count += 1
+        else:
+            failed_patients.append(f"{patient['name']}: {error}")
+    
+    return format_result(campaign_name, campaign_created, total_patients, successful_patients,
+                         contact_creation_count, failed_patients,
+                         ["STRATEGY: GRAPH", f"ROUND_TRIPS: {round_trips}"], duplicates)
+
+def format_result(campaign_name, campaign_created, total_patients, successful_patients,
+                  contact_creation_count, failed_patients, extra_parts=None, duplicates=0):
+    """Format the procedure's structured output; total_patients counts distinct patients"""
+    result_parts = [
+        f"CAMPAIGN: {campaign_name}",
+        f"CAMPAIGN_STATUS: {'CREATED' if campaign_created else 'EXISTING'}",
+        *requested_parts(total_patients, duplicates),
+        f"PATIENTS_SUCCESSFUL: {successful_patients}",
+        f"CONTACTS_CREATED: {contact_creation_count}"
+    ]
+    result_parts.extend(extra_parts or [])
+    result_parts.append(f"BYTES_SAVED: {transport.format_bytes_saved()}")
+    
+    if failed_patients:
+        result_parts.append(f"PATIENTS_FAILED: {len(failed_patients)}")
+        failed_summary = "; ".join(failed_patients[:5])
+        if len(failed_patients) > 5:
+            failed_summary += f"; ... and {len(failed_patients) - 5} more"
+        result_parts.append(f"FAILURE_DETAILS: {failed_summary}")
+    
+    success_rate = round((successful_patients / total_patients) * 100, 1)
+    result_parts.append(f"SUCCESS_RATE: {success_rate}%")
+    
+    return " | ".join(result_parts)
+
+def queue_patients(session, campaign_name, patients):
+    """Queue the patients in SALESFORCE_OUTBOX; returns (queued, pending in the outbox)"""
+    store = outbox.SnowflakeOutbox(session)
+    queued = store.enqueue([outbox.queue_item(campaign_name, build_patient_contact(p))
+                            for p in patients], source='SALESFORCE_CAMPAIGN_MANAGER')
+    return queued, store.counts().get('PENDING', 0)
+
+def queued_result(session, campaign_name, patients, total_patients, duplicates, error_result):
+    """Queue every patient because Salesforce is unreachable; error_result is returned if that fails too"""
+    try:
+        queued, pending = queue_patients(session, campaign_name, patients)
+    except Exception as e:
+        return f"{error_result} | QUEUE_FAILED: {str(e)}"
+    return " | ".join([
+        f"CAMPAIGN: {campaign_name}",
+        "CAMPAIGN_STATUS: QUEUED",
+        *requested_parts(total_patients, duplicates),
+        f"PATIENTS_QUEUED: {queued}",
+        f"OUTBOX_PENDING: {pending}",
+        f"REASON: {error_result[len('ERROR: '):]}"
+    ])
+
+def stage_failed(session, campaign_name, patients, total_patients, duplicates, context, error):
+    """Result for a failed stage: queued when Salesforce is unreachable, otherwise the ERROR.
+    Queued patients are re-resolved when drained, so work done before the failure is not repeated."""
+    if circuit.is_outage(error):
+        return queued_result(session, campaign_name, patients, total_patients, duplicates,
+                             circuit.error_result(context, error))
+    return circuit.error_result(context, error)
+
+def summarize_profile(profiler, limit=8):
+    """Summarize a cProfile run as network/json/output/other self time plus top cumulative functions"""
+    stats = pstats.Stats(profiler)
+    breakdown = profiling.categorize(stats)
+    
+    stats.sort_stats('cumulative')
+    top = []
+    for func in stats.fcn_list:
+        filename, lineno, function = func
+        if function in ('manage_campaign', 'main') or filename == '~' and 'profiler' in function:
+            continue
+        _cc, ncalls, _tt, cumtime, _callers = stats.stats[func]
+        module = filename.replace('\\', '/').rsplit('/', 1)[-1].rsplit('.', 1)[0]
+        label = function if filename == '~' else f"{module}.{function}"
+        top.append(f"{label} x{ncalls} {cumtime:.3f}s")
+        if len(top) >= limit:
+            break
+    
+    breakdown_text = ", ".join(f"{name}={seconds:.3f}s" for name, seconds in breakdown.items())
+    return f"PROFILE_BREAKDOWN: {breakdown_text} | PROFILE_TOP: {'; '.join(top)}"
+
+def main(session, campaign_name, patients_json, profile=False, plan_only=False, strategy='SERIAL'):
     """Main procedure handler for Salesforce Campaign Management (Agent-Compatible)
-    Uses patient_id as unique identifier for contact lookup."""
+    Uses patient_id as unique identifier for contact lookup.
+    When profile is TRUE the run is profiled and the top cumulative functions are appended."""
+    if not profile:
+        return manage_campaign(session, campaign_name, patients_json, plan_only, strategy)
+    
+    profiler = cProfile.Profile()
+    result = profiler.runcall(manage_campaign, session, campaign_name, patients_json, plan_only, strategy)
+    return f"{result} | {summarize_profile(profiler)}"
+
+def manage_campaign(session, campaign_name, patients_json, plan_only=False, strategy='SERIAL'):
+    """Find or create the campaign, then find or create each patient's contact and add it as a member"""
     try:
         if not campaign_name or not isinstance(campaign_name, str):
             return "ERROR: Campaign name is required and must be a string"
@@ -215,29 +524,72 @@ def main(session, campaign_name, patients_json):
         except ValueError as e:
             return f"ERROR: {str(e)}"
             
-        total_patients = len(patients)
-        if total_patients == 0:
+        if not patients:
             return "ERROR: No patients provided in JSON"
+        patients, duplicates = dedupe_patients(patients)
+        total_patients = len(patients)
+        transport.reset_compression_stats()
+        
+        strategy = (strategy or 'SERIAL').upper()
+        if strategy not in ('SERIAL', 'BATCHED', 'BULK', 'GRAPH', 'AUTO'):
+            return "ERROR: STRATEGY must be one of SERIAL, BATCHED, BULK, GRAPH, AUTO"
+        if strategy == 'GRAPH' and total_patients > GRAPH_MAX_PATIENTS:
+            return f"ERROR: STRATEGY GRAPH supports at most {GRAPH_MAX_PATIENTS} patients, use BATCHED or BULK"
+        if strategy == 'AUTO' and not plan_only and total_patients <= GRAPH_MAX_PATIENTS:
+            # Small requests: a single graph round trip beats planning reads plus writes
+            strategy = 'GRAPH'
             
-        try:
-            client_id, client_secret, sf_instance_url = get_salesforce_credentials()
-        except Exception as e:
-            return f"ERROR: Credential retrieval failed - {str(e)}"
+        circuit.use_persistent_breaker(session)
+        if transport.breaker_open():
+            if plan_only:
+                return circuit.unavailable_result()
+            return queued_result(session, campaign_name, patients, total_patients, duplicates,
+                                 circuit.unavailable_result())
         
         try:
-            access_token = get_access_token(client_id, client_secret, sf_instance_url)
+            access_token, sf_instance_url = auth.use_vended_token(session)
         except Exception as e:
-            return f"ERROR: Authentication failed - {str(e)}"
+            if plan_only:
+                return circuit.error_result("Authentication failed", e)
+            return stage_failed(session, campaign_name, patients, total_patients, duplicates,
+                                "Authentication failed", e)
         
-        campaign_id = find_campaign_by_name(access_token, sf_instance_url, campaign_name)
-        campaign_created = False
+        if strategy == 'GRAPH' and not plan_only:
+            try:
+                return run_graph(access_token, sf_instance_url, campaign_name, patients, total_patients, duplicates)
+            except Exception as e:
+                return stage_failed(session, campaign_name, patients, total_patients, duplicates,
+                                    "GRAPH load failed", e)
         
-        if not campaign_id:
+        if plan_only or strategy != 'SERIAL':
             try:
+                plan = plan_campaign(access_token, sf_instance_url, campaign_name, patients)
+            except Exception as e:
+                if plan_only:
+                    return circuit.error_result("Planning failed", e)
+                return stage_failed(session, campaign_name, patients, total_patients, duplicates,
+                                    "Planning failed", e)
+            if plan_only:
+                return format_plan(campaign_name, plan, total_patients, duplicates)
+            if strategy == 'AUTO':
+                strategy = plan['recommended']
+            if strategy != 'SERIAL':
+                try:
+                    return run_plan(access_token, sf_instance_url, campaign_name, plan, strategy, total_patients,
+                                    duplicates)
+                except Exception as e:
+                    return stage_failed(session, campaign_name, patients, total_patients, duplicates,
+                                        f"{strategy} load failed", e)
+        
+        campaign_created = False
+        try:
+            campaign_id = find_campaign_by_name(access_token, sf_instance_url, campaign_name)
+            if not campaign_id:
                 campaign_id = create_campaign(access_token, sf_instance_url, campaign_name)
                 campaign_created = True
-            except Exception as e:
-                return f"ERROR: Failed to create campaign - {str(e)}"
+        except Exception as e:
+            return stage_failed(session, campaign_name, patients, total_patients, duplicates,
+                                "Failed to create campaign", e)
         
         if not campaign_id:
             return f"ERROR: Could not find or create campaign '{campaign_name}'"
@@ -245,6 +597,8 @@ def main(session, campaign_name, patients_json):
         successful_patients = 0
         contact_creation_count = 0
         failed_patients = []
+        not_attempted = 0
+        unreachable = []
         
         for i, patient in enumerate(patients):
             try:
@@ -269,30 +623,34 @@ def main(session, campaign_name, patients_json):
                 else:
                     failed_patients.append(f"{patient_name}: Failed to add to campaign")
                     
+            except transport.CircuitOpenError:
+                # Salesforce is down: stop here instead of waiting on every remaining patient
+                not_attempted = total_patients - i
+                break
             except Exception as e:
-                failed_patients.append(f"{patient_name}: Processing error - {str(e)}")
-        
-        result_parts = [
-            f"CAMPAIGN: {campaign_name}",
-            f"CAMPAIGN_STATUS: {'CREATED' if campaign_created else 'EXISTING'}",
-            f"PATIENTS_REQUESTED: {total_patients}",
-            f"PATIENTS_SUCCESSFUL: {successful_patients}",
-            f"CONTACTS_CREATED: {contact_creation_count}"
-        ]
-        
-        if failed_patients:
-            result_parts.append(f"PATIENTS_FAILED: {len(failed_patients)}")
-            failed_summary = "; ".join(failed_patients[:5])
-            if len(failed_patients) > 5:
-                failed_summary += f"; ... and {len(failed_patients) - 5} more"
-            result_parts.append(f"FAILURE_DETAILS: {failed_summary}")
-        
-        success_rate = round((successful_patients / total_patients) * 100, 1)
-        result_parts.append(f"SUCCESS_RATE: {success_rate}%")
+                if circuit.is_outage(e):
+                    # Failed because Salesforce was unreachable, not because of the patient: queue it
+                    unreachable.append(patient)
+                else:
+                    failed_patients.append(f"{patient_name}: Processing error - {str(e)}")
         
-        return " | ".join(result_parts)
+        extra_parts = []
+        if not_attempted:
+            extra_parts = ["CIRCUIT: OPEN", f"PATIENTS_NOT_ATTEMPTED: {not_attempted}",
+                           f"CIRCUIT_DETAILS: {transport.format_breaker()}"]
+        if unreachable:
+            extra_parts.append(f"PATIENTS_UNREACHABLE: {len(unreachable)}")
+        to_queue = unreachable + (patients[-not_attempted:] if not_attempted else [])
+        if to_queue:
+            try:
+                queued, pending = queue_patients(session, campaign_name, to_queue)
+                extra_parts.extend([f"PATIENTS_QUEUED: {queued}", f"OUTBOX_PENDING: {pending}"])
+            except Exception as e:
+                extra_parts.append(f"QUEUE_FAILED: {str(e)}")
+        return format_result(campaign_name, campaign_created, total_patients, successful_patients,
+                             contact_creation_count, failed_patients, extra_parts, duplicates)
         
     except Exception as e:
-        return f"ERROR: Unexpected error in procedure - {str(e)}"
+        return circuit.error_result("Unexpected error in procedure", e)
 
 $$;
@@ -0,0 +1,282 @@
+-- Deploy Cohort Pusher: Snowflake cohort -> Salesforce campaign without a JSON round trip
+-- Reads patients straight from PATIENT_SEARCH_OPTIMIZED (filtered by cost category, state and age),
+-- streams rows with Snowpark's local iterator and writes them to Salesforce in batches.
+-- A fetch thread keeps reading from Snowflake while the previous batch is uploaded.
+-- Requires the shared sfclient.zip on HEALTHCARE_DEMO_STAGE (see the Readme) and GET_SALESFORCE_TOKEN (script 19).
+
+USE DATABASE CUR_SYNTHETIC_HEALTHCARE;
+USE SCHEMA DEMO_ASSETS;
+USE WAREHOUSE CURWH_HEALTHCARE_DEMO_SMALL;
+
+-- COST_CATEGORY: ULTRA-HIGH, MILLION+, CRITICAL, HIGH or MODERATE (NULL = any)
+-- STATE:         state name as stored in the table, e.g. 'Massachusetts' (NULL = any)
+-- MIN_AGE/MAX_AGE inclusive bounds (NULL = unbounded); highest TOTAL_COST patients first
+CREATE OR REPLACE PROCEDURE PUSH_COHORT_TO_SALESFORCE(
+    CAMPAIGN_NAME STRING,
+    COST_CATEGORY STRING DEFAULT NULL,
+    STATE STRING DEFAULT NULL,
+    MIN_AGE NUMBER DEFAULT NULL,
+    MAX_AGE NUMBER DEFAULT NULL,
+    MAX_PATIENTS NUMBER DEFAULT 10000,
+    BATCH_SIZE NUMBER DEFAULT 200
+)
+RETURNS STRING
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('requests', 'snowflake-snowpark-python')
+HANDLER = 'main'
+IMPORTS = ('@CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.HEALTHCARE_DEMO_STAGE/sfclient.zip')
+EXTERNAL_ACCESS_INTEGRATIONS = (SALESFORCE_SYNTHEA_INTEGRATION_JDB)
+EXECUTE AS CALLER
+AS
+$$
+import math
+import queue
+import re
+import threading
+import time
+
+from snowflake.snowpark.functions import col, upper
+from sfclient import auth, batch, circuit, transport
+from sfclient.records import build_campaign_data, build_contact_data, patient_id_key, patient_id_literal
+
+COHORT_TABLE = 'CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_SEARCH_OPTIMIZED'
+COST_CATEGORIES = ('ULTRA-HIGH', 'MILLION+', 'CRITICAL', 'HIGH', 'MODERATE')
+# Batches buffered between the Snowflake fetch thread and the Salesforce writer (bounds memory)
+QUEUE_DEPTH = 4
+# sObject Collections caps a request at 200 records
+MAX_BATCH_SIZE = batch.COLLECTION_BATCH_SIZE
+
+class StageStats:
+    """Rows handled and busy time for one pipeline stage"""
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.seconds = 0.0
+        self.api_calls = 0
+
+    def summary(self):
+        rate = self.rows / self.seconds if self.seconds else 0.0
+        calls = f", {self.api_calls} API calls" if self.api_calls else ""
+        return f"{self.name}: {self.rows} rows in {self.seconds:.2f}s ({rate:.0f} rows/s{calls})"
+
+def cohort_dataframe(session, cost_category, state, min_age, max_age, max_patients):
+    """Build the filtered cohort query (lazy; nothing runs until it is iterated)"""
+    df = session.table(COHORT_TABLE)
+    if cost_category:
+        df = df.filter(col('COST_CATEGORY') == cost_category.upper())
+    if state:
+        df = df.filter(upper(col('STATE')) == state.upper())
+    if min_age is not None:
+        df = df.filter(col('AGE') >= min_age)
+    if max_age is not None:
+        df = df.filter(col('AGE') <= max_age)
+    return (df.select('PATIENT_ID', 'FIRST', 'LAST', 'TOTAL_COST')
+              .sort(col('TOTAL_COST').desc())
+              .limit(max_patients))
+
+def cohort_contact_data(row):
+    """Build the Contact record for a cohort row; the synthetic dataset has no emails, so one is derived"""
+    first_name = str(row['FIRST'] or 'Unknown')
+    last_name = str(row['LAST'] or 'Patient')
+    local_part = re.sub(r'[^a-z0-9.]', '', f"{first_name}.{last_name}".lower())
+    email = f"{local_part}.pid{patient_id_literal(row['PATIENT_ID'])}@healthcaretest.com"
+    return build_contact_data(first_name, last_name, row['PATIENT_ID'], email, created_from='Snowflake cohort')
+
+def find_or_create_campaign(access_token, instance_url, campaign_name):
+    """Return (campaign_id, created)"""
+    records, _ = batch.query_all(access_token, instance_url,
+                                 f"SELECT Id FROM Campaign WHERE Name = {batch.soql_quote(campaign_name)} LIMIT 1")
+    if records:
+        return records[0]['Id'], False
+
+    response = transport.post(f"{instance_url}/services/data/{batch.API_VERSION}/sobjects/Campaign",
+                              headers=batch.json_headers(access_token),
+                              json=build_campaign_data(campaign_name, created_from='Snowflake cohort'))
+    if response.status_code != 201:
+        raise Exception(f"Failed to create campaign. Status: {response.status_code}, Response: {response.text}")
+    return response.json()['id'], True
+
+def fetch_batches(df, batch_size, batches, stop, stats):
+    """Producer: stream rows from Snowflake and queue them in batches; None marks the end"""
+    try:
+        rows = df.to_local_iterator()
+        current = []
+        while not stop.is_set():
+            started = time.perf_counter()
+            row = next(rows, None)
+            stats.seconds += time.perf_counter() - started
+            if row is None:
+                break
+            current.append(row)
+            stats.rows += 1
+            if len(current) >= batch_size:
+                batches.put(current)  # blocks while the writer is QUEUE_DEPTH batches behind
+                current = []
+        if current and not stop.is_set():
+            batches.put(current)
+    except Exception as e:
+        batches.put(e)
+    finally:
+        batches.put(None)
+
+def push_batch(access_token, instance_url, campaign_id, rows, stats):
+    """Consumer: resolve existing contacts/members with bulk reads, then create the rest with sObject Collections.
+    Returns (contacts_created, members_added, skipped, failures)."""
+    started = time.perf_counter()
+    patients = {}
+    for row in rows:
+        patients.setdefault(patient_id_key(row['PATIENT_ID']), row)
+
+    records, calls = batch.query_in_batches(
+        access_token, instance_url,
+        "SELECT Id, patient_id__c FROM Contact WHERE patient_id__c IN ({values})",
+        [patient_id_literal(pid) for pid in patients])
+    stats.api_calls += calls
+    existing = {}
+    for record in records:
+        if record.get('patient_id__c') is not None:
+            existing.setdefault(patient_id_key(record['patient_id__c']), record['Id'])
+
+    members = set()
+    if existing:
+        records, calls = batch.query_in_batches(
+            access_token, instance_url,
+            f"SELECT ContactId FROM CampaignMember WHERE CampaignId = '{campaign_id}' AND ContactId IN ({{values}})",
+            [f"'{contact_id}'" for contact_id in sorted(set(existing.values()))])
+        stats.api_calls += calls
+        members = {record['ContactId'] for record in records}
+
+    failures = []
+    new_patients = [pid for pid in patients if pid not in existing]
+    contacts_created = 0
+    if new_patients:
+        results = batch.create_collection(access_token, instance_url, 'Contact',
+                                          [cohort_contact_data(patients[pid]) for pid in new_patients])
+        stats.api_calls += math.ceil(len(new_patients) / batch.COLLECTION_BATCH_SIZE)
+        for pid, (contact_id, error) in zip(new_patients, results):
+            if contact_id:
+                existing[pid] = contact_id
+                contacts_created += 1
+            else:
+                failures.append(f"{patient_id_literal(pid)}: Failed to create contact ({error})")
+
+    skipped = sum(1 for contact_id in existing.values() if contact_id in members)
+    member_ids = sorted({contact_id for contact_id in existing.values() if contact_id not in members})
+    members_added = 0
+    if member_ids:
+        results = batch.create_collection(access_token, instance_url, 'CampaignMember', [
+            {"CampaignId": campaign_id, "ContactId": contact_id, "Status": "Sent"} for contact_id in member_ids
+        ])
+        stats.api_calls += math.ceil(len(member_ids) / batch.COLLECTION_BATCH_SIZE)
+        for contact_id, (member_id, error) in zip(member_ids, results):
+            if member_id:
+                members_added += 1
+            else:
+                failures.append(f"{contact_id}: Failed to add to campaign ({error})")
+
+    stats.rows += len(rows)
+    stats.seconds += time.perf_counter() - started
+    return contacts_created, members_added, skipped, failures
+
+def main(session, campaign_name, cost_category=None, state=None, min_age=None, max_age=None,
+         max_patients=10000, batch_size=200):
+    """Stream a Snowflake cohort into a Salesforce campaign; returns counts and per-stage throughput"""
+    try:
+        if not campaign_name or not isinstance(campaign_name, str):
+            return "ERROR: Campaign name is required and must be a string"
+        if cost_category and cost_category.upper() not in COST_CATEGORIES:
+            return f"ERROR: COST_CATEGORY must be one of {', '.join(COST_CATEGORIES)}"
+        batch_size = int(batch_size or MAX_BATCH_SIZE)
+        if batch_size < 1 or batch_size > MAX_BATCH_SIZE:
+            return f"ERROR: BATCH_SIZE must be between 1 and {MAX_BATCH_SIZE}"
+        max_patients = int(max_patients or 10000)
+
+        wall_started = time.perf_counter()
+        transport.reset_compression_stats()
+        circuit.use_persistent_breaker(session)
+        if transport.breaker_open():
+            return circuit.unavailable_result()
+        try:
+            access_token, sf_instance_url = auth.use_vended_token(session)
+        except Exception as e:
+            return circuit.error_result("Authentication failed", e)
+
+        try:
+            campaign_id, campaign_created = find_or_create_campaign(access_token, sf_instance_url, campaign_name)
+        except Exception as e:
+            return circuit.error_result("Failed to find or create campaign", e)
+
+        df = cohort_dataframe(session, cost_category, state, min_age, max_age, max_patients)
+        fetch_stats = StageStats('FETCH')
+        upload_stats = StageStats('UPLOAD')
+        batches = queue.Queue(maxsize=QUEUE_DEPTH)
+        stop = threading.Event()
+        fetcher = threading.Thread(target=fetch_batches, args=(df, batch_size, batches, stop, fetch_stats), daemon=True)
+        fetcher.start()
+
+        contacts_created = members_added = skipped = batch_count = 0
+        failures = []
+        error = None
+        try:
+            while True:
+                rows = batches.get()
+                if rows is None:
+                    break
+                if isinstance(rows, Exception):
+                    error = f"ERROR: Cohort query failed - {str(rows)}"
+                    break
+                batch_count += 1
+                created, added, already, batch_failures = push_batch(
+                    access_token, sf_instance_url, campaign_id, rows, upload_stats)
+                contacts_created += created
+                members_added += added
+                skipped += already
+                failures.extend(batch_failures)
+        except Exception as e:
+            error = circuit.error_result(f"Salesforce upload failed after {members_added} member(s)", e)
+        finally:
+            stop.set()
+            # Unblock the fetcher if it is waiting on a full queue
+            while fetcher.is_alive():
+                try:
+                    batches.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+        if error:
+            return error
+
+        wall_seconds = time.perf_counter() - wall_started
+        overlap_seconds = max(0.0, fetch_stats.seconds + upload_stats.seconds - wall_seconds)
+        filters = [f"COST_CATEGORY={cost_category.upper() if cost_category else 'ANY'}",
+                   f"STATE={state or 'ANY'}",
+                   f"AGE={min_age if min_age is not None else 0}-{max_age if max_age is not None else 'MAX'}"]
+        result_parts = [
+            f"CAMPAIGN: {campaign_name}",
+            f"CAMPAIGN_STATUS: {'CREATED' if campaign_created else 'EXISTING'}",
+            f"COHORT: {', '.join(filters)}",
+            f"PATIENTS_FETCHED: {fetch_stats.rows}",
+            f"BATCHES: {batch_count}",
+            f"CONTACTS_CREATED: {contacts_created}",
+            f"MEMBERS_ADDED: {members_added}",
+            f"SKIPPED_ALREADY_MEMBERS: {skipped}"
+        ]
+        if failures:
+            result_parts.append(f"FAILED: {len(failures)}")
+            failed_summary = "; ".join(failures[:5])
+            if len(failures) > 5:
+                failed_summary += f"; ... and {len(failures) - 5} more"
+            result_parts.append(f"FAILURE_DETAILS: {failed_summary}")
+        result_parts.extend([
+            fetch_stats.summary(),
+            upload_stats.summary(),
+            f"WALL: {wall_seconds:.2f}s ({fetch_stats.rows / wall_seconds if wall_seconds else 0:.0f} rows/s)",
+            f"OVERLAP: {overlap_seconds:.2f}s",
+            f"BYTES_SAVED: {transport.format_bytes_saved()}"
+        ])
+        return " | ".join(result_parts)
+
+    except Exception as e:
+        return circuit.error_result("Unexpected error in procedure", e)
+
+$$;
@@ -0,0 +1,88 @@
+-- Deploy Patient Insights Cache: memoized GENERATE_PATIENT_INSIGHTS
+-- Agents ask about the same high-cost patients repeatedly; each Cortex Complete call costs seconds and credits.
+-- Cache key: PATIENT_ID + MODEL, validated by a SHA-256 of the prompt inputs (name, age, gender, total cost),
+-- so a change in the patient's cost or demographics is a miss. Entries also expire after TTL_HOURS.
+-- Requires PATIENT_INSIGHTS_PROMPT from 06_custom_functions.sql
+
+USE DATABASE CUR_SYNTHETIC_HEALTHCARE;
+USE SCHEMA DEMO_ASSETS;
+USE WAREHOUSE CURWH_HEALTHCARE_DEMO_SMALL;
+
+-- One row per patient and model; a refresh replaces the row in place
+CREATE TABLE IF NOT EXISTS PATIENT_INSIGHTS_CACHE (
+    PATIENT_ID NUMBER NOT NULL,
+    MODEL STRING NOT NULL,
+    INPUT_HASH STRING NOT NULL,
+    INSIGHTS STRING,
+    CREATED_AT TIMESTAMP_LTZ NOT NULL,
+    EXPIRES_AT TIMESTAMP_LTZ NOT NULL
+)
+COMMENT = 'Memoized Cortex Complete output for GENERATE_PATIENT_INSIGHTS_CACHED';
+
+-- Returns cached insights when the entry is fresh and the prompt inputs are unchanged,
+-- otherwise calls Cortex Complete and stores the result
+CREATE OR REPLACE PROCEDURE GENERATE_PATIENT_INSIGHTS_CACHED(
+    PATIENT_ID NUMBER,
+    MODEL STRING DEFAULT 'snowflake-arctic',
+    TTL_HOURS NUMBER DEFAULT 168
+)
+RETURNS STRING
+LANGUAGE SQL
+COMMENT = 'Cached GENERATE_PATIENT_INSIGHTS: serves stored Cortex Complete output until the patient changes or the TTL expires'
+EXECUTE AS CALLER
+AS
+$$
+DECLARE
+    prompt STRING;
+    input_hash STRING;
+    insights STRING;
+BEGIN
+    prompt := (SELECT PATIENT_INSIGHTS_PROMPT(:PATIENT_ID));
+    IF (prompt IS NULL) THEN
+        RETURN NULL;
+    END IF;
+    input_hash := SHA2(:MODEL || '|' || prompt, 256);
+
+    insights := (
+        SELECT MAX(INSIGHTS)
+        FROM PATIENT_INSIGHTS_CACHE
+        WHERE PATIENT_ID = :PATIENT_ID
+          AND MODEL = :MODEL
+          AND INPUT_HASH = :input_hash
+          AND EXPIRES_AT > CURRENT_TIMESTAMP()
+    );
+    IF (insights IS NOT NULL) THEN
+        RETURN insights;
+    END IF;
+
+    insights := (SELECT SNOWFLAKE.CORTEX.COMPLETE(:MODEL, :prompt));
+
+    MERGE INTO PATIENT_INSIGHTS_CACHE c
+    USING (SELECT :PATIENT_ID AS PATIENT_ID, :MODEL AS MODEL) s
+    ON c.PATIENT_ID = s.PATIENT_ID AND c.MODEL = s.MODEL
+    WHEN MATCHED THEN UPDATE SET
+        INPUT_HASH = :input_hash,
+        INSIGHTS = :insights,
+        CREATED_AT = CURRENT_TIMESTAMP(),
+        EXPIRES_AT = DATEADD('hour', :TTL_HOURS, CURRENT_TIMESTAMP())
+    WHEN NOT MATCHED THEN INSERT (PATIENT_ID, MODEL, INPUT_HASH, INSIGHTS, CREATED_AT, EXPIRES_AT)
+        VALUES (:PATIENT_ID, :MODEL, :input_hash, :insights, CURRENT_TIMESTAMP(),
+                DATEADD('hour', :TTL_HOURS, CURRENT_TIMESTAMP()));
+
+    RETURN insights;
+END;
+$$;
+
+-- Test: first call is a miss (Cortex latency), second is served from the cache
+CALL GENERATE_PATIENT_INSIGHTS_CACHED(1992826);
+CALL GENERATE_PATIENT_INSIGHTS_CACHED(1992826);
+
+-- Cache contents; stale rows are replaced on the next call for that patient
+SELECT PATIENT_ID, MODEL, LEFT(INPUT_HASH, 12) AS input_hash, CREATED_AT, EXPIRES_AT,
+       EXPIRES_AT > CURRENT_TIMESTAMP() AS is_fresh
+FROM PATIENT_INSIGHTS_CACHE
+ORDER BY CREATED_AT DESC
+LIMIT 20;
+
+-- Optional maintenance: drop expired entries
+-- DELETE FROM PATIENT_INSIGHTS_CACHE WHERE EXPIRES_AT <= CURRENT_TIMESTAMP();
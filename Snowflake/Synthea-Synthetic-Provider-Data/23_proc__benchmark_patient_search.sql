@@ -0,0 +1,208 @@
+-- Deploy Cortex Search Benchmark: latency and result quality for the patient search services
+-- Runs a fixed query set (with attribute filters) against each service through SEARCH_PREVIEW,
+-- records p50/p95/p99 latency and top-k overlap with an exact SQL match on SEARCH_TEXT,
+-- and appends one row per service to SEARCH_BENCHMARK_RUNS.
+-- The result cache is off while timing (USE_CACHED_RESULT = FALSE, as in 08_semantic_model_timing.sql),
+-- so repeated identical calls are really executed; the caller's setting is restored afterwards.
+-- Requires the search services and PATIENT_SEARCH_ALL from 05_cortex_search_setup_fixed.sql
+
+USE DATABASE CUR_SYNTHETIC_HEALTHCARE;
+USE SCHEMA DEMO_ASSETS;
+USE WAREHOUSE CURWH_HEALTHCARE_DEMO_SMALL;
+
+-- One row per service per benchmark run; DETAILS holds per-query latency and overlap
+CREATE TABLE IF NOT EXISTS SEARCH_BENCHMARK_RUNS (
+    RUN_ID STRING NOT NULL,
+    RUN_AT TIMESTAMP_LTZ NOT NULL,
+    SERVICE STRING NOT NULL,
+    WAREHOUSE STRING,
+    QUERY_COUNT NUMBER,
+    ITERATIONS NUMBER,
+    TOP_K NUMBER,
+    P50_MS FLOAT,
+    P95_MS FLOAT,
+    P99_MS FLOAT,
+    MEAN_OVERLAP FLOAT,
+    DETAILS VARIANT
+)
+COMMENT = 'History of BENCHMARK_PATIENT_SEARCH runs';
+
+-- SERVICES: comma-separated service names in DEMO_ASSETS
+-- ITERATIONS: timed calls per query (after one untimed warm-up call)
+CREATE OR REPLACE PROCEDURE BENCHMARK_PATIENT_SEARCH(
+    ITERATIONS NUMBER DEFAULT 5,
+    TOP_K NUMBER DEFAULT 10,
+    SERVICES STRING DEFAULT 'PATIENT_SEARCH_FULL_SCALE,PATIENT_SEARCH_MAXIMUM_SCALE'
+)
+RETURNS STRING
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('snowflake-snowpark-python')
+HANDLER = 'main'
+EXECUTE AS CALLER
+AS
+$$
+import json
+import math
+import time
+import uuid
+
+SCHEMA = 'CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS'
+SEARCH_TABLE = f'{SCHEMA}.PATIENT_SEARCH_ALL'
+
+# Rows each service indexes, as a predicate on PATIENT_SEARCH_ALL (for the exact match)
+SERVICE_SCOPES = {
+    'PATIENT_SEARCH_FULL_SCALE': "COST_CATEGORY <> 'LOW'",
+    'PATIENT_SEARCH_MAXIMUM_SCALE': "TRUE"
+}
+
+# Fixed query set: (query text, equality filters on search attributes)
+QUERIES = [
+    ("Olson", {}),
+    ("Refugio Olson", {}),
+    ("Smith Boston", {}),
+    ("Garcia", {"STATE": "Massachusetts"}),
+    ("Johnson Springfield", {"COST_CATEGORY": "HIGH"}),
+    ("Nguyen", {"COST_CATEGORY": "MILLION+"}),
+    ("Williams Worcester", {"STATE": "Massachusetts", "COST_CATEGORY": "CRITICAL"}),
+    ("Brown", {"COST_CATEGORY": "ULTRA-HIGH"})
+]
+
+def sql_literal(value):
+    """Quote a value as a SQL string literal"""
+    return "'" + str(value).replace('\\', '\\\\').replace("'", "''") + "'"
+
+def search_filter(filters):
+    """Cortex Search filter object for equality filters"""
+    clauses = [{"@eq": {column: value}} for column, value in filters.items()]
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"@and": clauses}
+
+def search_request(query, filters, top_k):
+    request = {"query": query, "columns": ["PATIENT_ID"], "limit": top_k}
+    condition = search_filter(filters)
+    if condition:
+        request["filter"] = condition
+    return json.dumps(request)
+
+def run_search(session, service, request):
+    """One SEARCH_PREVIEW call; returns (elapsed ms, patient ids)"""
+    statement = (f"SELECT SNOWFLAKE.CORTEX.SEARCH_PREVIEW({sql_literal(f'{SCHEMA}.{service}')}, "
+                 f"{sql_literal(request)})")
+    started = time.perf_counter()
+    rows = session.sql(statement).collect()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    results = json.loads(rows[0][0]).get('results', [])
+    return elapsed_ms, [int(float(result['PATIENT_ID'])) for result in results if result.get('PATIENT_ID') is not None]
+
+def exact_overlap(session, service, query, filters, patient_ids, top_k):
+    """Share of the exact SQL matches (every query token in SEARCH_TEXT) that the search returned in its top k"""
+    conditions = [SERVICE_SCOPES.get(service, 'TRUE')]
+    conditions += [f"SEARCH_TEXT ILIKE {sql_literal('%' + token + '%')}" for token in query.split()]
+    conditions += [f"{column} = {sql_literal(value)}" for column, value in filters.items()]
+    id_list = ', '.join(str(pid) for pid in patient_ids) or 'NULL'
+    row = session.sql(
+        f"SELECT COUNT(*) AS EXACT_TOTAL, COUNT_IF(PATIENT_ID IN ({id_list})) AS HITS "
+        f"FROM {SEARCH_TABLE} WHERE {' AND '.join(conditions)}"
+    ).collect()[0]
+    expected = min(top_k, row['EXACT_TOTAL'])
+    return (row['HITS'] / expected if expected else 1.0), row['EXACT_TOTAL']
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+def benchmark_service(session, service, iterations, top_k):
+    latencies = []
+    details = []
+    for query, filters in QUERIES:
+        request = search_request(query, filters, top_k)
+        _warmup_ms, patient_ids = run_search(session, service, request)
+        query_latencies = [run_search(session, service, request)[0] for _ in range(iterations)]
+        overlap, exact_total = exact_overlap(session, service, query, filters, patient_ids, top_k)
+        latencies.extend(query_latencies)
+        details.append({
+            "query": query,
+            "filters": filters,
+            "p50_ms": round(percentile(query_latencies, 50), 1),
+            "results": len(patient_ids),
+            "exact_matches": exact_total,
+            "overlap": round(overlap, 3)
+        })
+    return {
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "overlap": sum(d["overlap"] for d in details) / len(details),
+        "details": details
+    }
+
+def use_cached_result(session):
+    """The session's USE_CACHED_RESULT setting, as TRUE or FALSE"""
+    rows = session.sql("SHOW PARAMETERS LIKE 'USE_CACHED_RESULT' IN SESSION").collect()
+    return 'FALSE' if rows and str(rows[0]['value']).lower() == 'false' else 'TRUE'
+
+def main(session, iterations=5, top_k=10, services='PATIENT_SEARCH_FULL_SCALE,PATIENT_SEARCH_MAXIMUM_SCALE'):
+    """Benchmark each service and store one SEARCH_BENCHMARK_RUNS row per service"""
+    try:
+        iterations = int(iterations if iterations is not None else 5)
+        top_k = int(top_k if top_k is not None else 10)
+        if iterations < 1 or top_k < 1:
+            return "ERROR: ITERATIONS and TOP_K must be at least 1"
+        service_names = [name.strip().upper() for name in (services or '').split(',') if name.strip()]
+        if not service_names:
+            return "ERROR: At least one service is required"
+
+        run_id = str(uuid.uuid4())
+        warehouse = session.get_current_warehouse()
+        result_parts = [f"RUN_ID: {run_id}", f"QUERIES: {len(QUERIES)} x {iterations}", f"TOP_K: {top_k}"]
+        cached_result = use_cached_result(session)
+        session.sql("ALTER SESSION SET USE_CACHED_RESULT = FALSE").collect()
+        try:
+            for service in service_names:
+                try:
+                    stats = benchmark_service(session, service, iterations, top_k)
+                except Exception as e:
+                    result_parts.append(f"{service}: ERROR - {str(e)}")
+                    continue
+                session.sql(
+                    f"INSERT INTO {SCHEMA}.SEARCH_BENCHMARK_RUNS "
+                    "(RUN_ID, RUN_AT, SERVICE, WAREHOUSE, QUERY_COUNT, ITERATIONS, TOP_K, P50_MS, P95_MS, P99_MS, MEAN_OVERLAP, DETAILS) "
+                    "SELECT ?, CURRENT_TIMESTAMP(), ?, ?, ?, ?, ?, ?, ?, ?, ?, PARSE_JSON(?)",
+                    params=[run_id, service, warehouse, len(QUERIES), iterations, top_k,
+                            stats["p50"], stats["p95"], stats["p99"], stats["overlap"], json.dumps(stats["details"])]
+                ).collect()
+                result_parts.append(
+                    f"{service}: p50={stats['p50']:.0f}ms p95={stats['p95']:.0f}ms p99={stats['p99']:.0f}ms "
+                    f"overlap@{top_k}={stats['overlap']:.2f}"
+                )
+        finally:
+            session.sql(f"ALTER SESSION SET USE_CACHED_RESULT = {cached_result}").collect()
+        return " | ".join(result_parts)
+
+    except Exception as e:
+        return f"ERROR: Unexpected error in procedure - {str(e)}"
+
+$$;
+
+-- Run the benchmark (adjust ITERATIONS for tighter percentiles)
+CALL BENCHMARK_PATIENT_SEARCH();
+
+-- Compare runs, e.g. before and after changing TARGET_LAG, attributes or warehouse size
+SELECT RUN_AT, SERVICE, WAREHOUSE, ITERATIONS, TOP_K,
+       ROUND(P50_MS) AS p50_ms, ROUND(P95_MS) AS p95_ms, ROUND(P99_MS) AS p99_ms,
+       ROUND(MEAN_OVERLAP, 2) AS mean_overlap
+FROM SEARCH_BENCHMARK_RUNS
+ORDER BY RUN_AT DESC, SERVICE
+LIMIT 20;
+
+-- Per-query breakdown of the latest run
+SELECT r.SERVICE, d.VALUE:query::STRING AS query, d.VALUE:p50_ms::FLOAT AS p50_ms,
+       d.VALUE:results::NUMBER AS results, d.VALUE:exact_matches::NUMBER AS exact_matches,
+       d.VALUE:overlap::FLOAT AS overlap
+FROM SEARCH_BENCHMARK_RUNS r, LATERAL FLATTEN(INPUT => r.DETAILS) d
+WHERE r.RUN_ID = (SELECT RUN_ID FROM SEARCH_BENCHMARK_RUNS ORDER BY RUN_AT DESC LIMIT 1)
+ORDER BY r.SERVICE, query;
@@ -0,0 +1,265 @@
+-- Deploy Campaign Member Reverse Sync: Salesforce campaign responses -> Snowflake
+-- Pulls Contact (patient_id__c cross-reference) and CampaignMember rows changed since the last sync,
+-- watermarked by SystemModstamp. Deltas above BULK_THRESHOLD rows go through a Bulk API 2.0 query job,
+-- smaller ones through the REST query endpoint. Rows land with write_pandas in a temporary table
+-- and are merged, so re-reading the watermark second is harmless.
+-- Requires the shared sfclient.zip on HEALTHCARE_DEMO_STAGE (see the Readme) and GET_SALESFORCE_TOKEN (script 19).
+
+USE DATABASE CUR_SYNTHETIC_HEALTHCARE;
+USE SCHEMA DEMO_ASSETS;
+USE WAREHOUSE CURWH_HEALTHCARE_DEMO_SMALL;
+
+-- Salesforce Contact -> Snowflake PATIENT_ID (contacts without patient_id__c are not synced)
+CREATE TABLE IF NOT EXISTS SALESFORCE_CONTACT_XREF (
+    CONTACT_ID STRING NOT NULL,
+    PATIENT_ID NUMBER,
+    EMAIL STRING,
+    SYSTEM_MODSTAMP TIMESTAMP_TZ,
+    SYNCED_AT TIMESTAMP_LTZ
+)
+COMMENT = 'LINEAGE: Salesforce Contact.patient_id__c cross-reference (SYNC_CAMPAIGN_MEMBERS_FROM_SALESFORCE)';
+
+-- One row per Salesforce CampaignMember
+CREATE TABLE IF NOT EXISTS SALESFORCE_CAMPAIGN_MEMBERS (
+    CAMPAIGN_MEMBER_ID STRING NOT NULL,
+    CAMPAIGN_ID STRING,
+    CAMPAIGN_NAME STRING,
+    CONTACT_ID STRING,
+    STATUS STRING,
+    HAS_RESPONDED BOOLEAN,
+    SYSTEM_MODSTAMP TIMESTAMP_TZ,
+    SYNCED_AT TIMESTAMP_LTZ
+)
+COMMENT = 'LINEAGE: Salesforce CampaignMember status (SYNC_CAMPAIGN_MEMBERS_FROM_SALESFORCE)';
+
+-- Campaign status per patient, ready to join with PATIENTS / PATIENT_COST_SUMMARY
+CREATE OR REPLACE VIEW CAMPAIGN_MEMBER_PATIENTS
+COMMENT = 'Salesforce campaign membership and response status joined to PATIENT_ID'
+AS
+SELECT
+  x.PATIENT_ID,
+  m.CAMPAIGN_ID, m.CAMPAIGN_NAME, m.CONTACT_ID,
+  m.STATUS, m.HAS_RESPONDED,
+  m.SYSTEM_MODSTAMP as STATUS_UPDATED_AT,
+  m.SYNCED_AT
+FROM SALESFORCE_CAMPAIGN_MEMBERS m
+LEFT JOIN SALESFORCE_CONTACT_XREF x ON x.CONTACT_ID = m.CONTACT_ID;
+
+-- FULL_REFRESH:   ignore the watermark, re-read everything and delete rows no longer in Salesforce
+--                 (an incremental run cannot see deleted members)
+-- BULK_THRESHOLD: changed rows above which a Bulk API 2.0 query job is used instead of REST paging
+CREATE OR REPLACE PROCEDURE SYNC_CAMPAIGN_MEMBERS_FROM_SALESFORCE(
+    FULL_REFRESH BOOLEAN DEFAULT FALSE,
+    BULK_THRESHOLD NUMBER DEFAULT 2000
+)
+RETURNS STRING
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('requests', 'snowflake-snowpark-python', 'pandas')
+HANDLER = 'main'
+IMPORTS = ('@CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.HEALTHCARE_DEMO_STAGE/sfclient.zip')
+EXTERNAL_ACCESS_INTEGRATIONS = (SALESFORCE_SYNTHEA_INTEGRATION_JDB)
+EXECUTE AS CALLER
+AS
+$$
+import time
+import pandas as pd
+
+from sfclient import auth, batch, circuit, transport
+
+SCHEMA = 'CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS'
+
+# Salesforce CSV / REST field -> Snowflake column, per synced object.
+# KEY is the merge key; the landing table holds strings and the MERGE casts them.
+SYNC_OBJECTS = [
+    {
+        'name': 'CONTACTS',
+        'sobject': 'Contact',
+        'where': 'patient_id__c != null',
+        'table': 'SALESFORCE_CONTACT_XREF',
+        'key': 'CONTACT_ID',
+        'fields': {
+            'Id': 'CONTACT_ID',
+            'patient_id__c': 'PATIENT_ID',
+            'Email': 'EMAIL',
+            'SystemModstamp': 'SYSTEM_MODSTAMP'
+        },
+        'casts': {'PATIENT_ID': 'TRY_TO_NUMBER({})'}
+    },
+    {
+        'name': 'CAMPAIGN_MEMBERS',
+        'sobject': 'CampaignMember',
+        'where': 'ContactId != null',
+        'table': 'SALESFORCE_CAMPAIGN_MEMBERS',
+        'key': 'CAMPAIGN_MEMBER_ID',
+        'fields': {
+            'Id': 'CAMPAIGN_MEMBER_ID',
+            'CampaignId': 'CAMPAIGN_ID',
+            'Campaign.Name': 'CAMPAIGN_NAME',
+            'ContactId': 'CONTACT_ID',
+            'Status': 'STATUS',
+            'HasResponded': 'HAS_RESPONDED',
+            'SystemModstamp': 'SYSTEM_MODSTAMP'
+        },
+        'casts': {'HAS_RESPONDED': 'TRY_TO_BOOLEAN({})'}
+    }
+]
+
+# REST returns 2025-09-19T12:34:56.000+0000, Bulk CSV 2025-09-19T12:34:56.000Z
+TIMESTAMP_CAST = "TRY_TO_TIMESTAMP_TZ(REPLACE({}, 'Z', '+0000'), 'YYYY-MM-DD\"T\"HH24:MI:SS.FFTZHTZM')"
+
+def get_watermark(session, table):
+    """Latest SystemModstamp already synced, as a SOQL datetime literal (None when the table is empty)"""
+    row = session.sql(
+        f"SELECT TO_VARCHAR(CONVERT_TIMEZONE('UTC', MAX(SYSTEM_MODSTAMP)), 'YYYY-MM-DD\"T\"HH24:MI:SS\"Z\"') AS WATERMARK "
+        f"FROM {SCHEMA}.{table}"
+    ).collect()[0]
+    return row['WATERMARK']
+
+def flatten_record(record, prefix=''):
+    """Flatten a REST query record to the dotted field names Bulk API CSV uses (Campaign.Name)"""
+    flat = {}
+    for key, value in record.items():
+        if key == 'attributes':
+            continue
+        if isinstance(value, dict):
+            flat.update(flatten_record(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+def fetch_changes(access_token, instance_url, spec, watermark, bulk_threshold):
+    """Read changed rows for one object; returns (records, mode, api_calls)"""
+    where = spec['where']
+    if watermark:
+        where += f" AND SystemModstamp >= {watermark}"
+    soql_from = f"FROM {spec['sobject']} WHERE {where}"
+
+    changed = batch.count_query(access_token, instance_url, f"SELECT COUNT() {soql_from}")
+    if not changed:
+        return [], 'NONE', 1
+
+    soql = f"SELECT {', '.join(spec['fields'])} {soql_from}"
+    if changed > bulk_threshold:
+        result = batch.bulk_query(access_token, instance_url, soql)
+        if result['state'] != 'JobComplete':
+            raise Exception(f"Bulk query job {result['job_id']} ended in state {result['state']}: "
+                            f"{result['error_message']}")
+        return result['records'], 'BULK', 1 + result['api_calls']
+
+    records, calls = batch.query_all(access_token, instance_url, f"{soql} ORDER BY SystemModstamp")
+    return [flatten_record(record) for record in records], 'REST', 1 + calls
+
+def to_frame(records, spec):
+    """Map Salesforce fields to landing columns; everything is kept as text (Bulk CSV has no types)"""
+    columns = list(spec['fields'].values())
+    rows = []
+    for record in records:
+        row = []
+        for field in spec['fields']:
+            value = record.get(field)
+            row.append(None if value is None or value == '' else str(value))
+        rows.append(row)
+    return pd.DataFrame(rows, columns=columns, dtype=object)
+
+def land_and_merge(session, spec, frame, full_refresh):
+    """write_pandas into a temporary landing table, then MERGE into the target; returns rows deleted"""
+    landing = f"{spec['table']}_LANDING"
+    session.write_pandas(frame, landing, database='CUR_SYNTHETIC_HEALTHCARE', schema='DEMO_ASSETS',
+                         auto_create_table=True, overwrite=True, table_type='temporary')
+
+    key = spec['key']
+    columns = list(spec['fields'].values())
+    source = []
+    for column in columns:
+        expression = f's."{column}"'
+        if column == 'SYSTEM_MODSTAMP':
+            expression = TIMESTAMP_CAST.format(expression)
+        elif column in spec['casts']:
+            expression = spec['casts'][column].format(expression)
+        source.append(f"{expression} AS {column}")
+
+    session.sql(
+        f"MERGE INTO {SCHEMA}.{spec['table']} t "
+        f"USING (SELECT {', '.join(source)} FROM {SCHEMA}.{landing} s) s ON t.{key} = s.{key} "
+        f"WHEN MATCHED THEN UPDATE SET {', '.join(f't.{c} = s.{c}' for c in columns if c != key)}, "
+        f"t.SYNCED_AT = CURRENT_TIMESTAMP() "
+        f"WHEN NOT MATCHED THEN INSERT ({', '.join(columns)}, SYNCED_AT) "
+        f"VALUES ({', '.join(f's.{c}' for c in columns)}, CURRENT_TIMESTAMP())"
+    ).collect()
+
+    deleted = 0
+    if full_refresh:
+        row = session.sql(
+            f"DELETE FROM {SCHEMA}.{spec['table']} t WHERE NOT EXISTS "
+            f"(SELECT 1 FROM {SCHEMA}.{landing} s WHERE s.\"{key}\" = t.{key})"
+        ).collect()[0]
+        deleted = int(row[0])
+    return deleted
+
+def main(session, full_refresh=False, bulk_threshold=2000):
+    """Incrementally sync Contact cross-references and CampaignMember status into Snowflake"""
+    try:
+        full_refresh = bool(full_refresh)
+        bulk_threshold = int(bulk_threshold if bulk_threshold is not None else 2000)
+        if bulk_threshold < 0:
+            return "ERROR: BULK_THRESHOLD must be 0 or greater"
+
+        started = time.perf_counter()
+        circuit.use_persistent_breaker(session)
+        if transport.breaker_open():
+            return circuit.unavailable_result()
+        try:
+            access_token, instance_url = auth.use_vended_token(session)
+        except Exception as e:
+            return circuit.error_result("Authentication failed", e)
+
+        result_parts = [f"MODE: {'FULL_REFRESH' if full_refresh else 'INCREMENTAL'}"]
+        api_calls = 0
+        for spec in SYNC_OBJECTS:
+            watermark = None if full_refresh else get_watermark(session, spec['table'])
+            try:
+                records, mode, calls = fetch_changes(access_token, instance_url, spec, watermark, bulk_threshold)
+            except Exception as e:
+                return " | ".join(result_parts + [circuit.error_result(f"{spec['sobject']} export failed", e)])
+            api_calls += calls
+
+            # An empty export never triggers the FULL_REFRESH delete; it is more likely a permission problem
+            if not records:
+                result_parts.append(f"{spec['name']}: 0 changed since {watermark or 'start'}")
+                continue
+            deleted = land_and_merge(session, spec, to_frame(records, spec), full_refresh)
+            summary = f"{spec['name']}: {len(records)} rows via {mode} since {watermark or 'start'}"
+            if full_refresh:
+                summary += f", {deleted} deleted"
+            result_parts.append(summary)
+
+        result_parts.append(f"API_CALLS: {api_calls}")
+        result_parts.append(f"ELAPSED: {time.perf_counter() - started:.2f}s")
+        return " | ".join(result_parts)
+
+    except Exception as e:
+        return circuit.error_result("Unexpected error in procedure", e)
+
+$$;
+
+-- First run loads everything; later runs only read rows changed since the stored watermark
+CALL SYNC_CAMPAIGN_MEMBERS_FROM_SALESFORCE();
+
+-- Optional: sync every hour
+-- CREATE OR REPLACE TASK SYNC_CAMPAIGN_MEMBERS
+--   WAREHOUSE = CURWH_HEALTHCARE_DEMO_SMALL
+--   SCHEDULE = '60 MINUTE'
+-- AS
+--   CALL SYNC_CAMPAIGN_MEMBERS_FROM_SALESFORCE();
+-- ALTER TASK SYNC_CAMPAIGN_MEMBERS RESUME;
+
+-- Outreach status against cost outcomes (PATIENT_COST_SUMMARY from 07_cost_aggregates.sql)
+SELECT c.CAMPAIGN_NAME, c.STATUS, COUNT(*) AS patients,
+       COUNT_IF(c.HAS_RESPONDED) AS responded,
+       ROUND(AVG(p.TOTAL_COST)) AS avg_total_cost,
+       ROUND(AVG(p.TOTAL_CHARGES)) AS avg_claim_charges
+FROM CAMPAIGN_MEMBER_PATIENTS c
+JOIN PATIENT_COST_SUMMARY p ON p.PATIENT_ID = c.PATIENT_ID
+GROUP BY 1, 2
+ORDER BY 1, patients DESC;
@@ -89,6 +89,54 @@ CALL SALESFORCE_CAMPAIGN_MANAGER(
     ]'
 );
 
+-- Test 5: Profiled run (appends PROFILE_BREAKDOWN and PROFILE_TOP to the result)
+SELECT 'Test 5: Profiled run of an existing patient...' as test_status;
+
+CALL SALESFORCE_CAMPAIGN_MANAGER(
+    'Single Existing Patient Test',
+    '[
+        {
+            "name": "Beth Rodriguez Final",
+            "patient_id": 300002,
+            "email": "beth.final@healthcaretest.com"
+        }
+    ]',
+    TRUE
+);
+
+-- Test 6: Dry-run plan (no writes) and AUTO strategy
+SELECT 'Test 6: Plan then execute with the cheapest strategy...' as test_status;
+
+CALL SALESFORCE_CAMPAIGN_MANAGER(
+    CAMPAIGN_NAME => 'Mixed Patient ID Test Campaign',
+    PATIENTS_JSON => '[
+        {"name": "Alex Thompson", "patient_id": 300001, "email": "alex.third@healthcaretest.com"},
+        {"name": "Dana Lee", "patient_id": 300004, "email": "dana.lee.pid@healthcaretest.com"}
+    ]',
+    PLAN_ONLY => TRUE
+);
+
+CALL SALESFORCE_CAMPAIGN_MANAGER(
+    CAMPAIGN_NAME => 'Mixed Patient ID Test Campaign',
+    PATIENTS_JSON => '[
+        {"name": "Alex Thompson", "patient_id": 300001, "email": "alex.third@healthcaretest.com"},
+        {"name": "Dana Lee", "patient_id": 300004, "email": "dana.lee.pid@healthcaretest.com"}
+    ]',
+    STRATEGY => 'AUTO'
+);
+
+-- Test 7: Composite Graph (one round trip; Alex is already a member, so only his graph rolls back)
+SELECT 'Test 7: GRAPH strategy in a single Composite Graph request...' as test_status;
+
+CALL SALESFORCE_CAMPAIGN_MANAGER(
+    CAMPAIGN_NAME => 'Mixed Patient ID Test Campaign',
+    PATIENTS_JSON => '[
+        {"name": "Alex Thompson", "patient_id": 300001, "email": "alex.third@healthcaretest.com"},
+        {"name": "Evan Park", "patient_id": 300005, "email": "evan.park.pid@healthcaretest.com"}
+    ]',
+    STRATEGY => 'GRAPH'
+);
+
 -- Show completion
 SELECT CURRENT_TIMESTAMP as patient_id_test_completed;
 
@@ -0,0 +1,50 @@
+USE DATABASE CUR_SYNTHETIC_HEALTHCARE;
+USE SCHEMA DEMO_ASSETS;
+USE WAREHOUSE CURWH_HEALTHCARE_DEMO_SMALL;
+
+-- Preview the cohort the calls below will push
+SELECT COST_CATEGORY, STATE, COUNT(*) AS patients, MIN(AGE) AS min_age, MAX(AGE) AS max_age
+FROM PATIENT_SEARCH_OPTIMIZED
+WHERE COST_CATEGORY = 'HIGH' AND UPPER(STATE) = 'MASSACHUSETTS' AND AGE >= 65
+GROUP BY COST_CATEGORY, STATE;
+
+-- Test 1: Small cohort (one batch)
+SELECT 'Test 1: Top 25 ULTRA-HIGH cost patients...' as test_status;
+
+CALL PUSH_COHORT_TO_SALESFORCE(
+    CAMPAIGN_NAME => 'Cohort Push Test - Ultra High',
+    COST_CATEGORY => 'ULTRA-HIGH',
+    MAX_PATIENTS => 25
+);
+
+-- Test 2: Filtered cohort across several batches (fetch and upload overlap)
+SELECT 'Test 2: HIGH cost seniors in Massachusetts, 100 per batch...' as test_status;
+
+CALL PUSH_COHORT_TO_SALESFORCE(
+    CAMPAIGN_NAME => 'Cohort Push Test - MA Seniors',
+    COST_CATEGORY => 'HIGH',
+    STATE => 'Massachusetts',
+    MIN_AGE => 65,
+    MAX_PATIENTS => 1000,
+    BATCH_SIZE => 100
+);
+
+-- Test 3: Re-run Test 2 (everyone should be reported as SKIPPED_ALREADY_MEMBERS)
+SELECT 'Test 3: Re-running Test 2 (no new contacts or members expected)...' as test_status;
+
+CALL PUSH_COHORT_TO_SALESFORCE(
+    CAMPAIGN_NAME => 'Cohort Push Test - MA Seniors',
+    COST_CATEGORY => 'HIGH',
+    STATE => 'Massachusetts',
+    MIN_AGE => 65,
+    MAX_PATIENTS => 1000,
+    BATCH_SIZE => 100
+);
+
+-- Test 4: Invalid cost category (should return an ERROR string)
+SELECT 'Test 4: Invalid COST_CATEGORY...' as test_status;
+
+CALL PUSH_COHORT_TO_SALESFORCE(
+    CAMPAIGN_NAME => 'Cohort Push Test - Invalid',
+    COST_CATEGORY => 'EXPENSIVE'
+);
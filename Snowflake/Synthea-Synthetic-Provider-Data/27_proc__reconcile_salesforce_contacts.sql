@@ -0,0 +1,256 @@
+-- Deploy Contact Reconciliation: Snowflake PATIENTS_FULL_SCALE vs Salesforce Contacts
+-- Exports every Contact with a patient_id__c through parallel Bulk API 2.0 query jobs, one per Id range
+-- (client-side PK chunking). Result pages are written straight to HEALTHCARE_DEMO_STAGE and loaded with COPY.
+-- The diff itself is set-based SQL, so the full 1.4M population reconciles in one pass instead of
+-- eyeballing find_duplicate_patient_ids.py output.
+-- Requires the shared sfclient.zip on HEALTHCARE_DEMO_STAGE (see the Readme) and
+-- PATIENTS_FULL_SCALE from 05_cortex_search_setup_fixed.sql; tokens come from GET_SALESFORCE_TOKEN (script 19)
+
+USE DATABASE CUR_SYNTHETIC_HEALTHCARE;
+USE SCHEMA DEMO_ASSETS;
+USE WAREHOUSE CURWH_HEALTHCARE_DEMO_SMALL;
+
+-- Latest Contact export (replaced on every run)
+CREATE TABLE IF NOT EXISTS SALESFORCE_CONTACTS_EXPORT (
+    CONTACT_ID STRING NOT NULL,
+    FIRST_NAME STRING,
+    LAST_NAME STRING,
+    EMAIL STRING,
+    PATIENT_ID NUMBER,
+    CREATED_DATE TIMESTAMP_TZ,
+    SYSTEM_MODSTAMP TIMESTAMP_TZ
+)
+COMMENT = 'LINEAGE: Bulk export of Salesforce Contacts with patient_id__c (RECONCILE_SALESFORCE_CONTACTS)';
+
+-- One row per reconciliation run
+CREATE TABLE IF NOT EXISTS RECONCILIATION_RUNS (
+    RUN_ID STRING NOT NULL,
+    RUN_AT TIMESTAMP_LTZ NOT NULL,
+    CONTACTS_EXPORTED NUMBER,
+    DUPLICATE_CONTACTS NUMBER,
+    ORPHAN_CONTACTS NUMBER,
+    EMAIL_MISMATCHES NUMBER,
+    NAME_MISMATCHES NUMBER,
+    EXPORT_SECONDS FLOAT,
+    DIFF_SECONDS FLOAT
+)
+COMMENT = 'History of RECONCILE_SALESFORCE_CONTACTS runs';
+
+-- CHUNKS:   Id ranges (one Bulk API 2.0 query job each)
+-- PARALLEL: query jobs running at the same time
+CREATE OR REPLACE PROCEDURE RECONCILE_SALESFORCE_CONTACTS(
+    CHUNKS NUMBER DEFAULT 8,
+    PARALLEL NUMBER DEFAULT 4
+)
+RETURNS STRING
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('requests', 'snowflake-snowpark-python')
+HANDLER = 'main'
+IMPORTS = ('@CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.HEALTHCARE_DEMO_STAGE/sfclient.zip')
+EXTERNAL_ACCESS_INTEGRATIONS = (SALESFORCE_SYNTHEA_INTEGRATION_JDB)
+EXECUTE AS CALLER
+AS
+$$
+import io
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sfclient import auth, batch, circuit, transport
+
+SCHEMA = 'CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS'
+STAGE = f'@{SCHEMA}.HEALTHCARE_DEMO_STAGE/contact_export'
+PATIENTS_TABLE = f'{SCHEMA}.PATIENTS_FULL_SCALE'
+EXPORT_TABLE = f'{SCHEMA}.SALESFORCE_CONTACTS_EXPORT'
+
+# Field order matches the COPY column list below
+EXPORT_FIELDS = ('Id', 'FirstName', 'LastName', 'Email', 'patient_id__c', 'CreatedDate', 'SystemModstamp')
+EXPORT_WHERE = 'patient_id__c != null'
+MAX_CHUNKS = 64
+
+# Bulk CSV timestamps look like 2025-09-19T12:34:56.000Z
+TIMESTAMP_FORMAT = 'YYYY-MM-DD"T"HH24:MI:SS.FF3"Z"'
+
+# Mismatch table -> query over the export (e) and PATIENTS_FULL_SCALE (p); each is rebuilt per run
+MISMATCH_TABLES = {
+    # Same patient pushed more than once; KEEP_CONTACT marks the oldest contact
+    'RECON_DUPLICATE_CONTACTS': f"""
+        SELECT e.PATIENT_ID, e.CONTACT_ID, e.FIRST_NAME, e.LAST_NAME, e.EMAIL, e.CREATED_DATE,
+               COUNT(*) OVER (PARTITION BY e.PATIENT_ID) AS CONTACTS_FOR_PATIENT,
+               ROW_NUMBER() OVER (PARTITION BY e.PATIENT_ID ORDER BY e.CREATED_DATE, e.CONTACT_ID) = 1 AS KEEP_CONTACT
+        FROM {EXPORT_TABLE} e
+        QUALIFY CONTACTS_FOR_PATIENT > 1""",
+    # patient_id__c that no longer exists in Snowflake
+    'RECON_ORPHAN_CONTACTS': f"""
+        SELECT e.CONTACT_ID, e.PATIENT_ID, e.FIRST_NAME, e.LAST_NAME, e.EMAIL, e.CREATED_DATE
+        FROM {EXPORT_TABLE} e
+        WHERE NOT EXISTS (SELECT 1 FROM {PATIENTS_TABLE} p WHERE p.PATIENT_ID = e.PATIENT_ID)""",
+    # Email whose pid<N> tag names another patient, or one email shared by different patients
+    'RECON_EMAIL_MISMATCHES': f"""
+        SELECT e.CONTACT_ID, e.PATIENT_ID, e.EMAIL,
+               TRY_TO_NUMBER(REGEXP_SUBSTR(e.EMAIL, '\\\\.pid([0-9]+)@', 1, 1, 'e', 1)) AS EMAIL_PATIENT_ID,
+               COUNT(DISTINCT e.PATIENT_ID) OVER (PARTITION BY LOWER(e.EMAIL)) AS PATIENTS_SHARING_EMAIL,
+               IFF(EMAIL_PATIENT_ID IS NOT NULL AND EMAIL_PATIENT_ID <> e.PATIENT_ID,
+                   'EMAIL_PATIENT_ID_MISMATCH', 'SHARED_EMAIL') AS REASON
+        FROM {EXPORT_TABLE} e
+        WHERE e.EMAIL IS NOT NULL
+        QUALIFY (EMAIL_PATIENT_ID IS NOT NULL AND EMAIL_PATIENT_ID <> e.PATIENT_ID)
+             OR PATIENTS_SHARING_EMAIL > 1""",
+    # Linked to an existing patient whose name differs
+    'RECON_NAME_MISMATCHES': f"""
+        SELECT e.CONTACT_ID, e.PATIENT_ID, e.FIRST_NAME, e.LAST_NAME,
+               p.FIRST AS PATIENT_FIRST, p.LAST AS PATIENT_LAST
+        FROM {EXPORT_TABLE} e
+        JOIN {PATIENTS_TABLE} p ON p.PATIENT_ID = e.PATIENT_ID
+        WHERE NOT EQUAL_NULL(UPPER(e.FIRST_NAME), UPPER(p.FIRST))
+           OR NOT EQUAL_NULL(UPPER(e.LAST_NAME), UPPER(p.LAST))"""
+}
+
+class StageWriter:
+    """Uploads CSV pages to the run's stage folder; one upload at a time on the shared session"""
+    def __init__(self, session, folder):
+        self.session = session
+        self.folder = folder
+        self.lock = threading.Lock()
+        self.files = 0
+
+    def put(self, name, text):
+        with self.lock:
+            self.session.file.put_stream(io.BytesIO(text.encode('utf-8')), f"{self.folder}/{name}.csv",
+                                         auto_compress=True, overwrite=True)
+            self.files += 1
+
+def export_chunk(access_token, instance_url, index, condition, writer):
+    """Run one Id-range query job and stream its result pages to the stage; returns (rows, api_calls)"""
+    soql = f"SELECT {', '.join(EXPORT_FIELDS)} FROM Contact WHERE {condition}"
+    job_id = batch.start_bulk_query(access_token, instance_url, soql)
+    job, calls = batch.wait_bulk_query(access_token, instance_url, job_id)
+    if job.get('state') != 'JobComplete':
+        raise Exception(f"Query job {job_id} (chunk {index}) ended in state {job.get('state')}: "
+                        f"{job.get('errorMessage')}")
+    calls += 1
+    for page_number, page in enumerate(batch.bulk_query_pages(access_token, instance_url, job_id), 1):
+        writer.put(f"chunk{index:02d}_page{page_number:04d}", page)
+        calls += 1
+    return int(job.get('numberRecordsProcessed') or 0), calls
+
+def load_export(session, folder, has_files):
+    """Replace the export table with the staged pages (files are purged after loading)"""
+    session.sql(f"TRUNCATE TABLE {EXPORT_TABLE}").collect()
+    if not has_files:
+        return 0
+    session.sql(
+        f"COPY INTO {EXPORT_TABLE} (CONTACT_ID, FIRST_NAME, LAST_NAME, EMAIL, PATIENT_ID, CREATED_DATE, SYSTEM_MODSTAMP) "
+        f"FROM (SELECT $1, $2, $3, $4, TRY_TO_NUMBER($5), "
+        f"TRY_TO_TIMESTAMP_TZ($6, '{TIMESTAMP_FORMAT}'), TRY_TO_TIMESTAMP_TZ($7, '{TIMESTAMP_FORMAT}') FROM {folder}/) "
+        "FILE_FORMAT = (TYPE = CSV SKIP_HEADER = 1 FIELD_OPTIONALLY_ENCLOSED_BY = '\"' "
+        "EMPTY_FIELD_AS_NULL = TRUE COMPRESSION = GZIP) "
+        "PURGE = TRUE"
+    ).collect()
+    return session.sql(f"SELECT COUNT(*) AS N FROM {EXPORT_TABLE}").collect()[0]['N']
+
+def build_mismatch_tables(session, run_id):
+    """Rebuild each mismatch table from the export; returns {table: rows}"""
+    counts = {}
+    for table, query in MISMATCH_TABLES.items():
+        session.sql(
+            f"CREATE OR REPLACE TABLE {SCHEMA}.{table} AS "
+            f"SELECT '{run_id}' AS RUN_ID, m.* FROM ({query}) m"
+        ).collect()
+        counts[table] = session.sql(f"SELECT COUNT(*) AS N FROM {SCHEMA}.{table}").collect()[0]['N']
+    return counts
+
+def main(session, chunks=8, parallel=4):
+    """Export Contacts in parallel Id-range chunks, then diff them against PATIENTS_FULL_SCALE in SQL"""
+    try:
+        chunks = int(chunks if chunks is not None else 8)
+        parallel = int(parallel if parallel is not None else 4)
+        if chunks < 1 or chunks > MAX_CHUNKS:
+            return f"ERROR: CHUNKS must be between 1 and {MAX_CHUNKS}"
+        if parallel < 1:
+            return "ERROR: PARALLEL must be at least 1"
+
+        started = time.perf_counter()
+        circuit.use_persistent_breaker(session)
+        if transport.breaker_open():
+            return circuit.unavailable_result()
+        try:
+            access_token, instance_url = auth.use_vended_token(session)
+        except Exception as e:
+            return circuit.error_result("Authentication failed", e)
+
+        run_id = str(uuid.uuid4())
+        writer = StageWriter(session, f"{STAGE}/{run_id}")
+        try:
+            conditions, api_calls = batch.pk_chunk_filters(access_token, instance_url, 'Contact', chunks, EXPORT_WHERE)
+            exported = 0
+            with ThreadPoolExecutor(max_workers=min(parallel, max(1, len(conditions)))) as pool:
+                futures = [pool.submit(export_chunk, access_token, instance_url, index, condition, writer)
+                           for index, condition in enumerate(conditions, 1)]
+                for future in futures:
+                    rows, calls = future.result()
+                    exported += rows
+                    api_calls += calls
+        except Exception as e:
+            session.sql(f"REMOVE {writer.folder}/").collect()
+            return circuit.error_result("Contact export failed", e)
+
+        loaded = load_export(session, writer.folder, writer.files > 0)
+        export_seconds = time.perf_counter() - started
+
+        diff_started = time.perf_counter()
+        counts = build_mismatch_tables(session, run_id)
+        diff_seconds = time.perf_counter() - diff_started
+
+        session.sql(
+            f"INSERT INTO {SCHEMA}.RECONCILIATION_RUNS "
+            "(RUN_ID, RUN_AT, CONTACTS_EXPORTED, DUPLICATE_CONTACTS, ORPHAN_CONTACTS, EMAIL_MISMATCHES, "
+            "NAME_MISMATCHES, EXPORT_SECONDS, DIFF_SECONDS) "
+            "SELECT ?, CURRENT_TIMESTAMP(), ?, ?, ?, ?, ?, ?, ?",
+            params=[run_id, loaded, counts['RECON_DUPLICATE_CONTACTS'], counts['RECON_ORPHAN_CONTACTS'],
+                    counts['RECON_EMAIL_MISMATCHES'], counts['RECON_NAME_MISMATCHES'],
+                    export_seconds, diff_seconds]
+        ).collect()
+
+        result_parts = [
+            f"RUN_ID: {run_id}",
+            f"CONTACTS_EXPORTED: {loaded}",
+            f"CHUNKS: {len(conditions)} ({writer.files} files)",
+            f"DUPLICATE_CONTACTS: {counts['RECON_DUPLICATE_CONTACTS']}",
+            f"ORPHAN_CONTACTS: {counts['RECON_ORPHAN_CONTACTS']}",
+            f"EMAIL_MISMATCHES: {counts['RECON_EMAIL_MISMATCHES']}",
+            f"NAME_MISMATCHES: {counts['RECON_NAME_MISMATCHES']}",
+            f"API_CALLS: {api_calls}",
+            f"EXPORT: {export_seconds:.2f}s ({loaded / export_seconds if export_seconds else 0:.0f} rows/s)",
+            f"DIFF: {diff_seconds:.2f}s"
+        ]
+        if loaded != exported:
+            result_parts.append(f"WARNING: Salesforce reported {exported} rows, {loaded} loaded")
+        return " | ".join(result_parts)
+
+    except Exception as e:
+        return circuit.error_result("Unexpected error in procedure", e)
+
+$$;
+
+-- Full reconciliation (raise CHUNKS / PARALLEL for larger orgs)
+CALL RECONCILE_SALESFORCE_CONTACTS();
+
+-- Run history
+SELECT RUN_AT, CONTACTS_EXPORTED, DUPLICATE_CONTACTS, ORPHAN_CONTACTS, EMAIL_MISMATCHES, NAME_MISMATCHES,
+       ROUND(EXPORT_SECONDS, 1) AS export_seconds, ROUND(DIFF_SECONDS, 1) AS diff_seconds
+FROM RECONCILIATION_RUNS
+ORDER BY RUN_AT DESC
+LIMIT 10;
+
+-- Patients pushed twice: contacts that could be merged or deleted (KEEP_CONTACT = FALSE)
+SELECT PATIENT_ID, CONTACT_ID, FIRST_NAME, LAST_NAME, EMAIL, CREATED_DATE, KEEP_CONTACT
+FROM RECON_DUPLICATE_CONTACTS
+ORDER BY PATIENT_ID, CREATED_DATE
+LIMIT 100;
+
+SELECT * FROM RECON_ORPHAN_CONTACTS LIMIT 100;
+SELECT REASON, COUNT(*) AS contacts FROM RECON_EMAIL_MISMATCHES GROUP BY REASON;
+SELECT * FROM RECON_NAME_MISMATCHES LIMIT 100;
@@ -0,0 +1,304 @@
+-- Deploy Multi-Campaign Manager: several campaign -> patients assignments in one call
+-- Agents that push the same cohort into several campaigns make one CALL instead of one per campaign.
+-- Every distinct patient is resolved once (by patient_id), campaigns are looked up together and the
+-- missing ones created in one request, then all memberships across campaigns are checked and written
+-- with sObject Collections (up to 200 members per request, campaigns mixed).
+-- When Salesforce is unreachable the assignments are queued in SALESFORCE_OUTBOX (CAMPAIGN_STATUS: QUEUED)
+-- and sent later by DRAIN_SALESFORCE_OUTBOX (29_proc__drain_salesforce_outbox.sql).
+-- Requires the shared sfclient.zip on HEALTHCARE_DEMO_STAGE (see the Readme) and GET_SALESFORCE_TOKEN (script 19).
+
+USE DATABASE CUR_SYNTHETIC_HEALTHCARE;
+USE SCHEMA DEMO_ASSETS;
+USE WAREHOUSE CURWH_HEALTHCARE_DEMO_SMALL;
+
+-- ASSIGNMENTS_JSON: [{"campaign_name": "...", "patients": [{"name", "patient_id", "email"}, ...]}, ...]
+--                   or {"<campaign name>": [patients], ...}
+-- PLAN_ONLY:        resolve campaigns, contacts and members and report what would be written, no writes
+CREATE OR REPLACE PROCEDURE SALESFORCE_MULTI_CAMPAIGN_MANAGER(
+    ASSIGNMENTS_JSON STRING,
+    PLAN_ONLY BOOLEAN DEFAULT FALSE
+)
+RETURNS STRING
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('requests', 'snowflake-snowpark-python')
+HANDLER = 'main'
+IMPORTS = ('@CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.HEALTHCARE_DEMO_STAGE/sfclient.zip')
+EXTERNAL_ACCESS_INTEGRATIONS = (SALESFORCE_SYNTHEA_INTEGRATION_JDB)
+EXECUTE AS CALLER
+AS
+$$
+import json
+import math
+
+from sfclient import auth, batch, circuit, outbox, transport
+from sfclient.records import build_campaign_data, build_patient_contact, patient_id_key, patient_id_literal
+
+REQUIRED_FIELDS = ('name', 'patient_id', 'email')
+
+def parse_assignments(assignments_json):
+    """Parse the assignments into [(campaign_name, [patient, ...])], validating every patient"""
+    try:
+        data = json.loads(assignments_json)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON format: {str(e)}")
+
+    if isinstance(data, dict):
+        data = [{'campaign_name': name, 'patients': patients} for name, patients in data.items()]
+    if not isinstance(data, list) or not data:
+        raise ValueError("Assignments must be a non-empty JSON array or object")
+
+    assignments = []
+    for i, assignment in enumerate(data, 1):
+        if not isinstance(assignment, dict):
+            raise ValueError(f"Assignment {i} must be a JSON object")
+        campaign_name = assignment.get('campaign_name')
+        patients = assignment.get('patients')
+        if not campaign_name or not isinstance(campaign_name, str):
+            raise ValueError(f"Assignment {i} needs a campaign_name string")
+        if not isinstance(patients, list) or not patients:
+            raise ValueError(f"Assignment {i} ({campaign_name}) needs a non-empty patients array")
+        for j, patient in enumerate(patients, 1):
+            if not isinstance(patient, dict):
+                raise ValueError(f"{campaign_name}: patient {j} must be a JSON object")
+            missing_fields = [field for field in REQUIRED_FIELDS if not patient.get(field)]
+            if missing_fields:
+                raise ValueError(f"{campaign_name}: patient {j} missing required fields: {', '.join(missing_fields)}")
+        assignments.append((campaign_name, patients))
+    return assignments
+
+def collection_calls(records):
+    return math.ceil(records / batch.COLLECTION_BATCH_SIZE)
+
+def plan_assignments(access_token, instance_url, assignments):
+    """Resolve every campaign, distinct patient and existing membership once"""
+    patients = {}
+    wanted = {}
+    duplicates = 0
+    for campaign_name, campaign_patients in assignments:
+        keys = wanted.setdefault(campaign_name, [])
+        for patient in campaign_patients:
+            key = patient_id_key(patient['patient_id'])
+            patients.setdefault(key, patient)
+            if key in keys:
+                duplicates += 1
+            else:
+                keys.append(key)
+
+    campaigns, api_calls = batch.find_campaigns(access_token, instance_url, wanted)
+    records, calls = batch.query_in_batches(
+        access_token, instance_url,
+        "SELECT Id, patient_id__c FROM Contact WHERE patient_id__c IN ({values})",
+        [patient_id_literal(key) for key in sorted(patients)])
+    api_calls += calls
+    contacts = {}
+    for record in records:
+        if record.get('patient_id__c') is not None:
+            contacts.setdefault(patient_id_key(record['patient_id__c']), record['Id'])
+
+    members = set()
+    if campaigns and contacts:
+        members, calls = batch.find_campaign_members(access_token, instance_url, campaigns.values(), contacts.values())
+        api_calls += calls
+
+    return {
+        'wanted': wanted,
+        'patients': patients,
+        'campaigns': campaigns,
+        'contacts': contacts,
+        'members': members,
+        'duplicates': duplicates,
+        'read_calls': api_calls
+    }
+
+def pending_members(plan):
+    """(campaign_name, patient key) pairs that are not members yet, and the count already members"""
+    pending = []
+    skipped = 0
+    for campaign_name, keys in plan['wanted'].items():
+        campaign_id = plan['campaigns'].get(campaign_name)
+        for key in keys:
+            contact_id = plan['contacts'].get(key)
+            if campaign_id and contact_id and (campaign_id, contact_id) in plan['members']:
+                skipped += 1
+            else:
+                pending.append((campaign_name, key))
+    return pending, skipped
+
+def format_plan(plan):
+    """Dry-run result: what a run would create and write, and the API calls it would take"""
+    pending, skipped = pending_members(plan)
+    missing_campaigns = [name for name in plan['wanted'] if name not in plan['campaigns']]
+    missing_contacts = [key for key in plan['patients'] if key not in plan['contacts']]
+    write_calls = (collection_calls(len(missing_campaigns)) + collection_calls(len(missing_contacts))
+                   + collection_calls(len(pending)))
+    return " | ".join([
+        "MODE: PLAN",
+        f"CAMPAIGNS: {len(plan['wanted'])}",
+        f"CAMPAIGNS_TO_CREATE: {len(missing_campaigns)}",
+        f"ASSIGNMENTS_REQUESTED: {sum(len(keys) for keys in plan['wanted'].values())}",
+        f"DISTINCT_PATIENTS: {len(plan['patients'])}",
+        f"CONTACTS_TO_CREATE: {len(missing_contacts)}",
+        f"MEMBERS_TO_INSERT: {len(pending)}",
+        f"SKIPPED_ALREADY_MEMBERS: {skipped}",
+        f"EST_API_CALLS: {plan['read_calls'] + write_calls} ({plan['read_calls']} reads, {write_calls} writes)"
+    ])
+
+def run_assignments(access_token, instance_url, plan):
+    """Create missing campaigns and contacts, then insert every pending membership across campaigns"""
+    failures = []
+    api_calls = plan['read_calls']
+    campaigns = dict(plan['campaigns'])
+    contacts = dict(plan['contacts'])
+
+    new_campaigns = [name for name in plan['wanted'] if name not in campaigns]
+    if new_campaigns:
+        results = batch.create_collection(access_token, instance_url, 'Campaign',
+                                          [build_campaign_data(name) for name in new_campaigns],
+                                          raise_unavailable=True)
+        api_calls += collection_calls(len(new_campaigns))
+        for name, (campaign_id, error) in zip(new_campaigns, results):
+            if campaign_id:
+                campaigns[name] = campaign_id
+            else:
+                failures.append(f"{name}: Failed to create campaign ({error})")
+
+    new_contacts = [key for key in plan['patients'] if key not in contacts]
+    if new_contacts:
+        results = batch.create_collection(access_token, instance_url, 'Contact',
+                                          [build_patient_contact(plan['patients'][key]) for key in new_contacts],
+                                          raise_unavailable=True)
+        api_calls += collection_calls(len(new_contacts))
+        for key, (contact_id, error) in zip(new_contacts, results):
+            if contact_id:
+                contacts[key] = contact_id
+            else:
+                failures.append(f"{plan['patients'][key]['name']}: Failed to create contact ({error})")
+
+    pending, skipped = pending_members(plan)
+    inserts = []
+    added = {name: 0 for name in plan['wanted']}
+    for campaign_name, key in pending:
+        campaign_id = campaigns.get(campaign_name)
+        contact_id = contacts.get(key)
+        if campaign_id and contact_id:
+            inserts.append((campaign_name, key, {"CampaignId": campaign_id, "ContactId": contact_id, "Status": "Sent"}))
+    if inserts:
+        results = batch.create_collection(access_token, instance_url, 'CampaignMember',
+                                          [member for _, _, member in inserts], raise_unavailable=True)
+        api_calls += collection_calls(len(inserts))
+        for (campaign_name, key, _), (member_id, error) in zip(inserts, results):
+            if member_id:
+                added[campaign_name] += 1
+            else:
+                failures.append(f"{plan['patients'][key]['name']} -> {campaign_name}: Failed to add to campaign ({error})")
+
+    requested = sum(len(keys) for keys in plan['wanted'].values())
+    members_added = sum(added.values())
+    campaign_results = "; ".join(
+        f"{name}: {added[name]}/{len(keys)} added ({'CREATED' if name in new_campaigns else 'EXISTING'})"
+        for name, keys in plan['wanted'].items())
+    result_parts = [
+        f"CAMPAIGNS: {len(plan['wanted'])}",
+        f"CAMPAIGNS_CREATED: {sum(1 for name in new_campaigns if name in campaigns)}",
+        f"ASSIGNMENTS_REQUESTED: {requested}",
+        f"DISTINCT_PATIENTS: {len(plan['patients'])}",
+        f"CONTACTS_CREATED: {sum(1 for key in new_contacts if key in contacts)}",
+        f"MEMBERS_ADDED: {members_added}",
+        f"SKIPPED_ALREADY_MEMBERS: {skipped}",
+        f"CAMPAIGN_RESULTS: {campaign_results}"
+    ]
+    if plan['duplicates']:
+        result_parts.append(f"DUPLICATE_ASSIGNMENTS_IGNORED: {plan['duplicates']}")
+    if failures:
+        result_parts.append(f"FAILED: {len(failures)}")
+        failed_summary = "; ".join(failures[:5])
+        if len(failures) > 5:
+            failed_summary += f"; ... and {len(failures) - 5} more"
+        result_parts.append(f"FAILURE_DETAILS: {failed_summary}")
+    result_parts.extend([
+        f"API_CALLS: {api_calls}",
+        f"BYTES_SAVED: {transport.format_bytes_saved()}",
+        f"SUCCESS_RATE: {round((members_added + skipped) / requested * 100, 1)}%"
+    ])
+    return " | ".join(result_parts)
+
+def queued_result(session, assignments, error_result):
+    """Queue every assignment in SALESFORCE_OUTBOX because Salesforce is unreachable; error_result is
+    returned if that fails too. Queued items are re-resolved when drained, so earlier writes are not repeated."""
+    try:
+        store = outbox.SnowflakeOutbox(session)
+        queued = store.enqueue([outbox.queue_item(campaign_name, build_patient_contact(patient))
+                                for campaign_name, patients in assignments for patient in patients],
+                               source='SALESFORCE_MULTI_CAMPAIGN_MANAGER')
+        pending = store.counts().get('PENDING', 0)
+    except Exception as e:
+        return f"{error_result} | QUEUE_FAILED: {str(e)}"
+    return " | ".join([
+        f"CAMPAIGNS: {len(assignments)}",
+        "CAMPAIGN_STATUS: QUEUED",
+        f"ASSIGNMENTS_REQUESTED: {sum(len(patients) for _, patients in assignments)}",
+        f"ASSIGNMENTS_QUEUED: {queued}",
+        f"OUTBOX_PENDING: {pending}",
+        f"REASON: {error_result[len('ERROR: '):]}"
+    ])
+
+def stage_failed(session, assignments, context, error):
+    """Result for a failed stage: queued when Salesforce is unreachable, otherwise the ERROR"""
+    if circuit.is_outage(error):
+        return queued_result(session, assignments, circuit.error_result(context, error))
+    return circuit.error_result(context, error)
+
+def main(session, assignments_json, plan_only=False):
+    """Load several campaign -> patients assignments, resolving each distinct patient once"""
+    try:
+        if not assignments_json or not isinstance(assignments_json, str):
+            return "ERROR: Assignments JSON is required and must be a string"
+        try:
+            assignments = parse_assignments(assignments_json)
+        except ValueError as e:
+            return f"ERROR: {str(e)}"
+        transport.reset_compression_stats()
+
+        circuit.use_persistent_breaker(session)
+        if transport.breaker_open():
+            if plan_only:
+                return circuit.unavailable_result()
+            return queued_result(session, assignments, circuit.unavailable_result())
+        try:
+            access_token, sf_instance_url = auth.use_vended_token(session)
+        except Exception as e:
+            if plan_only:
+                return circuit.error_result("Authentication failed", e)
+            return stage_failed(session, assignments, "Authentication failed", e)
+
+        try:
+            plan = plan_assignments(access_token, sf_instance_url, assignments)
+        except Exception as e:
+            if plan_only:
+                return circuit.error_result("Planning failed", e)
+            return stage_failed(session, assignments, "Planning failed", e)
+        if plan_only:
+            return format_plan(plan)
+
+        try:
+            return run_assignments(access_token, sf_instance_url, plan)
+        except Exception as e:
+            return stage_failed(session, assignments, "Multi-campaign load failed", e)
+
+    except Exception as e:
+        return circuit.error_result("Unexpected error in procedure", e)
+
+$$;
+
+-- Example: the same two patients into two campaigns, one call
+CALL SALESFORCE_MULTI_CAMPAIGN_MANAGER('[
+    {"campaign_name": "Diabetes Prevention Program", "patients": [
+        {"name": "Alex Thompson", "patient_id": 300001, "email": "alex.thompson.pid300001@healthcaretest.com"},
+        {"name": "Beth Rodriguez", "patient_id": 300002, "email": "beth.rodriguez.pid300002@healthcaretest.com"}
+    ]},
+    {"campaign_name": "Patient Wellness Check 2025", "patients": [
+        {"name": "Alex Thompson", "patient_id": 300001, "email": "alex.thompson.pid300001@healthcaretest.com"},
+        {"name": "Beth Rodriguez", "patient_id": 300002, "email": "beth.rodriguez.pid300002@healthcaretest.com"}
+    ]}
+]', PLAN_ONLY => TRUE);
@@ -0,0 +1,123 @@
+-- Deploy Salesforce Outbound Queue: store-and-forward for campaign writes
+-- SALESFORCE_CAMPAIGN_MANAGER queues its patients in SALESFORCE_OUTBOX instead of returning an ERROR when
+-- Salesforce is unreachable (connection errors, timeouts, 5xx or an open circuit breaker).
+-- DRAIN_SALESFORCE_OUTBOX sends the oldest pending items in rounds of BATCH_ITEMS (any mix of campaigns):
+-- campaigns, contacts and memberships are resolved with bulk reads and written with sObject Collections,
+-- then the next round starts after INTERVAL_SECONDS. It stops as soon as Salesforce is unreachable again;
+-- unsent items go back to PENDING. Items rejected MAX_ATTEMPTS (5) times are parked as FAILED.
+-- Each round is claimed first (STATUS = 'SENDING', CLAIMED_BY = the drain's run id), so overlapping drains
+-- (a scheduled task and a manual CALL) send disjoint rows. Rows left SENDING by a drain that died are
+-- claimed again after 30 minutes.
+-- Requires the shared sfclient.zip on HEALTHCARE_DEMO_STAGE (see the Readme) and GET_SALESFORCE_TOKEN (script 19).
+
+USE DATABASE CUR_SYNTHETIC_HEALTHCARE;
+USE SCHEMA DEMO_ASSETS;
+USE WAREHOUSE CURWH_HEALTHCARE_DEMO_SMALL;
+
+-- One row per queued campaign write (sfclient.outbox.SnowflakeOutbox)
+CREATE TABLE IF NOT EXISTS SALESFORCE_OUTBOX (
+    ITEM_ID NUMBER AUTOINCREMENT START 1 INCREMENT 1 ORDER,
+    CAMPAIGN_NAME STRING NOT NULL,
+    CONTACT VARIANT NOT NULL,
+    MATCH_FIELD STRING NOT NULL,
+    STATUS STRING DEFAULT 'PENDING',
+    ATTEMPTS NUMBER DEFAULT 0,
+    LAST_ERROR STRING,
+    SOURCE STRING,
+    ENQUEUED_AT TIMESTAMP_LTZ DEFAULT CURRENT_TIMESTAMP(),
+    SENT_AT TIMESTAMP_LTZ,
+    CLAIMED_BY STRING,
+    CLAIMED_AT TIMESTAMP_LTZ
+)
+COMMENT = 'Outbound queue of Salesforce campaign writes (SALESFORCE_CAMPAIGN_MANAGER -> DRAIN_SALESFORCE_OUTBOX)';
+
+-- Tables created before drains claimed their rounds
+ALTER TABLE SALESFORCE_OUTBOX ADD COLUMN IF NOT EXISTS CLAIMED_BY STRING;
+ALTER TABLE SALESFORCE_OUTBOX ADD COLUMN IF NOT EXISTS CLAIMED_AT TIMESTAMP_LTZ;
+
+-- MAX_ITEMS:        pending items sent by one call (oldest first)
+-- BATCH_ITEMS:      items per round, 1-200; one sObject Collections call per object type per round
+-- INTERVAL_SECONDS: pause between rounds, so a backlog drains at a steady rate
+CREATE OR REPLACE PROCEDURE DRAIN_SALESFORCE_OUTBOX(
+    MAX_ITEMS NUMBER DEFAULT 2000,
+    BATCH_ITEMS NUMBER DEFAULT 200,
+    INTERVAL_SECONDS FLOAT DEFAULT 1
+)
+RETURNS STRING
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('requests', 'snowflake-snowpark-python')
+HANDLER = 'main'
+IMPORTS = ('@CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.HEALTHCARE_DEMO_STAGE/sfclient.zip')
+EXTERNAL_ACCESS_INTEGRATIONS = (SALESFORCE_SYNTHEA_INTEGRATION_JDB)
+EXECUTE AS CALLER
+AS
+$$
+import time
+
+from sfclient import auth, batch, circuit, outbox, transport
+
+def main(session, max_items=2000, batch_items=200, interval_seconds=1):
+    """Send pending SALESFORCE_OUTBOX items to Salesforce in batched rounds"""
+    try:
+        max_items = int(max_items if max_items is not None else outbox.DRAIN_MAX_ITEMS)
+        batch_items = int(batch_items or outbox.DRAIN_BATCH_ITEMS)
+        interval_seconds = float(interval_seconds if interval_seconds is not None else outbox.DRAIN_INTERVAL_SECONDS)
+        if max_items < 1:
+            return "ERROR: MAX_ITEMS must be 1 or greater"
+        if batch_items < 1 or batch_items > batch.COLLECTION_BATCH_SIZE:
+            return f"ERROR: BATCH_ITEMS must be between 1 and {batch.COLLECTION_BATCH_SIZE}"
+        if interval_seconds < 0:
+            return "ERROR: INTERVAL_SECONDS must be 0 or greater"
+
+        started = time.perf_counter()
+        store = outbox.SnowflakeOutbox(session)
+        if not store.counts().get('PENDING'):
+            return f"NOTHING_TO_SEND | OUTBOX: {outbox.format_counts(store.counts())}"
+
+        transport.reset_compression_stats()
+        circuit.use_persistent_breaker(session)
+        if transport.breaker_open():
+            return f"{circuit.unavailable_result()} | OUTBOX: {outbox.format_counts(store.counts())}"
+        try:
+            access_token, instance_url = auth.use_vended_token(session)
+        except Exception as e:
+            return f"{circuit.error_result('Authentication failed', e)} | OUTBOX: {outbox.format_counts(store.counts())}"
+
+        stats = outbox.drain(store, access_token, instance_url, max_items, batch_items, interval_seconds)
+        result_parts = [
+            f"ROUNDS: {stats['rounds']}",
+            f"SENT: {stats['sent']}",
+            f"RETRYING: {stats['retrying']}",
+            f"FAILED: {stats['failed']}",
+            f"API_CALLS: {stats['api_calls']}"
+        ]
+        if stats['stopped']:
+            result_parts.append(f"STOPPED: SALESFORCE_UNAVAILABLE - {stats['stopped']}")
+        result_parts.extend([
+            f"OUTBOX: {outbox.format_counts(store.counts())}",
+            f"BYTES_SAVED: {transport.format_bytes_saved()}",
+            f"ELAPSED: {time.perf_counter() - started:.2f}s"
+        ])
+        return " | ".join(result_parts)
+
+    except Exception as e:
+        return circuit.error_result("Unexpected error in procedure", e)
+
+$$;
+
+-- Send everything queued so far
+CALL DRAIN_SALESFORCE_OUTBOX();
+
+-- Optional: drain every 5 minutes (at most 2000 items per run, 200 per round, one round per second)
+-- CREATE OR REPLACE TASK DRAIN_SALESFORCE_OUTBOX_TASK
+--   WAREHOUSE = CURWH_HEALTHCARE_DEMO_SMALL
+--   SCHEDULE = '5 MINUTE'
+-- AS
+--   CALL DRAIN_SALESFORCE_OUTBOX();
+-- ALTER TASK DRAIN_SALESFORCE_OUTBOX_TASK RESUME;
+
+-- Queue status; FAILED items keep the last Salesforce error
+SELECT STATUS, COUNT(*) AS ITEMS, MIN(ENQUEUED_AT) AS OLDEST, MAX(SENT_AT) AS LAST_SENT
+FROM SALESFORCE_OUTBOX GROUP BY STATUS;
+SELECT ITEM_ID, CAMPAIGN_NAME, ATTEMPTS, LAST_ERROR FROM SALESFORCE_OUTBOX WHERE STATUS = 'FAILED' ORDER BY ITEM_ID;
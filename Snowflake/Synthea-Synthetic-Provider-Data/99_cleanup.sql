@@ -94,6 +94,8 @@ DROP FUNCTION IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.IDENTIFY_HIGH_COST_
 DROP FUNCTION IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.GENERATE_PATIENT_INSIGHTS(NUMBER);
 DROP FUNCTION IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.GET_PATIENT_SUMMARY(NUMBER);
 DROP FUNCTION IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.GET_PATIENT_CONDITIONS(NUMBER);
+DROP FUNCTION IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.GET_PATIENT_CONDITIONS_BATCH(ARRAY);
+DROP FUNCTION IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_INSIGHTS_PROMPT(NUMBER);
 DROP FUNCTION IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.ANALYZE_PATIENT_RISK(NUMBER);
 DROP FUNCTION IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PREDICT_NEXT_YEAR_COSTS(NUMBER);
 
@@ -113,6 +115,31 @@ DROP PROCEDURE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.CREATE_CASE_FOR_PA
 DROP PROCEDURE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.CREATE_CASE_FOR_PATIENT(NUMBER, STRING);
 DROP PROCEDURE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.CREATE_CASE_FOR_PATIENT(NUMBER);
 
+-- Drop Salesforce token vending stored procedure (script 19)
+DROP PROCEDURE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.GET_SALESFORCE_TOKEN(NUMBER);
+
+-- Drop cohort pusher stored procedure (script 21)
+DROP PROCEDURE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PUSH_COHORT_TO_SALESFORCE(STRING, STRING, STRING, NUMBER, NUMBER, NUMBER, NUMBER);
+
+-- Drop cached insights stored procedure (script 22)
+DROP PROCEDURE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.GENERATE_PATIENT_INSIGHTS_CACHED(NUMBER, STRING, NUMBER);
+
+-- Drop search benchmark stored procedure (script 23)
+DROP PROCEDURE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.BENCHMARK_PATIENT_SEARCH(NUMBER, NUMBER, STRING);
+
+-- Drop campaign member reverse sync stored procedure (script 24)
+DROP PROCEDURE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SYNC_CAMPAIGN_MEMBERS_FROM_SALESFORCE(BOOLEAN, NUMBER);
+
+-- Drop contact reconciliation stored procedure (script 27)
+DROP PROCEDURE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.RECONCILE_SALESFORCE_CONTACTS(NUMBER, NUMBER);
+
+-- Drop multi-campaign manager stored procedure (script 28)
+DROP PROCEDURE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SALESFORCE_MULTI_CAMPAIGN_MANAGER(STRING, BOOLEAN);
+
+-- Drop outbox drain stored procedure and its optional task (script 29)
+DROP TASK IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.DRAIN_SALESFORCE_OUTBOX_TASK;
+DROP PROCEDURE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.DRAIN_SALESFORCE_OUTBOX(NUMBER, NUMBER, FLOAT);
+
 SELECT 'Demo procedures dropped' as procedures_status;
 
 -- ==============================================================================
@@ -124,6 +151,7 @@ DROP VIEW IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.TOP_COST_PATIENTS;
 DROP VIEW IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.DEMO_DASHBOARD;
 DROP VIEW IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.HIGH_COST_PATIENTS_VIEW;
 DROP VIEW IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_ANALYSIS_VIEW;
+DROP VIEW IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.CAMPAIGN_MEMBER_PATIENTS;
 
 SELECT 'Demo views dropped' as views_status;
 
@@ -136,6 +164,27 @@ DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.TEST_RESULTS;
 DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.DEMO_QUERIES;
 DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.CASE_MANAGEMENT_LOG;
 DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.DEMO_METRICS;
+DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_INSIGHTS_CACHE;
+DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SEARCH_BENCHMARK_RUNS;
+DROP DYNAMIC TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_ROLLUPS;
+DROP DYNAMIC TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_CONDITION_LISTS;
+DROP TASK IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SYNC_PATIENTS_FULL_SCALE;
+DROP VIEW IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_SEARCH_OPTIMIZED;
+DROP DYNAMIC TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_SEARCH_ALL;
+DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENTS_FULL_SCALE;
+DROP DYNAMIC TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.PATIENT_COST_SUMMARY;
+DROP DYNAMIC TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.MONTHLY_COST_SUMMARY;
+DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SALESFORCE_CAMPAIGN_MEMBERS;
+DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SALESFORCE_CONTACT_XREF;
+DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SALESFORCE_CONTACTS_EXPORT;
+DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.RECONCILIATION_RUNS;
+DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.RECON_DUPLICATE_CONTACTS;
+DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.RECON_ORPHAN_CONTACTS;
+DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.RECON_EMAIL_MISMATCHES;
+DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.RECON_NAME_MISMATCHES;
+DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SALESFORCE_TOKEN_CACHE;
+DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SALESFORCE_CIRCUIT_BREAKER;
+DROP TABLE IF EXISTS CUR_SYNTHETIC_HEALTHCARE.DEMO_ASSETS.SALESFORCE_OUTBOX;
 
 SELECT 'Demo tables dropped' as tables_status;
 
@@ -263,7 +312,8 @@ SELECT
   '2. Document any customizations made during demo' as recommendation_2,  
   '3. Update demo documentation with lessons learned' as recommendation_3,
   '4. Consider creating reusable demo templates' as recommendation_4,
-  '5. Share feedback on demo effectiveness and improvements' as recommendation_5;
+  '5. Share feedback on demo effectiveness and improvements' as recommendation_5,
+  '6. Purge demo contacts and campaigns from Salesforce: python Salesforce/purge_test_data.py' as recommendation_6;
 
 -- ==============================================================================
 -- END OF SCRIPT